@@ -0,0 +1,177 @@
+import argparse
+import hashlib
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.pipeline import analyze_song
+from src.report import save_report
+from src.cues import save_cues
+from src.cache import StageCache
+from src.fingerprint_store import FingerprintStore
+
+
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".flac", ".ogg", ".m4a", ".aif", ".aiff"}
+
+
+# Expand directories (recursively) and .txt file lists into audio paths.
+def collect_audio_files(inputs):
+    paths = []
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        paths.append(os.path.join(root, name))
+        elif item.endswith(".txt"):
+            with open(item, "r") as f:
+                paths.extend(line.strip() for line in f if line.strip())
+        else:
+            paths.append(item)
+
+    return list(dict.fromkeys(os.path.normpath(p) for p in paths))
+
+
+# Song id per path: the file name, as main.py uses. Files whose names would
+# share an output folder (same name in different directories, or the same
+# stem with another extension) get a short hash of their absolute path.
+def assign_song_ids(paths):
+    stems = Counter(os.path.splitext(os.path.basename(p))[0] for p in paths)
+
+    song_ids = {}
+    for p in paths:
+        stem, ext = os.path.splitext(os.path.basename(p))
+        if stems[stem] > 1:
+            digest = hashlib.sha1(os.path.abspath(p).encode()).hexdigest()[:8]
+            stem = f"{stem}-{digest}"
+        song_ids[p] = stem + ext
+
+    folders = Counter(os.path.splitext(s)[0] for s in song_ids.values())
+    clashes = sorted(p for p, s in song_ids.items() if folders[os.path.splitext(s)[0]] > 1)
+    if clashes:
+        raise ValueError(f"output folders collide for: {', '.join(clashes)}")
+
+    return song_ids
+
+
+# Worker: analyze one song and write its outputs to output_root/<song>/.
+def analyze_to_dir(audio_path, output_root, store_path, cache_dir=None, stream=False,
+                   analysis_sr=None, song_id=None):
+    start = time.perf_counter()
+
+    try:
+        cache = StageCache(cache_dir) if cache_dir else None
+        result = analyze_song(
+            audio_path, stream=stream, cache=cache, analysis_sr=analysis_sr, song_id=song_id
+        )
+    except Exception as e:
+        return {
+            "path": audio_path,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "wall_seconds": time.perf_counter() - start,
+        }
+
+    if result is None:
+        return {
+            "path": audio_path,
+            "status": "no_tempo",
+            "wall_seconds": time.perf_counter() - start,
+        }
+
+    song_dir = os.path.join(output_root, os.path.splitext(result["song_id"])[0])
+    os.makedirs(song_dir, exist_ok=True)
+
+    save_report(result["report"], path=os.path.join(song_dir, "analysis.json"))
+    save_cues(result["cues"], base_path=song_dir)
+
+    with FingerprintStore(store_path) as store:
+        store.upsert(result["fingerprint"])
+
+    return {
+        "path": audio_path,
+        "status": "ok",
+        "song_id": result["song_id"],
+        "audio_seconds": result["duration"],
+        "wall_seconds": time.perf_counter() - start,
+    }
+
+
+def run_batch(paths, output_root="output", workers=None, cache_dir=None,
+              stream=False, store_path="output/fingerprints.db", analysis_sr=None):
+    workers = workers or os.cpu_count() or 1
+    song_ids = assign_song_ids(paths)
+    os.makedirs(output_root, exist_ok=True)
+
+    for p, song_id in song_ids.items():
+        if song_id != os.path.basename(p):
+            print(f"- {p} | name shared with another input, analyzed as {song_id}")
+
+    # Create the schema once so workers only ever upsert.
+    FingerprintStore(store_path).close()
+
+    results = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(analyze_to_dir, p, output_root, store_path, cache_dir, stream, analysis_sr, song_ids[p])
+            for p in paths
+        ]
+
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+
+            if r["status"] != "ok":
+                print(f"- {r['path']} | {r['status']} {r.get('error', '')}".rstrip())
+                continue
+
+            speed = r["audio_seconds"] / r["wall_seconds"]
+            print(
+                f"- {r['song_id']} | audio {r['audio_seconds']:.1f}s | "
+                f"wall {r['wall_seconds']:.2f}s | {speed:.1f}x realtime"
+            )
+
+    wall = time.perf_counter() - start
+    ok = [r for r in results if r["status"] == "ok"]
+    audio_total = sum(r["audio_seconds"] for r in ok)
+
+    print(f"\nAnalyzed {len(ok)}/{len(results)} files with {workers} workers in {wall:.2f}s")
+    if wall > 0:
+        print(f"Throughput: {len(results) / wall:.2f} files/s | {audio_total / wall:.1f}x realtime")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a directory or list of audio files.")
+    parser.add_argument("inputs", nargs="+", help="audio files, directories or .txt file lists")
+    parser.add_argument("--output", default="output", help="root for per-song output folders")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--cache-dir", default=None, help="stage cache directory (default: no cache)")
+    parser.add_argument("--store", default=None, help="fingerprint database (default: <output>/fingerprints.db)")
+    parser.add_argument("--stream", action="store_true", help="decode audio block by block")
+    parser.add_argument("--analysis-sr", type=int, default=None,
+                        help="analyze at this sample rate when the file's rate is higher")
+    args = parser.parse_args()
+
+    paths = collect_audio_files(args.inputs)
+    if not paths:
+        parser.error("no audio files found")
+
+    run_batch(
+        paths,
+        output_root=args.output,
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+        stream=args.stream,
+        analysis_sr=args.analysis_sr,
+        store_path=args.store or os.path.join(args.output, "fingerprints.db"),
+    )
+
+
+if __name__ == "__main__":
+    main()
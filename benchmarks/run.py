@@ -0,0 +1,295 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synth import CASES, case_audio, synthetic_fingerprints
+from benchmarks.startup import import_times, check_analysis_imports
+
+
+DEFAULT_DURATIONS = [30, 120, 600]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Timings below this many seconds are too noisy to call a regression.
+MIN_REGRESSION_SECONDS = 0.005
+
+
+# Child process: one end-to-end analysis with every stage traced.
+# Runs in a fresh interpreter so ru_maxrss is this song's peak alone.
+# Imports and the decoder's first-call setup are timed apart as startup,
+# by decoding a short warm-up file first.
+def _analyze_once(path, stream, warmup_path):
+    start = time.perf_counter()
+    from src import trace
+    from src.load_audio import load_audio
+    from src.pipeline import analyze_song
+    load_audio(warmup_path)
+    startup = time.perf_counter() - start
+
+    tracer = trace.enable(memory=False)
+    start = time.perf_counter()
+    result = analyze_song(path, stream=stream)
+    wall = time.perf_counter() - start
+    trace.disable()
+
+    stages = {name: s["wall"] for name, s in tracer.summary().items()}
+    return {
+        "wall": wall,
+        "startup": startup,
+        "audio_seconds": result["duration"] if result else None,
+        "tempo": result["perceived"] if result else None,
+        "meter": result["meter"]["time_signature"] if result else None,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "stages": stages,
+    }
+
+
+def bench_song(path, warmup_path, repeat=1, stream=False):
+    ctx = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        with ctx.Pool(1) as pool:
+            runs.append(pool.apply(_analyze_once, (path, stream, warmup_path)))
+
+    # Best of the repeats per timing; memory is the worst seen.
+    best = min(runs, key=lambda r: r["wall"])
+    stages = {
+        name: min(r["stages"].get(name, np.inf) for r in runs)
+        for name in best["stages"]
+    }
+    return {
+        **best,
+        "stages": stages,
+        "startup": min(r["startup"] for r in runs),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+        "throughput": best["audio_seconds"] / best["wall"] if best["audio_seconds"] else None,
+    }
+
+
+def _time(fn, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Corpus-level modules (similarity, indexes, clustering, storage) on
+# synthetic fingerprints.
+def bench_corpus(n, repeat=3, queries=20):
+    from src.fingerprint_matrix import FingerprintMatrix
+    from src.similarity import find_similar_songs, find_similar_songs_pruned
+    from src.structure_index import StructureIndex
+    from src.vector_index import VectorIndex
+    from src.section_similarity import SectionCorpus, build_section_table
+    from src.clustering import cluster_fingerprint_corpus
+    from src.fingerprint_columns import write_fingerprint_columns, FingerprintColumns
+    from src.distance_matrix import compute_distance_matrix
+    from src.fingerprint import fingerprint_to_vector
+
+    fps = synthetic_fingerprints(n, seed=1)
+    query_fps = synthetic_fingerprints(queries, seed=2)
+    timings = {}
+
+    timings["fingerprint_matrix.build"] = _time(lambda: FingerprintMatrix.from_fingerprints(fps), repeat)
+    matrix = FingerprintMatrix.from_fingerprints(fps)
+
+    timings["similarity.find_similar_songs"] = _time(
+        lambda: [find_similar_songs(q, matrix) for q in query_fps], repeat
+    ) / queries
+    timings["similarity.find_similar_songs_pruned"] = _time(
+        lambda: [find_similar_songs_pruned(q, fps) for q in query_fps[:5]], 1
+    ) / 5
+
+    timings["structure_index.build"] = _time(lambda: StructureIndex(matrix), repeat)
+    index = StructureIndex(matrix)
+    timings["structure_index.search"] = _time(
+        lambda: [index.search(q) for q in query_fps], repeat
+    ) / queries
+
+    timings["vector_index.build"] = _time(lambda: VectorIndex.from_fingerprints(fps), 1)
+    vectors = VectorIndex.from_fingerprints(fps)
+    query_vectors = [fingerprint_to_vector(q) for q in query_fps]
+    timings["vector_index.query"] = _time(
+        lambda: [vectors.query(v) for v in query_vectors], repeat
+    ) / queries
+
+    songs = [(fp["song_id"], fp["sections"], fp["duration"]) for fp in fps]
+    timings["section_similarity.build"] = _time(lambda: SectionCorpus.from_sections(songs), 1)
+    corpus = SectionCorpus.from_sections(songs)
+    tables = [build_section_table(q["sections"], q["duration"]) for q in query_fps]
+    timings["section_similarity.compare"] = _time(
+        lambda: [corpus.weighted_overall(corpus.compare(t)) for t in tables], repeat
+    ) / queries
+
+    timings["clustering.linkage"] = _time(lambda: cluster_fingerprint_corpus(fps), 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        columns = os.path.join(tmp, "fingerprints.cols")
+        timings["fingerprint_columns.write"] = _time(lambda: write_fingerprint_columns(fps, columns), 1)
+        timings["fingerprint_columns.to_matrix"] = _time(
+            lambda: FingerprintColumns(columns).to_matrix(), repeat
+        )
+
+        small = FingerprintMatrix.from_fingerprints(fps[:2000])
+        timings["distance_matrix.2000"] = _time(
+            lambda: compute_distance_matrix(small, os.path.join(tmp, "dist.npy"), condensed=True), 1
+        )
+
+    return {"songs": n, "stages": timings}
+
+
+def run(cases, durations, corpus_size, audio_dir, repeat, stream):
+    results = {"startup": {"stages": {
+        f"import {name}": seconds for name, seconds in import_times(repeat).items()
+    }}}
+    print(f"{'startup':<24} " + " | ".join(
+        f"{name} {seconds * 1000:.0f} ms" for name, seconds in results["startup"]["stages"].items()
+    ))
+
+    warmup_path = case_audio(audio_dir, "steady", 1)
+
+    for case in cases:
+        for duration in durations:
+            name = f"{case}/{duration}s"
+            path = case_audio(audio_dir, case, duration)
+            r = bench_song(path, warmup_path, repeat=repeat, stream=stream)
+            results[name] = r
+            print(
+                f"{name:<24} wall {r['wall']:8.3f}s | {r['throughput'] or 0:8.1f}x realtime | "
+                f"peak {r['peak_rss_mb']:7.1f} MB | tempo {r['tempo'] or 0:.1f} {r['meter']}"
+            )
+
+    if corpus_size:
+        name = f"corpus/{corpus_size}"
+        results[name] = bench_corpus(corpus_size, repeat=repeat)
+        print(f"{name:<24} {len(results[name]['stages'])} corpus benchmarks")
+
+    return results
+
+
+def metadata():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "date": time.strftime("%Y-%m-%d"),
+    }
+
+
+# Timings and memory of results vs baseline. A metric regresses when it
+# exceeds the baseline by more than threshold (a fraction) and, for
+# timings, by more than MIN_REGRESSION_SECONDS.
+def compare(results, baseline, threshold=0.25, memory_threshold=0.25):
+    rows, regressions = [], []
+
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        metrics = [
+            (metric, r.get(metric), base.get(metric), threshold)
+            for metric in ("wall", "startup")
+        ]
+        metrics += [
+            (f"stage {stage}", seconds, base.get("stages", {}).get(stage), threshold)
+            for stage, seconds in r["stages"].items()
+        ]
+        metrics.append(("peak_rss_mb", r.get("peak_rss_mb"), base.get("peak_rss_mb"), memory_threshold))
+
+        for metric, new, old, limit in metrics:
+            if new is None or old is None or old <= 0:
+                continue
+            ratio = new / old
+            slower = ratio > 1.0 + limit and (metric == "peak_rss_mb" or new - old > MIN_REGRESSION_SECONDS)
+            rows.append((name, metric, old, new, ratio, slower))
+            if slower:
+                regressions.append((name, metric, old, new, ratio))
+
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline on synthetic audio.")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--durations", default=",".join(map(str, DEFAULT_DURATIONS)),
+                        help="comma-separated track lengths in seconds (e.g. 30,600,7200)")
+    parser.add_argument("--corpus-size", type=int, default=10000, help="synthetic fingerprints (0 to skip)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (best is kept)")
+    parser.add_argument("--stream", action="store_true", help="decode audio block by block")
+    parser.add_argument("--audio-dir", default=os.path.join(tempfile.gettempdir(), "ais-bench-audio"),
+                        help="where rendered test audio is cached")
+    parser.add_argument("--output", default="output/benchmark.json", help="results file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (fraction)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="allowed peak memory growth")
+    parser.add_argument("--verbose", action="store_true", help="print every compared metric")
+    args = parser.parse_args()
+
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)} (have {', '.join(CASES)})")
+    durations = [int(d) for d in args.durations.split(",") if d]
+
+    results = run(cases, durations, args.corpus_size, args.audio_dir, args.repeat, args.stream)
+    report = {"meta": metadata(), "results": results}
+
+    # Deferred imports are a guarantee, not a timing: any breach fails.
+    import_problems = check_analysis_imports(args.audio_dir)
+    for problem in import_problems:
+        print(f"- {problem}")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 1 if import_problems else 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --save-baseline)")
+        return 1 if import_problems else 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+
+    rows, regressions = compare(results, baseline["results"], args.threshold, args.memory_threshold)
+
+    if args.verbose:
+        print(f"\n{'benchmark':<24} {'metric':<44} {'baseline':>10} {'now':>10} {'ratio':>7}")
+        for name, metric, old, new, ratio, slower in rows:
+            flag = "  REGRESSION" if slower else ""
+            print(f"{name:<24} {metric:<44} {old:>10.4f} {new:>10.4f} {ratio:>7.2f}{flag}")
+
+    print(f"\nCompared {len(rows)} metrics against {args.baseline} ({baseline['meta'].get('date')})")
+    if regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}:")
+        for name, metric, old, new, ratio in regressions:
+            print(f"- {name} | {metric} | {old:.4f} -> {new:.4f} ({ratio:.2f}x)")
+        return 1
+
+    print("No regressions")
+    return 1 if import_problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synth import CASES, case_audio
+
+
+# Onsets further apart than this are not the same onset.
+ONSET_TOLERANCE = 0.05
+
+
+# Median and worst distance from each reference onset to the nearest onset
+# of the other analysis, over matched pairs, plus the share matched.
+def onset_agreement(reference, times):
+    if len(reference) == 0 or len(times) == 0:
+        return {"matched": 0.0, "median_ms": None, "max_ms": None}
+
+    times = np.sort(times)
+    idx = np.clip(np.searchsorted(times, reference), 1, len(times) - 1)
+    nearest = np.minimum(np.abs(reference - times[idx - 1]), np.abs(reference - times[idx]))
+    hit = nearest <= ONSET_TOLERANCE
+
+    if not hit.any():
+        return {"matched": 0.0, "median_ms": None, "max_ms": None}
+    return {
+        "matched": float(hit.mean()),
+        "median_ms": float(np.median(nearest[hit]) * 1000.0),
+        "max_ms": float(nearest[hit].max() * 1000.0),
+    }
+
+
+# Largest shift of a section boundary, or None when the section counts differ.
+def boundary_shift(reference, sections):
+    if len(reference) != len(sections):
+        return None
+    if not reference:
+        return 0.0
+    return max(abs(a["start"] - b["start"]) for a, b in zip(reference, sections))
+
+
+def compare_rates(path, rates, repeat=3, stream=False):
+    """
+    Analyze one file at each analysis rate (None = native) and compare
+    every run against the native one.
+
+    Returns:
+        rows (list): one dict per rate, timing and agreement with native
+    """
+
+    from src.pipeline import analyze_song
+
+    runs = []
+    for rate in rates:
+        wall = np.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = analyze_song(path, stream=stream, analysis_sr=rate)
+            wall = min(wall, time.perf_counter() - start)
+        runs.append((rate, wall, result))
+
+    _, native_wall, native = runs[0]
+    rows = []
+    for rate, wall, result in runs:
+        rows.append({
+            "rate": result["sr"],
+            "wall": wall,
+            "speedup": native_wall / wall,
+            "tempo": result["perceived"],
+            "tempo_error": abs(result["perceived"] - native["perceived"]),
+            "meter": result["meter"]["time_signature"],
+            "onsets": len(result["times"]),
+            **onset_agreement(np.asarray(native["times"]), np.asarray(result["times"])),
+            "sections": len(result["labeled_sections"]),
+            "boundary_shift": boundary_shift(native["labeled_sections"], result["labeled_sections"]),
+        })
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare analysis speed and accuracy across analysis rates.")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--duration", type=int, default=120, help="track length in seconds")
+    parser.add_argument("--source-rates", default="48000,96000", help="rates the test audio is rendered at")
+    parser.add_argument("--rates", default="22050,11025", help="analysis rates compared with native")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per rate (best is kept)")
+    parser.add_argument("--stream", action="store_true", help="decode audio block by block")
+    parser.add_argument("--audio-dir", default=os.path.join(tempfile.gettempdir(), "ais-bench-audio"))
+    args = parser.parse_args()
+
+    from src.load_audio import load_audio
+
+    rates = [None] + [int(r) for r in args.rates.split(",") if r]
+
+    # Decoder and resampler warm-up, so the first case is not charged for it.
+    load_audio(case_audio(args.audio_dir, "steady", 1), sr=11025)
+
+    print(f"{'case':<22} {'rate':>9} {'wall s':>7} {'speedup':>7} {'tempo':>7} "
+          f"{'meter':>5} {'onsets':>6} {'match':>6} {'med ms':>6} {'max ms':>6} {'shift s':>7}")
+
+    for source_rate in [int(r) for r in args.source_rates.split(",") if r]:
+        for case in [c for c in args.cases.split(",") if c]:
+            path = case_audio(args.audio_dir, case, args.duration, sr=source_rate)
+            name = f"{case}@{source_rate // 1000}k"
+
+            for r in compare_rates(path, rates, repeat=args.repeat, stream=args.stream):
+                med = "-" if r["median_ms"] is None else f"{r['median_ms']:.1f}"
+                worst = "-" if r["max_ms"] is None else f"{r['max_ms']:.1f}"
+                shift = "-" if r["boundary_shift"] is None else f"{r['boundary_shift']:.2f}"
+                print(
+                    f"{name:<22} {r['rate']:>9.0f} {r['wall']:>7.3f} {r['speedup']:>6.1f}x "
+                    f"{r['tempo']:>7.2f} {r['meter']:>5} {r['onsets']:>6} {r['matched']:>6.1%} "
+                    f"{med:>6} {worst:>6} {shift:>7}"
+                )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
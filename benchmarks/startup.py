@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synth import case_audio
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points whose import cost every CLI call or batch worker pays.
+IMPORT_TARGETS = {
+    "main": "import main",
+    "batch": "import batch",
+    "serve": "import serve",
+    "pipeline": "import src.pipeline",
+}
+
+# Modules only plotting (matplotlib) or decoding (librosa) should load.
+PLOTTING_MODULES = ("matplotlib",)
+DECODER_MODULES = ("librosa",)
+
+_TIME_IMPORT = (
+    "import time; t = time.perf_counter(); {statement}; "
+    "print(time.perf_counter() - t)"
+)
+
+# Runs main.main() without plots in a scratch directory, then reports which
+# heavy modules ended up loaded.
+_RUN_MAIN = """
+import contextlib, io, json, os, sys
+os.chdir(sys.argv[1])
+import main
+main.audio_path = sys.argv[2]
+main.song_id = os.path.basename(sys.argv[2])
+main.COMPARE_MODE = False
+main.CACHE_DIR = sys.argv[3]
+with contextlib.redirect_stdout(io.StringIO()):
+    main.main()
+print(json.dumps(sorted({name.split(".")[0] for name in sys.modules})))
+"""
+
+
+def _python(args, cwd=REPO_ROOT):
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT, "PYTHONDONTWRITEBYTECODE": "1"}
+    out = subprocess.run(
+        [sys.executable, *args], cwd=cwd, env=env, check=True,
+        capture_output=True, text=True,
+    )
+    return out.stdout.strip().splitlines()[-1]
+
+
+# Best-of-repeat import time of each entry point, in a fresh interpreter.
+def import_times(repeat=5):
+    return {
+        name: min(
+            float(_python(["-c", _TIME_IMPORT.format(statement=statement)]))
+            for _ in range(repeat)
+        )
+        for name, statement in IMPORT_TARGETS.items()
+    }
+
+
+def loaded_modules(audio_path, work_dir, cache_dir):
+    os.makedirs(os.path.join(work_dir, "output"), exist_ok=True)
+    return set(json.loads(_python(["-c", _RUN_MAIN, work_dir, audio_path, cache_dir])))
+
+
+def check_analysis_imports(audio_dir):
+    """
+    Run main.py's analysis (no plots) twice in fresh processes: once with
+    an empty stage cache, once from the warm cache.
+
+    Returns:
+        problems (list): heavy modules loaded where they must not be
+    """
+
+    audio_path = case_audio(audio_dir, "steady", 30)
+    problems = []
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cache_dir = os.path.join(work_dir, "cache")
+
+        cold = loaded_modules(audio_path, work_dir, cache_dir)
+        problems += [f"{m} imported by an uncached analysis" for m in PLOTTING_MODULES if m in cold]
+
+        warm = loaded_modules(audio_path, work_dir, cache_dir)
+        problems += [
+            f"{m} imported by a cached analysis"
+            for m in PLOTTING_MODULES + DECODER_MODULES if m in warm
+        ]
+
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure startup cost and check deferred imports.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--audio-dir", default=os.path.join(tempfile.gettempdir(), "ais-bench-audio"))
+    args = parser.parse_args()
+
+    for name, seconds in import_times(args.repeat).items():
+        print(f"import {name:<10} {seconds * 1000:8.1f} ms")
+
+    baseline = float(_python(["-c", _TIME_IMPORT.format(statement="import numpy")]))
+    print(f"(numpy alone  {baseline * 1000:8.1f} ms)")
+
+    problems = check_analysis_imports(args.audio_dir)
+    for problem in problems:
+        print(f"- {problem}")
+    if not problems:
+        print("Analysis path loads neither matplotlib nor, from cache, librosa")
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import os
+import random
+import numpy as np
+import soundfile as sf
+
+
+# Benchmark cases: click tracks with a known tempo and meter.
+# sections: (seconds, clicks per beat) cycled over the track, to give the
+# section detector density changes to find.
+CASES = {
+    "steady": {"bpm": 120.0, "meter": 4},
+    "waltz_swing": {"bpm": 96.0, "meter": 3, "swing": 0.33},
+    "tempo_ramp": {"bpm": 90.0, "bpm_end": 130.0, "meter": 4},
+    "sections": {"bpm": 100.0, "meter": 4, "sections": [(30.0, 1), (30.0, 2), (30.0, 4)]},
+}
+
+CLICK_SAMPLES = 1500
+
+
+# Beat onset times (seconds) for a tempo going linearly from bpm to bpm_end.
+def beat_times(duration, bpm, bpm_end=None):
+    bpm_end = bpm if bpm_end is None else bpm_end
+
+    # Beat phase is the integral of the tempo; invert it on a fine grid.
+    t = np.linspace(0.0, duration, int(duration * 100) + 1)
+    phase = (bpm * t + (bpm_end - bpm) * t ** 2 / (2 * duration)) / 60.0
+    return np.interp(np.arange(int(phase[-1]) + 1), phase, t)
+
+
+# Click onsets as (time, amplitude): accented downbeats, plain beats and
+# quieter subdivisions, with swing delaying every other subdivision.
+def click_events(duration, bpm, meter=4, swing=0.0, bpm_end=None, sections=None):
+    beats = beat_times(duration, bpm, bpm_end)
+    periods = np.diff(beats, append=beats[-1] + 60.0 / (bpm_end or bpm))
+
+    subdivisions = np.ones(len(beats), dtype=int)
+    if sections:
+        cycle = sum(seconds for seconds, _ in sections)
+        position = beats % cycle
+        edges = np.cumsum([seconds for seconds, _ in sections])
+        subdivisions = np.array([n for _, n in sections])[np.searchsorted(edges, position, side="right")]
+    if swing:
+        subdivisions = np.maximum(subdivisions, 2)
+
+    times, amps = [beats], [np.where(np.arange(len(beats)) % meter == 0, 1.0, 0.7)]
+    for k in range(1, subdivisions.max()):
+        has = subdivisions > k
+        offset = k / subdivisions[has]
+        if swing and k % 2 == 1:
+            offset = offset + swing * (1.0 / subdivisions[has])
+        times.append(beats[has] + offset * periods[has])
+        amps.append(np.full(int(has.sum()), 0.4))
+
+    times, amps = np.concatenate(times), np.concatenate(amps)
+    order = np.argsort(times, kind="stable")
+    keep = times[order] < duration
+    return times[order][keep], amps[order][keep]
+
+
+def render_click_track(path, duration, sr=22050, seed=0, block_seconds=60.0, **params):
+    """
+    Write a deterministic click track (mono 16-bit WAV) block by block, so
+    hours of audio never sit in memory at once.
+
+    Returns:
+        events (int): number of clicks written
+    """
+
+    rng = np.random.default_rng(seed)
+    times, amps = click_events(duration, **params)
+    starts = np.round(times * sr).astype(np.int64)
+    click = np.exp(-np.arange(CLICK_SAMPLES) / 200.0) * rng.standard_normal(CLICK_SAMPLES)
+
+    total = int(round(duration * sr))
+    block = int(block_seconds * sr)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with sf.SoundFile(path, "w", samplerate=sr, channels=1, subtype="PCM_16") as f:
+        for b0 in range(0, total, block):
+            b1 = min(b0 + block, total)
+            out = rng.standard_normal(b1 - b0) * 0.01
+
+            lo = np.searchsorted(starts, b0 - CLICK_SAMPLES, side="right")
+            hi = np.searchsorted(starts, b1, side="left")
+            for s, a in zip(starts[lo:hi], amps[lo:hi]):
+                c0, c1 = max(s, b0), min(s + CLICK_SAMPLES, b1)
+                out[c0 - b0:c1 - b0] += a * click[c0 - s:c1 - s]
+
+            f.write(np.clip(out * 0.5, -1.0, 1.0))
+
+    return len(times)
+
+
+# Path of a case's audio, rendered on first use.
+def case_audio(audio_dir, case, duration, sr=22050):
+    path = os.path.join(audio_dir, f"{case}_{int(duration)}s_{sr}.wav")
+    if not os.path.exists(path):
+        tmp = path + ".part.wav"
+        render_click_track(tmp, duration, sr=sr, **CASES[case])
+        os.replace(tmp, path)
+    return path
+
+
+LABELS = ["intro", "verse", "chorus", "post_chorus", "breakdown", "bridge", "outro"]
+
+
+# Deterministic synthetic fingerprints shaped like build_structure_fingerprint
+# output, for the corpus-level benchmarks.
+def synthetic_fingerprints(n, seed=0):
+    from src.fingerprint import build_structure_fingerprint
+
+    rng = random.Random(seed)
+    templates = [[rng.choice(LABELS) for _ in range(rng.randint(3, 10))] for _ in range(100)]
+
+    fps = []
+    for i in range(n):
+        labels = list(rng.choice(templates))
+        if rng.random() < 0.3:
+            labels[rng.randrange(len(labels))] = rng.choice(LABELS)
+
+        sections, t = [], 0.0
+        for label in labels:
+            length = rng.uniform(8.0, 40.0)
+            sections.append({
+                "start": t,
+                "end": t + length,
+                "mean_density": rng.uniform(0.5, 10.0),
+                "mean_groove_std": rng.uniform(5.0, 60.0),
+                "label": label,
+            })
+            t += length
+
+        fps.append(build_structure_fingerprint(
+            song_id=f"synthetic_{i:06d}",
+            perceived_bpm=rng.uniform(60.0, 180.0),
+            meter={"time_signature": rng.choice(["4/4", "4/4", "3/4"])},
+            structure=None,
+            labeled_sections=sections,
+            duration=t,
+        ))
+
+    return fps
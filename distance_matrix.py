@@ -0,0 +1,32 @@
+import argparse
+import os
+
+from src.fingerprint_store import FingerprintStore
+from src.fingerprint_matrix import FingerprintMatrix
+from src.distance_matrix import compute_distance_matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="All-pairs structure distance matrix.")
+    parser.add_argument("--store", default="output/fingerprints.db", help="fingerprint database")
+    parser.add_argument("--out", default="output/distance_matrix.npy", help="output .npy (memory-mapped)")
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--condensed", action="store_true", help="store only the upper triangle")
+    args = parser.parse_args()
+
+    with FingerprintStore(args.store) as store:
+        matrix = FingerprintMatrix.from_fingerprints(store.all())
+
+    compute_distance_matrix(
+        matrix,
+        args.out,
+        block_size=args.block_size,
+        workers=args.workers,
+        condensed=args.condensed,
+    )
+    print(f"Distance matrix for {len(matrix)} songs saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,23 @@
-from src.load_audio import load_audio
-from src.framing import frame_signal
-from src.energy import compute_rms_energy
-from src.onset import detect_onsets
-from src.periodicity import (
-    onset_times,
-    inter_onset_intervals,
-    estimate_tempo,
-    tempo_candidates,
-    tempo_confidence,
-)
-from src.selection import select_perceived_tempo
-from src.report import generate_report, save_report
-from src.rhythm_hierarchy import build_rhythm_hierarchy
-from src.groove import compute_groove_metrics
-from src.tempo_drift import compute_tempo_drift
-from src.meter import infer_meter
-from src.sections import (
-    extract_section_features,
-    detect_section_boundaries,
-    aggregate_section_features,
-    label_sections,
-)
-from src.cues import generate_cues, save_cues
-from src.structure import infer_structure
+from src.pipeline import SongAnalysis
+from src.report import save_report
+from src.cues import save_cues
+from src.cache import StageCache
+from src import trace
+from src.trace import span
+from src.fingerprint_store import FingerprintStore
 from src.fingerprint import (
-    build_structure_fingerprint,
-    save_fingerprint,
     fingerprint_to_vector,
     cluster_fingerprints,
     infer_archetype,
 )
-from src.visualize_structure import plot_structure_timeline
-from src.visualize_density import plot_density_with_boundaries
 from src.similarity import find_similar_songs
 import json
 import os
+import numpy as np
 from src.section_similarity import (
-    compare_sections,
-    weighted_overall_similarity,
+    SectionCorpus,
+    build_section_table,
     explain_similarity,
-    chorus_only_similarity,
     explain_chorus_similarity
 )
 
@@ -48,6 +26,15 @@ from src.section_similarity import (
 # audio_path = "audio/Perfect_Ed_Sheeran.mp3"
 audio_path = "audio/Steal_My_Girl_One_Direction.mp3"
 VERBOSE = False
+TRACE = False
+TRACE_PATH = "output/trace.json"
+STREAM_AUDIO = False
+ANALYSIS_SR = None  # e.g. 22050 to analyze high-rate masters at a lower rate
+PIPELINE_WORKERS = 1
+USE_CACHE = True
+CACHE_DIR = "output/cache"
+FINGERPRINT_DB = "output/fingerprints.db"
+LEGACY_FINGERPRINTS = "output/fingerprints.json"
 COMPARE_MODE = True
 COMPARE_CACHE = "output/compare_cache.json"
 
@@ -62,90 +49,59 @@ def log(msg):
 
 def main():
     cached_song = None
-    signal, sr = load_audio(audio_path)
-    duration = len(signal) / sr
-
-    frame_size = 2048
-    hop_length = 512
 
-    frames = frame_signal(signal, frame_size, hop_length)
-    energy = compute_rms_energy(frames)
-    onsets = detect_onsets(energy)
-
-    times = onset_times(onsets, hop_length, sr)
-    iois = inter_onset_intervals(times)
-
-    tempo, corr = estimate_tempo(iois)
+    cache = StageCache(CACHE_DIR) if USE_CACHE else None
+    song = SongAnalysis(
+        audio_path,
+        stream=STREAM_AUDIO,
+        cache=cache,
+        workers=PIPELINE_WORKERS,
+        analysis_sr=ANALYSIS_SR,
+    )
 
-    if not tempo:
+    # Stages are computed on first use, so the compare-cache run below
+    # stops before groove, tempo drift, cues and the report.
+    if song["perceived"] is None:
         print("Tempo could not be estimated")
         return
 
-    candidates = tempo_candidates(tempo)
+    duration = song["duration"]
+    labeled_sections = song["labeled_sections"]
+    fingerprint = song["fingerprint"]
 
     if VERBOSE:
         print("\nTempo estimation:")
-        for t in candidates:
-            conf = tempo_confidence(iois, t)
+        for t, conf in song["confidences"].items():
             print(f"- Candidate: {t:.2f} BPM | confidence: {conf:.3f}")
 
-    perceived = select_perceived_tempo(candidates)
+    with span("fingerprint_store"), FingerprintStore(FINGERPRINT_DB) as store:
+        if len(store) == 0 and os.path.exists(LEGACY_FINGERPRINTS):
+            store.import_json(LEGACY_FINGERPRINTS)
 
-    section_features = extract_section_features(times, perceived)
-    boundaries = detect_section_boundaries(section_features)
-    sections = aggregate_section_features(section_features, boundaries)
-    labeled_sections = label_sections(sections)
+        store.upsert(fingerprint)
+        all_fps = store.all()
+        section_corpus = SectionCorpus(*zip(*store.iter_section_tables()))
 
-    structure = infer_structure(sections)
-    cues = generate_cues(labeled_sections, duration)
-
-    hierarchy = build_rhythm_hierarchy(
-        corr=corr,
-        iois=iois,
-        perceived_bpm=perceived
-    )
-
-    meter = infer_meter(perceived, hierarchy)
-    groove = compute_groove_metrics(times, perceived)
-    tempo_drift = compute_tempo_drift(times, perceived)
-
-    fingerprint = build_structure_fingerprint(
-        song_id=song_id,
-        perceived_bpm=perceived,
-        meter=meter,
-        structure=structure,
-        labeled_sections=labeled_sections,
-        duration=duration,
-    )
-
-    save_fingerprint(fingerprint)
-    fp_path = "output/fingerprints.json"
     if COMPARE_MODE and os.path.exists(COMPARE_CACHE):
         with open(COMPARE_CACHE, "r") as f:
             cached_song = json.load(f)
-    if os.path.exists(fp_path):
-        with open(fp_path, "r") as f:
-            all_fps = json.load(f)
-    else:
-        all_fps = []
     vec = fingerprint_to_vector(fingerprint)
 
+    query_table = build_section_table(labeled_sections, duration)
+    with span("section_similarity", songs=len(section_corpus)):
+        corpus_distances = section_corpus.compare(query_table)
+        corpus_overall = section_corpus.weighted_overall(corpus_distances)
+
     print("\nSection-level similarity:")
 
-    for fp in all_fps:
+    for i, fp in enumerate(all_fps):
         if fp["song_id"] == song_id:
             continue
 
-        section_distances = compare_sections(
-            labeled_sections,
-            fp["sections"],
-            duration,
-            fp["duration"]
-        )
-
-        overall = weighted_overall_similarity(section_distances)
+        section_distances = SectionCorpus.song_distances(corpus_distances, i)
+        overall = corpus_overall[i]
 
-        if overall is None:
+        if np.isnan(overall):
             continue
 
         print(f"\nCompared to {fp['song_id']}:")
@@ -170,20 +126,15 @@ def main():
         print("\nChorus-only similarity:")
 
         chorus_scores = []
+        with span("chorus_similarity", songs=len(section_corpus)):
+            corpus_chorus = section_corpus.chorus_only(query_table)
 
-        for fp in all_fps:
+        for i, fp in enumerate(all_fps):
             if fp["song_id"] == song_id:
                 continue
 
-            score = chorus_only_similarity(
-                labeled_sections,
-                fp["sections"],
-                duration,
-                fp["duration"]
-            )
-
-            if score is not None:
-                chorus_scores.append((fp, score))
+            if not np.isnan(corpus_chorus[i]):
+                chorus_scores.append((fp, float(corpus_chorus[i])))
 
         chorus_scores.sort(key=lambda x: x[1])
 
@@ -218,6 +169,13 @@ def main():
         print("Cached first song for comparison.")
         return
 
+    cues, perceived, meter, structure, boundaries, groove, tempo_drift, hierarchy, report = (
+        song.compute([
+            "cues", "perceived", "meter", "structure", "boundaries",
+            "groove", "tempo_drift", "hierarchy", "report",
+        ]).values()
+    )
+
     save_cues(cues)
 
     # PUBLIC OUTPUT
@@ -257,26 +215,6 @@ def main():
 
     # REPORT
 
-    report = generate_report(
-        duration=duration,
-        sample_rate=sr,
-        onsets=onsets,
-        iois=iois,
-        perceived_tempo=perceived,
-        subdivision_tempo=max(candidates),
-        conf_perceived=tempo_confidence(iois, perceived),
-        conf_subdivision=tempo_confidence(iois, max(candidates)),
-        rhythm_hierarchy=hierarchy,
-        groove=groove,
-        tempo_drift=tempo_drift,
-        meter=meter,
-        section_features=section_features,
-        boundaries=boundaries,
-        labeled_sections=labeled_sections,
-        structure=structure,
-        fingerprint=fingerprint
-    )
-
     save_report(report)
     print("Analysis report saved to output/analysis.json")
 
@@ -318,4 +256,14 @@ def main():
             os.remove(COMPARE_CACHE)
 
 if __name__ == "__main__":
-    main()
+    if TRACE:
+        trace.enable()
+
+    try:
+        main()
+    finally:
+        tracer = trace.disable()
+        if tracer is not None:
+            tracer.save(TRACE_PATH)
+            print(f"\nTrace saved to {TRACE_PATH} (open in chrome://tracing or ui.perfetto.dev)")
+            print(tracer.summary_table())
@@ -0,0 +1,35 @@
+import argparse
+import time
+
+from src.service import SimilarityService, make_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve similarity queries over a fingerprint corpus.")
+    parser.add_argument("--store", default="output/fingerprints.db", help="fingerprint database to load")
+    parser.add_argument("--columns", default=None, help="load a columnar fingerprint library instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.columns:
+        service = SimilarityService.from_columns(args.columns)
+    else:
+        service = SimilarityService.from_store(args.store)
+
+    server = make_server(service, args.host, args.port, verbose=args.verbose)
+    print(f"Loaded {len(service)} fingerprints in {time.perf_counter() - start:.2f}s")
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+
+# Bump when a cached stage changes its output for the same parameters.
+CACHE_VERSION = 2
+
+
+# Content hash of a file, read in chunks.
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+# On-disk cache of analysis stage outputs keyed by audio content + parameters.
+# Each entry is an .npz of named arrays; the least recently used entries are
+# evicted once the directory grows past max_bytes.
+class StageCache:
+    def __init__(self, root="output/cache", max_bytes=2 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, audio_hash, stage, params):
+        payload = json.dumps({
+            "version": CACHE_VERSION,
+            "audio": audio_hash,
+            "stage": stage,
+            "params": params,
+        }, sort_keys=True)
+        return f"{stage}-{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.npz")
+
+    def load(self, key):
+        path = self._path(key)
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            return None
+
+        # Touch on hit so eviction sees it as recently used. Another process
+        # may have evicted it since the read, which does not undo the hit.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return arrays
+
+    def save(self, key, arrays):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+        self._evict()
+
+    def get_or_compute(self, audio_hash, stage, params, compute):
+        key = self.key(audio_hash, stage, params)
+
+        arrays = self.load(key)
+        if arrays is None:
+            arrays = compute()
+            self.save(key, arrays)
+
+        return arrays
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".npz"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
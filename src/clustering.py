@@ -0,0 +1,192 @@
+import itertools
+import numpy as np
+from src.fingerprint import fingerprint_to_vector, infer_archetype
+
+
+# Resolve every label to its root (full path compression).
+def _find_roots(labels):
+    while True:
+        parents = labels[labels]
+        if np.array_equal(parents, labels):
+            return labels
+        labels[:] = parents
+
+
+# Merge the components joined by edges (u[i], v[i]); roots link to the smaller id.
+def _union(labels, u, v):
+    while len(u):
+        _find_roots(labels)
+        ru = labels[u]
+        rv = labels[v]
+        split = ru != rv
+        if not np.any(split):
+            return
+        u, v = u[split], v[split]
+        np.minimum.at(labels, np.maximum(ru[split], rv[split]), np.minimum(ru[split], rv[split]))
+
+
+# Point pairs (i, j) for each pair of grid cells, chunked to bound memory.
+def _cell_pair_chunks(starts_a, sizes_a, starts_b, sizes_b, same_cell, max_pairs):
+    counts = sizes_a * sizes_b
+    cum = np.cumsum(counts)
+    edges = np.searchsorted(cum, np.arange(max_pairs, cum[-1], max_pairs), side="right")
+    edges = np.unique(np.concatenate(([0], edges, [len(counts)])))
+
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        c = counts[lo:hi]
+        k = np.arange(c.sum()) - np.repeat(np.cumsum(c) - c, c)
+        sb = np.repeat(sizes_b[lo:hi], c)
+        i = np.repeat(starts_a[lo:hi], c) + k // sb
+        j = np.repeat(starts_b[lo:hi], c) + k % sb
+        if same_cell:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        yield i, j
+
+
+def _linkage_labels(x, threshold, max_pairs):
+    n, dims = x.shape
+
+    # Grid with cell size = threshold: neighbours within threshold are at
+    # most one cell away along every axis. Coordinates are shifted by one so
+    # neighbour keys never wrap around the mixed-radix encoding.
+    cells = np.floor(x / threshold).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    radix = cells.max(axis=0) + 2
+    weights = np.concatenate(([1], np.cumprod(radix[:-1])))
+    keys = cells @ weights
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    unique_keys, starts, sizes = np.unique(sorted_keys, return_index=True, return_counts=True)
+    xs = x[order]
+
+    labels = np.arange(n)
+    threshold_sq = threshold * threshold
+    edges_u, edges_v, pending = [], [], 0
+
+    # Half of the 3^d neighbour offsets (plus the cell itself) covers each
+    # pair of cells exactly once.
+    for offset in itertools.product((-1, 0, 1), repeat=dims):
+        offset = np.array(offset)
+        nonzero = offset[offset != 0]
+        if len(nonzero) and nonzero[0] < 0:
+            continue
+
+        target = unique_keys + offset @ weights
+        pos = np.searchsorted(unique_keys, target)
+        pos = np.minimum(pos, len(unique_keys) - 1)
+        hit = np.flatnonzero(unique_keys[pos] == target)
+        if len(hit) == 0:
+            continue
+
+        same_cell = not len(nonzero)
+        chunks = _cell_pair_chunks(
+            starts[hit], sizes[hit], starts[pos[hit]], sizes[pos[hit]], same_cell, max_pairs
+        )
+        for i, j in chunks:
+            diff = xs[i] - xs[j]
+            close = np.einsum("ij,ij->i", diff, diff) < threshold_sq
+            edges_u.append(i[close])
+            edges_v.append(j[close])
+            pending += np.count_nonzero(close)
+
+            if pending >= max_pairs:
+                _union(labels, np.concatenate(edges_u), np.concatenate(edges_v))
+                edges_u, edges_v, pending = [], [], 0
+
+    if edges_u:
+        _union(labels, np.concatenate(edges_u), np.concatenate(edges_v))
+    _find_roots(labels)
+
+    result = np.empty(n, dtype=np.int64)
+    result[order] = order[labels]
+    return result
+
+
+def _greedy_labels(x, threshold):
+    leaders = np.empty_like(x)
+    n_leaders = 0
+    labels = np.empty(len(x), dtype=np.int64)
+
+    for i, v in enumerate(x):
+        diff = leaders[:n_leaders] - v
+        close = np.flatnonzero(np.sqrt(np.einsum("ij,ij->i", diff, diff)) < threshold)
+
+        if len(close):
+            labels[i] = close[0]
+        else:
+            leaders[n_leaders] = v
+            labels[i] = n_leaders
+            n_leaders += 1
+
+    return labels
+
+
+def cluster_vectors(vectors, threshold=0.25, method="linkage", max_pairs=4_000_000):
+    """
+    Cluster fingerprint vectors.
+
+    method="linkage": connected components of the "closer than threshold"
+        graph, found via grid bucketing and union-find. Order independent.
+    method="greedy": the cluster_fingerprints semantics, where each vector
+        joins the first cluster whose first member is within threshold.
+
+    Returns:
+        labels (np.ndarray): cluster id per vector, numbered in order of
+            each cluster's first member
+    """
+
+    x = np.asarray(vectors, dtype=np.float64)
+    if len(x) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if method == "greedy":
+        return _greedy_labels(x, threshold)
+    if method != "linkage":
+        raise ValueError(f"Unknown clustering method: {method}")
+
+    roots = _linkage_labels(x, threshold, max_pairs)
+    _, first, inverse = np.unique(roots, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse]
+
+
+# Group items by cluster label, clusters in label order.
+def group_clusters(items, labels):
+    groups = [[] for _ in range(int(labels.max()) + 1 if len(labels) else 0)]
+    for item, label in zip(items, labels):
+        groups[label].append(item)
+    return groups
+
+
+def cluster_fingerprint_corpus(fps, threshold=0.25, method="linkage"):
+    vectors = [fingerprint_to_vector(fp) for fp in fps]
+    labels = cluster_vectors(vectors, threshold, method)
+    return labels, summarize_clusters(fps, labels, vectors)
+
+
+# Per-cluster size, centroid and archetype breakdown (via infer_archetype).
+def summarize_clusters(fps, labels, vectors=None):
+    if vectors is None:
+        vectors = [fingerprint_to_vector(fp) for fp in fps]
+    vectors = np.asarray(vectors, dtype=np.float64)
+
+    summaries = []
+    for cluster, members in enumerate(group_clusters(range(len(fps)), labels)):
+        archetypes = {}
+        for i in members:
+            name = infer_archetype(fps[i])
+            archetypes[name] = archetypes.get(name, 0) + 1
+
+        summaries.append({
+            "cluster": cluster,
+            "size": len(members),
+            "archetype": max(archetypes, key=archetypes.get),
+            "archetypes": archetypes,
+            "centroid": [round(float(c), 3) for c in vectors[members].mean(axis=0)],
+            "song_ids": [fps[i]["song_id"] for i in members],
+        })
+
+    return summaries
@@ -0,0 +1,154 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from src.fingerprint_matrix import structure_distances
+
+
+_worker_rows = None
+
+
+def _init_worker(rows):
+    global _worker_rows
+    _worker_rows = rows
+
+
+def _take(rows, start, end):
+    return {name: values[start:end] for name, values in rows.items()}
+
+
+def _compute_block(block):
+    bi, bj, (i0, i1), (j0, j1) = block
+    dist = structure_distances(_take(_worker_rows, i0, i1), _take(_worker_rows, j0, j1))
+    return bi, bj, dist.astype(np.float32)
+
+
+# Condensed (upper triangle, i < j) index of the first pair in row i.
+def condensed_row_offset(i, n):
+    return n * i - i * (i + 1) // 2
+
+
+def _write_block(out, condensed, n, i0, j0, dist):
+    if not condensed:
+        out[i0:i0 + dist.shape[0], j0:j0 + dist.shape[1]] = dist
+        out[j0:j0 + dist.shape[1], i0:i0 + dist.shape[0]] = dist.T
+        return
+
+    for r in range(dist.shape[0]):
+        i = i0 + r
+        first = max(j0, i + 1)
+        last = j0 + dist.shape[1]
+        if first < last:
+            offset = condensed_row_offset(i, n) + (first - i - 1)
+            out[offset:offset + last - first] = dist[r, first - j0:]
+
+
+def _open_outputs(out_path, n, block_size, condensed, song_ids):
+    shape = (n * (n - 1) // 2,) if condensed else (n, n)
+    n_blocks = (n + block_size - 1) // block_size
+    progress_path = f"{out_path}.progress.npy"
+    ids_path = f"{out_path}.ids.npy"
+    block_path = f"{out_path}.block_size.npy"
+
+    # Resume only a run of the same corpus and block grid: progress marks
+    # blocks, so a different block_size would skip or misplace them.
+    if os.path.exists(out_path) and os.path.exists(progress_path):
+        missing = [p for p in (ids_path, block_path) if not os.path.exists(p)]
+        if missing:
+            raise ValueError(
+                f"cannot resume {out_path}: missing {', '.join(missing)} "
+                f"(delete {out_path} and {progress_path} to start over)"
+            )
+
+        stored_ids = np.load(ids_path, allow_pickle=False)
+        if not np.array_equal(stored_ids, song_ids):
+            raise ValueError(f"{out_path} was computed for a different corpus")
+
+        stored_block_size = int(np.load(block_path, allow_pickle=False))
+        if stored_block_size != block_size:
+            raise ValueError(
+                f"{out_path} was computed with block_size={stored_block_size}, "
+                f"resume with the same block_size (got {block_size})"
+            )
+
+        out = np.lib.format.open_memmap(out_path, mode="r+")
+        if out.shape != shape:
+            raise ValueError(f"{out_path} has shape {out.shape}, expected {shape}")
+        progress = np.lib.format.open_memmap(progress_path, mode="r+")
+        if progress.shape != (n_blocks, n_blocks):
+            raise ValueError(f"{progress_path} has shape {progress.shape}, expected {(n_blocks, n_blocks)}")
+        return out, progress
+
+    np.save(ids_path, song_ids)
+    np.save(block_path, np.int64(block_size))
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=shape)
+    progress = np.lib.format.open_memmap(
+        progress_path, mode="w+", dtype=np.uint8, shape=(n_blocks, n_blocks)
+    )
+    return out, progress
+
+
+def compute_distance_matrix(
+    matrix,
+    out_path,
+    block_size=1024,
+    workers=1,
+    condensed=False,
+    flush_every=16,
+):
+    """
+    Compute all-pairs structure_distance into a memory-mapped float32 .npy.
+
+    Only blocks on or above the diagonal are computed (the distance is
+    symmetric). Finished blocks are recorded in <out_path>.progress.npy,
+    so an interrupted run picks up where it stopped when called again
+    with the same corpus and block_size (ValueError otherwise).
+    condensed=True stores the i < j upper triangle in scipy pdist order.
+
+    Returns:
+        out (np.memmap): the distance matrix (or condensed vector)
+    """
+
+    n = len(matrix)
+    n_blocks = (n + block_size - 1) // block_size
+    song_ids = np.asarray(matrix.song_ids, dtype=str)
+
+    out, progress = _open_outputs(out_path, n, block_size, condensed, song_ids)
+
+    spans = [(b * block_size, min(n, (b + 1) * block_size)) for b in range(n_blocks)]
+    todo = [
+        (bi, bj, spans[bi], spans[bj])
+        for bi in range(n_blocks)
+        for bj in range(bi, n_blocks)
+        if not progress[bi, bj]
+    ]
+
+    rows = matrix.rows()
+    start = time.perf_counter()
+
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(rows,))
+        results = pool.map(_compute_block, todo)
+    else:
+        pool = None
+        _init_worker(rows)
+        results = map(_compute_block, todo)
+
+    try:
+        for done, (bi, bj, dist) in enumerate(results, 1):
+            _write_block(out, condensed, n, spans[bi][0], spans[bj][0], dist)
+            progress[bi, bj] = 1
+
+            if done % flush_every == 0:
+                out.flush()
+                progress.flush()
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{len(todo)} blocks | {elapsed:.1f}s")
+    finally:
+        out.flush()
+        progress.flush()
+        if pool is not None:
+            pool.shutdown()
+
+    return out
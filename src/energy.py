@@ -1,8 +1,76 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.trace import traced
 
 
-# Compute RMS energy for each frame
-def compute_rms_energy(frames):
+# Compute RMS energy for each frame.
+# Works block by block so a strided frames view is never squared in one go.
+@traced("compute_rms_energy")
+def compute_rms_energy(frames, block_frames=1024):
+    energy = np.empty(len(frames), dtype=np.result_type(frames.dtype, np.float32))
+
+    for start in range(0, len(frames), block_frames):
+        block = frames[start:start + block_frames]
+        energy[start:start + len(block)] = np.sqrt(np.mean(block ** 2, axis=1))
 
-    energy = np.sqrt(np.mean(frames ** 2, axis=1))
     return energy
+
+
+# Incremental RMS energy computed straight from 1D signal chunks.
+# Each sample is squared once; frames are summed from the squared samples
+# and the tail that belongs to the next frames is carried across chunks.
+class StreamingRMSEnergy:
+    def __init__(self, frame_size, hop_length, dtype=np.float64):
+        self.frame_size = frame_size
+        self.hop_length = hop_length
+        self.dtype = dtype
+        self._carry = np.empty(0, dtype=dtype)
+        self._skip = 0
+        self.num_frames = 0
+
+    # Feed the next chunk of samples, returns energy for frames it completes.
+    def process(self, chunk):
+        chunk = np.asarray(chunk, dtype=self.dtype)
+
+        if self._skip:
+            skipped = min(self._skip, len(chunk))
+            chunk = chunk[skipped:]
+            self._skip -= skipped
+
+        squared = np.concatenate([self._carry, chunk ** 2])
+
+        if len(squared) < self.frame_size:
+            self._carry = squared
+            return np.empty(0, dtype=self.dtype)
+
+        frames = sliding_window_view(squared, self.frame_size)[::self.hop_length]
+        energy = np.sqrt(np.mean(frames, axis=1))
+
+        consumed = len(frames) * self.hop_length
+        self._carry = squared[consumed:].copy()
+        self._skip = max(0, consumed - len(squared))
+        self.num_frames += len(frames)
+
+        return energy
+
+
+# Compute RMS energy from an iterable of signal chunks.
+@traced("compute_rms_energy")
+def compute_rms_energy_from_blocks(blocks, frame_size, hop_length, dtype=np.float64):
+    engine = StreamingRMSEnergy(frame_size, hop_length, dtype=dtype)
+    energy = [engine.process(block) for block in blocks]
+
+    if engine.num_frames == 0:
+        raise ValueError("Signal is shorter than one frame")
+
+    return np.concatenate(energy)
+
+
+# Compute RMS energy directly from a 1D signal without building frames.
+def compute_rms_energy_from_signal(signal, frame_size, hop_length,
+                                   dtype=np.float64, chunk_size=1 << 20):
+    blocks = (
+        signal[start:start + chunk_size]
+        for start in range(0, len(signal), chunk_size)
+    )
+    return compute_rms_energy_from_blocks(blocks, frame_size, hop_length, dtype=dtype)
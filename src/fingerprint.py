@@ -27,7 +27,10 @@ def build_structure_fingerprint(
 
         section_times[label] = section_times.get(label, 0) + length
         density[label] = density.get(label, []) + [s["mean_density"]]
-        groove[label] = groove.get(label, []) + [s["mean_groove_std"]]
+        # Sections without on-beat onsets have no groove value; a label
+        # none of whose sections has one is left out of groove_profile.
+        if s["mean_groove_std"] is not None:
+            groove[label] = groove.get(label, []) + [s["mean_groove_std"]]
 
     chorus_time = section_times.get("chorus", 0)
 
@@ -104,19 +107,10 @@ def fingerprint_to_vector(fp):
     ]
 
 def cluster_fingerprints(vectors, threshold=0.25):
-    clusters = []
-
-    for v in vectors:
-        placed = False
-        for c in clusters:
-            if vector_distance(v, c[0]) < threshold:
-                c.append(v)
-                placed = True
-                break
-        if not placed:
-            clusters.append([v])
-
-    return clusters
+    from src.clustering import cluster_vectors, group_clusters
+
+    labels = cluster_vectors(vectors, threshold, method="greedy")
+    return group_clusters(vectors, labels)
 
 
 def infer_archetype(fp):
@@ -0,0 +1,390 @@
+import json
+import os
+import numpy as np
+from src.fingerprint_matrix import FingerprintMatrix, _pad_columns
+
+
+COLUMNS_VERSION = 1
+
+# Top-level keys of a fingerprint, in the order build_structure_fingerprint
+# writes them, and the keys of each labeled section.
+FINGERPRINT_FIELDS = [
+    "song_id", "tempo", "meter", "structure", "sections", "duration",
+    "chorus_count", "chorus_ratio", "avg_section_density", "groove_profile",
+]
+SECTION_FIELDS = ["start", "end", "mean_density", "mean_groove_std", "label"]
+
+FLOAT_SECTION_FIELDS = {
+    "start": "section_start",
+    "end": "section_end",
+    "mean_density": "section_density",
+    "mean_groove_std": "section_groove_std",
+}
+PROFILE_FIELDS = {
+    "avg_section_density": "density",
+    "groove_profile": "groove",
+}
+
+
+def _is_float(value):
+    return type(value) is float
+
+
+def _is_number(value):
+    return type(value) in (int, float)
+
+
+def _is_regular_section(section):
+    return (
+        isinstance(section, dict)
+        and list(section) == SECTION_FIELDS
+        and all(_is_float(section[k]) for k in FLOAT_SECTION_FIELDS)
+        and isinstance(section["label"], str)
+    )
+
+
+def _is_profile(values):
+    return isinstance(values, dict) and all(
+        isinstance(k, str) and _is_float(v) for k, v in values.items()
+    )
+
+
+# True when every field of fp fits its column exactly, so the row can be
+# rebuilt from the columns alone; other rows also keep their JSON text.
+def _is_regular(fp):
+    return (
+        list(fp) == FINGERPRINT_FIELDS
+        and isinstance(fp["song_id"], str)
+        and isinstance(fp["meter"], str)
+        and all(_is_float(fp[k]) for k in ("tempo", "duration", "chorus_ratio"))
+        and type(fp["chorus_count"]) is int
+        and isinstance(fp["structure"], list)
+        and all(isinstance(label, str) for label in fp["structure"])
+        and isinstance(fp["sections"], list)
+        and all(_is_regular_section(s) for s in fp["sections"])
+        and all(_is_profile(fp[k]) for k in PROFILE_FIELDS)
+    )
+
+
+# Interns strings into one dictionary shared by every string column.
+class _StringTable:
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        if not isinstance(value, str):
+            return -1
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+    def arrays(self):
+        encoded = [v.encode("utf-8") for v in self.values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return data, offsets
+
+
+def write_fingerprint_columns(fps, path):
+    """
+    Write fingerprints to a columnar directory: one .npy per column plus a
+    manifest. Scalars are fixed-width columns; structure labels, sections
+    and per-label profiles are ragged arrays addressed by offset tables;
+    song ids, meters and labels are codes into a shared string dictionary.
+
+    Returns:
+        count (int): number of fingerprints written
+    """
+
+    strings = _StringTable()
+    scalars = {name: [] for name in (
+        "song_id", "meter", "tempo", "duration", "chorus_count", "chorus_ratio", "extras"
+    )}
+    structure = []
+    structure_lengths = []
+    sections = {name: [] for name in ["section_label", *FLOAT_SECTION_FIELDS.values()]}
+    section_lengths = []
+    profiles = {column: ([], [], []) for column in PROFILE_FIELDS.values()}
+
+    for fp in fps:
+        regular = _is_regular(fp)
+
+        scalars["song_id"].append(strings.code(fp.get("song_id")))
+        scalars["meter"].append(strings.code(fp.get("meter")))
+        for name, default in (("tempo", 0.0), ("duration", np.nan), ("chorus_ratio", 0.0)):
+            value = fp.get(name, default)
+            scalars[name].append(float(value) if _is_number(value) else np.nan)
+        count = fp.get("chorus_count")
+        scalars["chorus_count"].append(count if type(count) is int else -1)
+        scalars["extras"].append(
+            -1 if regular else strings.code(json.dumps(fp, separators=(",", ":")))
+        )
+
+        # Columns of irregular rows are filled as far as their values fit,
+        # so array queries still see them.
+        labels = fp.get("structure", [])
+        labels = labels if isinstance(labels, list) and all(isinstance(l, str) for l in labels) else []
+        structure.extend(strings.code(label) for label in labels)
+        structure_lengths.append(len(labels))
+
+        rows = fp.get("sections", [])
+        rows = rows if isinstance(rows, list) and all(map(_is_regular_section, rows)) else []
+        for s in rows:
+            sections["section_label"].append(strings.code(s["label"]))
+            for key, column in FLOAT_SECTION_FIELDS.items():
+                sections[column].append(s[key])
+        section_lengths.append(len(rows))
+
+        for key, column in PROFILE_FIELDS.items():
+            values = fp.get(key, {})
+            values = values if _is_profile(values) else {}
+            labels_out, values_out, lengths_out = profiles[column]
+            labels_out.extend(strings.code(label) for label in values)
+            values_out.extend(values.values())
+            lengths_out.append(len(values))
+
+    arrays = {
+        "song_id": np.array(scalars["song_id"], dtype=np.int32),
+        "meter": np.array(scalars["meter"], dtype=np.int32),
+        "tempo": np.array(scalars["tempo"], dtype=np.float64),
+        "duration": np.array(scalars["duration"], dtype=np.float64),
+        "chorus_count": np.array(scalars["chorus_count"], dtype=np.int64),
+        "chorus_ratio": np.array(scalars["chorus_ratio"], dtype=np.float64),
+        "extras": np.array(scalars["extras"], dtype=np.int32),
+        "structure": np.array(structure, dtype=np.int32),
+        "structure_offsets": _offsets(structure_lengths),
+        "section_label": np.array(sections["section_label"], dtype=np.int32),
+        "section_offsets": _offsets(section_lengths),
+    }
+    for column in FLOAT_SECTION_FIELDS.values():
+        arrays[column] = np.array(sections[column], dtype=np.float64)
+    for column, (labels_out, values_out, lengths_out) in profiles.items():
+        arrays[f"{column}_label"] = np.array(labels_out, dtype=np.int32)
+        arrays[f"{column}_value"] = np.array(values_out, dtype=np.float64)
+        arrays[f"{column}_offsets"] = _offsets(lengths_out)
+    arrays["strings"], arrays["string_offsets"] = strings.arrays()
+
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+    manifest = {
+        "version": COLUMNS_VERSION,
+        "count": len(arrays["song_id"]),
+        "columns": sorted(arrays),
+    }
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest["count"]
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths, dtype=np.int64)
+    return offsets
+
+
+# Read side of the columnar format. Every column is memory-mapped, so
+# opening a library costs nothing until columns are touched; strings are
+# decoded one at a time on demand. Columns are attributes named like the
+# files (tempo, structure_offsets, section_start, density_value, ...).
+class FingerprintColumns:
+    def __init__(self, path):
+        self.path = path
+
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+
+        if manifest.get("version") != COLUMNS_VERSION:
+            raise ValueError(f"Unsupported fingerprint columns version: {manifest.get('version')}")
+
+        self.count = manifest["count"]
+        self.columns = manifest["columns"]
+        for name in self.columns:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+
+        self._strings = {}
+        self._index = None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for row in range(self.count):
+            yield self.fingerprint(row)
+
+    def string(self, code):
+        if code < 0:
+            return None
+        value = self._strings.get(code)
+        if value is None:
+            start, end = self.string_offsets[code], self.string_offsets[code + 1]
+            value = self.strings[start:end].tobytes().decode("utf-8")
+            self._strings[code] = value
+        return value
+
+    # Row of a song id (the last one if repeated); None if absent.
+    def find(self, song_id):
+        if self._index is None:
+            self._index = {self.string(int(c)): row for row, c in enumerate(self.song_id)}
+        return self._index.get(song_id)
+
+    # Bounds of row's entries in a ragged column ("structure", "section",
+    # "density" or "groove").
+    def span(self, column, row):
+        offsets = getattr(self, f"{column}_offsets")
+        return int(offsets[row]), int(offsets[row + 1])
+
+    # Materialize one row as the fingerprint dict it was written from.
+    def fingerprint(self, row):
+        extras = int(self.extras[row])
+        if extras >= 0:
+            return json.loads(self.string(extras))
+
+        start, end = self.span("structure", row)
+        structure = [self.string(int(c)) for c in self.structure[start:end]]
+
+        start, end = self.span("section", row)
+        columns = [self.section_start, self.section_end, self.section_density, self.section_groove_std]
+        sections = [
+            {
+                **{key: float(column[i]) for key, column in zip(FLOAT_SECTION_FIELDS, columns)},
+                "label": self.string(int(self.section_label[i])),
+            }
+            for i in range(start, end)
+        ]
+
+        fp = {
+            "song_id": self.string(int(self.song_id[row])),
+            "tempo": float(self.tempo[row]),
+            "meter": self.string(int(self.meter[row])),
+            "structure": structure,
+            "sections": sections,
+            "duration": float(self.duration[row]),
+            "chorus_count": int(self.chorus_count[row]),
+            "chorus_ratio": float(self.chorus_ratio[row]),
+        }
+        for key, column in PROFILE_FIELDS.items():
+            start, end = self.span(column, row)
+            labels = getattr(self, f"{column}_label")[start:end]
+            values = getattr(self, f"{column}_value")[start:end]
+            fp[key] = {self.string(int(c)): float(v) for c, v in zip(labels, values)}
+
+        return fp
+
+    def section_tables(self):
+        """
+        Per-row section vector tables (as fingerprint_store builds them from
+        a fingerprint's sections) straight from the section columns; only
+        rows kept as JSON are materialized.
+
+        Returns:
+            tables (list): one dict label -> (k, 4) array per row
+        """
+
+        from src.fingerprint_store import _fingerprint_section_table
+
+        # build_section_vector over every section at once. Regular sections
+        # carry no groove_mean / groove_std keys, so those terms are 0.
+        lengths = np.diff(self.section_offsets)
+        durations = np.repeat(np.asarray(self.duration), lengths)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            duration_norm = (self.section_end - self.section_start) / durations
+        zeros = np.zeros(len(durations))
+        vectors = np.column_stack([duration_norm, self.section_density / 15.0, zeros / 80.0, zeros / 80.0])
+
+        tables = []
+        for row in range(self.count):
+            if self.extras[row] >= 0:
+                tables.append(_fingerprint_section_table(self.fingerprint(row)))
+                continue
+            if not self.duration[row]:
+                tables.append({})
+                continue
+
+            start, end = self.span("section", row)
+            rows = {}
+            for i in range(start, end):
+                rows.setdefault(self.string(int(self.section_label[i])), []).append(i)
+            tables.append({label: vectors[i] for label, i in rows.items()})
+
+        return tables
+
+    def to_matrix(self):
+        """
+        Build a FingerprintMatrix straight from the columns, without
+        materializing fingerprint dicts.
+
+        Returns:
+            matrix (FingerprintMatrix): same distances as from_fingerprints
+        """
+
+        n = self.count
+        matrix = FingerprintMatrix()
+
+        used = np.unique(np.concatenate([
+            self.structure, self.density_label, self.groove_label
+        ]))
+        matrix.labels = [self.string(int(c)) for c in used]
+        matrix.label_codes = {label: i for i, label in enumerate(matrix.labels)}
+
+        lengths = np.diff(self.structure_offsets)
+        rows, cols = _ragged_positions(self.structure_offsets)
+        matrix.sequences = np.full((n, int(lengths.max(initial=0))), -1, dtype=np.int32)
+        matrix.sequences[rows, cols] = np.searchsorted(used, self.structure)
+        matrix.lengths = lengths.astype(np.int64)
+
+        for column in PROFILE_FIELDS.values():
+            values = np.full((n, len(used)), np.nan)
+            rows, _ = _ragged_positions(getattr(self, f"{column}_offsets"))
+            labels = np.searchsorted(used, getattr(self, f"{column}_label"))
+            values[rows, labels] = getattr(self, f"{column}_value")
+            setattr(matrix, column, values)
+
+        meters, matrix.meter = np.unique(self.meter, return_inverse=True)
+        matrix.meter = matrix.meter.astype(np.int32)
+        matrix.meters = {self.string(int(c)): i for i, c in enumerate(meters)}
+
+        matrix.song_ids = np.array([self.string(int(c)) for c in self.song_id], dtype=object)
+        matrix.chorus_ratio = np.array(self.chorus_ratio, dtype=float)
+        matrix.tempo = np.array(self.tempo, dtype=float)
+
+        # Rows kept as JSON may hold values the columns could not (e.g. a
+        # non-numeric tempo); encode those from the dicts themselves.
+        irregular = np.flatnonzero(np.asarray(self.extras) >= 0)
+        if len(irregular):
+            fps = [self.fingerprint(row) for row in irregular]
+            matrix._grow_vocabulary(fps)
+            matrix.density = _pad_columns(matrix.density, len(matrix.labels), np.nan)
+            matrix.groove = _pad_columns(matrix.groove, len(matrix.labels), np.nan)
+            encoded = matrix.encode(fps)
+            width = max(matrix.sequences.shape[1], encoded["sequences"].shape[1])
+            matrix.sequences = _pad_columns(matrix.sequences, width, -1)
+            matrix.sequences[irregular] = _pad_columns(encoded["sequences"], width, -1)
+            for name in ("song_ids", "lengths", "chorus_ratio", "tempo", "meter", "density", "groove"):
+                getattr(matrix, name)[irregular] = encoded[name]
+
+        return matrix
+
+
+def _ragged_positions(offsets):
+    lengths = np.diff(offsets)
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    cols = np.arange(int(offsets[-1])) - np.repeat(np.asarray(offsets[:-1]), lengths)
+    return rows, cols
+
+
+def json_to_columns(json_path, path):
+    with open(json_path, "r") as f:
+        return write_fingerprint_columns(json.load(f), path)
+
+
+def columns_to_json(path, json_path):
+    fps = list(FingerprintColumns(path))
+    with open(json_path, "w") as f:
+        json.dump(fps, f, indent=2)
+    return len(fps)
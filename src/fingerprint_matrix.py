@@ -0,0 +1,199 @@
+import numpy as np
+
+
+# Array-backed view of a fingerprint corpus for vectorized structure distance.
+# Rows hold the fields structure_distance reads: the section label sequence
+# (integer codes, -1 padded), chorus ratio, tempo, meter code and per-label
+# density / groove columns (NaN where the song has no such label).
+class FingerprintMatrix:
+    def __init__(self):
+        self.song_ids = np.empty(0, dtype=object)
+        self.labels = []
+        self.label_codes = {}
+        self.meters = {}
+
+        self.sequences = np.full((0, 0), -1, dtype=np.int32)
+        self.lengths = np.zeros(0, dtype=np.int64)
+        self.chorus_ratio = np.zeros(0)
+        self.tempo = np.zeros(0)
+        self.meter = np.zeros(0, dtype=np.int32)
+        self.density = np.zeros((0, 0))
+        self.groove = np.zeros((0, 0))
+
+    @classmethod
+    def from_fingerprints(cls, fps):
+        matrix = cls()
+        matrix.add(fps)
+        return matrix
+
+    def __len__(self):
+        return len(self.song_ids)
+
+    def _grow_vocabulary(self, fps):
+        for fp in fps:
+            labels = list(fp.get("structure", []))
+            labels += list(fp.get("avg_section_density", {}))
+            labels += list(fp.get("groove_profile", {}))
+
+            for label in labels:
+                if label not in self.label_codes:
+                    self.label_codes[label] = len(self.labels)
+                    self.labels.append(label)
+
+            meter = fp.get("meter")
+            if meter not in self.meters:
+                self.meters[meter] = len(self.meters)
+
+    # Encode fingerprints into row arrays; labels/meters unknown to the
+    # vocabulary get codes that match nothing unless grow is set.
+    def encode(self, fps, grow=False):
+        if grow:
+            self._grow_vocabulary(fps)
+
+        n = len(fps)
+        sequences = [fp.get("structure", []) for fp in fps]
+        width = max((len(seq) for seq in sequences), default=0)
+
+        encoded = np.full((n, width), -1, dtype=np.int32)
+        for i, seq in enumerate(sequences):
+            encoded[i, :len(seq)] = [self.label_codes.get(label, -2) for label in seq]
+
+        density = np.full((n, len(self.labels)), np.nan)
+        groove = np.full((n, len(self.labels)), np.nan)
+
+        for i, fp in enumerate(fps):
+            for column, values in (
+                (density, fp.get("avg_section_density", {})),
+                (groove, fp.get("groove_profile", {})),
+            ):
+                for label, value in values.items():
+                    code = self.label_codes.get(label)
+                    if code is not None:
+                        column[i, code] = value
+
+        return {
+            "song_ids": np.array([fp.get("song_id") for fp in fps], dtype=object),
+            "sequences": encoded,
+            "lengths": np.array([len(seq) for seq in sequences], dtype=np.int64),
+            "chorus_ratio": np.array([fp.get("chorus_ratio", 0.0) for fp in fps], dtype=float),
+            "tempo": np.array([fp.get("tempo", 0) for fp in fps], dtype=float),
+            "meter": np.array([self.meters.get(fp.get("meter"), -1) for fp in fps], dtype=np.int32),
+            "density": density,
+            "groove": groove,
+        }
+
+    # Append fingerprints to the corpus (vocabulary grows as needed).
+    def add(self, fps):
+        rows = self.encode(fps, grow=True)
+        n_labels = len(self.labels)
+
+        width = max(self.sequences.shape[1], rows["sequences"].shape[1])
+        self.sequences = np.concatenate([
+            _pad_columns(self.sequences, width, -1),
+            _pad_columns(rows["sequences"], width, -1),
+        ])
+        self.density = np.concatenate([
+            _pad_columns(self.density, n_labels, np.nan), rows["density"]
+        ])
+        self.groove = np.concatenate([
+            _pad_columns(self.groove, n_labels, np.nan), rows["groove"]
+        ])
+
+        for name in ("song_ids", "lengths", "chorus_ratio", "tempo", "meter"):
+            setattr(self, name, np.concatenate([getattr(self, name), rows[name]]))
+
+    # Rows as a dict of arrays, optionally a subset selected by index.
+    def rows(self, index=slice(None)):
+        return {
+            "song_ids": self.song_ids[index],
+            "sequences": self.sequences[index],
+            "lengths": self.lengths[index],
+            "chorus_ratio": self.chorus_ratio[index],
+            "tempo": self.tempo[index],
+            "meter": self.meter[index],
+            "density": self.density[index],
+            "groove": self.groove[index],
+        }
+
+    # structure_distance from each query fingerprint to every corpus row.
+    def distances(self, query_fps, index=slice(None)):
+        return structure_distances(self.encode(query_fps), self.rows(index))
+
+
+def _pad_columns(array, width, fill):
+    if array.shape[1] >= width:
+        return array
+    pad = np.full((array.shape[0], width - array.shape[1]), fill, dtype=array.dtype)
+    return np.concatenate([array, pad], axis=1)
+
+
+def section_topology_distances(a, b):
+    la = a["lengths"][:, None]
+    lb = b["lengths"][None, :]
+
+    width = min(a["sequences"].shape[1], b["sequences"].shape[1])
+    min_len = np.minimum(la, lb)
+    max_len = np.maximum(la, lb)
+
+    mismatch = np.zeros(min_len.shape, dtype=np.int64)
+    for j in range(width):
+        differs = a["sequences"][:, None, j] != b["sequences"][None, :, j]
+        mismatch += differs & (j < min_len)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        len_diff = np.abs(la - lb) / max_len
+        order_penalty = mismatch / min_len
+
+    chorus_penalty = np.abs(a["chorus_ratio"][:, None] - b["chorus_ratio"][None, :])
+
+    dist = np.minimum(1.0, 0.5 * order_penalty + 0.3 * len_diff + 0.2 * chorus_penalty)
+    return np.where((la == 0) | (lb == 0), 1.0, dist)
+
+
+# Mean relative difference over labels present (and positive) in both songs.
+def _profile_distances(pa, pb):
+    n_labels = min(pa.shape[1], pb.shape[1])
+    a = pa[:, None, :n_labels]
+    b = pb[None, :, :n_labels]
+
+    common = ~np.isnan(a) & ~np.isnan(b)
+    valid = common & (a > 0) & (b > 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        diffs = np.where(valid, np.abs(a - b) / np.maximum(a, b), 0.0)
+        mean = diffs.sum(axis=2) / valid.sum(axis=2)
+
+    return np.where(valid.any(axis=2), np.minimum(1.0, mean), 1.0)
+
+
+def energy_arc_distances(a, b):
+    return _profile_distances(a["density"], b["density"])
+
+
+def groove_distances(a, b):
+    return _profile_distances(a["groove"], b["groove"])
+
+
+def tempo_meter_distances(a, b):
+    bpm_a = a["tempo"][:, None]
+    bpm_b = b["tempo"][None, :]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tempo_penalty = np.abs(np.log2(bpm_a / bpm_b))
+    tempo_penalty = np.where((bpm_a <= 0) | (bpm_b <= 0), 1.0, tempo_penalty)
+
+    meter_a = a["meter"][:, None]
+    meter_b = b["meter"][None, :]
+    meter_penalty = np.where(meter_a != meter_b, 0.25, 0.0)
+
+    return np.minimum(1.0, tempo_penalty + meter_penalty)
+
+
+# Vectorized similarity.structure_distance between two row sets -> (len(a), len(b)).
+def structure_distances(a, b):
+    return (
+        0.45 * section_topology_distances(a, b)
+        + 0.30 * energy_arc_distances(a, b)
+        + 0.15 * tempo_meter_distances(a, b)
+        + 0.10 * groove_distances(a, b)
+    )
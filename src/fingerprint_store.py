@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+import numpy as np
+from src.section_similarity import build_section_table
+
+
+# SQLite-backed fingerprint store keyed by song_id.
+# Upserts are single-row writes in WAL mode, so several processes can add
+# fingerprints concurrently without rewriting (or losing) each other's data.
+# Iteration order matches the JSON list: an upserted song moves to the end.
+# Each song's per-label section vector table is stored next to it.
+class FingerprintStore:
+    def __init__(self, path="output/fingerprints.db", timeout=30.0):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "song_id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS section_tables ("
+            "song_id TEXT PRIMARY KEY, labels TEXT NOT NULL, vectors BLOB NOT NULL)"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def __contains__(self, song_id):
+        row = self._conn.execute(
+            "SELECT 1 FROM fingerprints WHERE song_id = ?", (song_id,)
+        ).fetchone()
+        return row is not None
+
+    def upsert(self, fp):
+        self.upsert_many([fp])
+
+    def upsert_many(self, fps):
+        rows = [
+            (fp["song_id"], json.dumps(fp, separators=(",", ":")))
+            for fp in fps
+        ]
+        tables = [
+            (fp["song_id"], *_encode_section_table(_fingerprint_section_table(fp)))
+            for fp in fps
+        ]
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (song_id, data) VALUES (?, ?)",
+                rows,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO section_tables (song_id, labels, vectors) VALUES (?, ?, ?)",
+                tables,
+            )
+
+    def get(self, song_id):
+        row = self._conn.execute(
+            "SELECT data FROM fingerprints WHERE song_id = ?", (song_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, song_id):
+        with self._conn:
+            self._conn.execute("DELETE FROM fingerprints WHERE song_id = ?", (song_id,))
+            self._conn.execute("DELETE FROM section_tables WHERE song_id = ?", (song_id,))
+
+    def iter_fingerprints(self, batch_size=1000):
+        cursor = self._conn.execute("SELECT data FROM fingerprints ORDER BY rowid")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for (data,) in rows:
+                yield json.loads(data)
+
+    def all(self):
+        return list(self.iter_fingerprints())
+
+    # (song_id, section table) in fingerprint order; rows stored before
+    # section tables existed are rebuilt from the fingerprint.
+    def iter_section_tables(self, batch_size=1000):
+        cursor = self._conn.execute(
+            "SELECT f.song_id, f.data, t.labels, t.vectors FROM fingerprints f "
+            "LEFT JOIN section_tables t ON t.song_id = f.song_id ORDER BY f.rowid"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for song_id, data, labels, vectors in rows:
+                if labels is None:
+                    table = _fingerprint_section_table(json.loads(data))
+                else:
+                    table = _decode_section_table(labels, vectors)
+                yield song_id, table
+
+    # Load a fingerprints.json list (as written by save_fingerprint).
+    def import_json(self, path="output/fingerprints.json"):
+        with open(path, "r") as f:
+            fps = json.load(f)
+
+        self.upsert_many(fps)
+        return len(fps)
+
+    def export_json(self, path="output/fingerprints.json"):
+        with open(path, "w") as f:
+            json.dump(self.all(), f, indent=2)
+
+    # Columnar binary copy of the store (see fingerprint_columns).
+    def export_columns(self, path="output/fingerprints.cols"):
+        from src.fingerprint_columns import write_fingerprint_columns
+        return write_fingerprint_columns(self.iter_fingerprints(), path)
+
+    def import_columns(self, path="output/fingerprints.cols"):
+        from src.fingerprint_columns import FingerprintColumns
+        fps = list(FingerprintColumns(path))
+        self.upsert_many(fps)
+        return len(fps)
+
+
+def _fingerprint_section_table(fp):
+    if not fp.get("duration"):
+        return {}
+    return build_section_table(fp.get("sections", []), fp["duration"])
+
+
+def _encode_section_table(table):
+    labels = [[label, len(vectors)] for label, vectors in table.items()]
+    vectors = [np.asarray(v, dtype=np.float64).reshape(-1, 4) for v in table.values()]
+    blob = np.concatenate(vectors).tobytes() if vectors else b""
+    return json.dumps(labels), blob
+
+
+def _decode_section_table(labels, blob):
+    vectors = np.frombuffer(blob, dtype=np.float64).reshape(-1, 4)
+    table = {}
+    start = 0
+    for label, count in json.loads(labels):
+        table[label] = vectors[start:start + count]
+        start += count
+    return table
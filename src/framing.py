@@ -1,20 +1,42 @@
+import math
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.trace import traced
 
 
 # Slice a 1D signal into overlapping frames.
-def frame_signal(signal, frame_size, hop_length):
+# Returns a read-only strided view over the signal (no copy); pass
+# copy=True for a writable, contiguous frames matrix.
+@traced("frame_signal")
+def frame_signal(signal, frame_size, hop_length, dtype=np.float64, copy=False):
+    signal = np.asarray(signal, dtype=dtype)
     signal_length = len(signal)
 
     if signal_length < frame_size:
         raise ValueError("Signal is shorter than one frame")
 
-    num_frames = 1 + (signal_length - frame_size) // hop_length
+    frames = sliding_window_view(signal, frame_size)[::hop_length]
 
-    frames = np.zeros((num_frames, frame_size))
-
-    for i in range(num_frames):
-        start = i * hop_length
-        end = start + frame_size
-        frames[i] = signal[start:end]
+    if copy:
+        return np.ascontiguousarray(frames)
 
     return frames
+
+
+# Frame size, hop and sample rate for analysing at a lower rate while
+# keeping frames the same length in seconds as at the native rate.
+# Decimates by the largest integer factor no greater than
+# native_sr // analysis_sr (never below the requested rate) that divides
+# both hop_length and native_sr, so the hop and the rate stay whole numbers
+# and frame times never drift; factor 1 keeps the native framing.
+# E.g. 44.1 kHz with hop 512: 22050 -> 22050, 14000 -> 22050, 11025 -> 11025.
+# Never upsamples.
+def rescale_frames(frame_size, hop_length, native_sr, analysis_sr=None):
+    if not analysis_sr or analysis_sr >= native_sr:
+        return frame_size, hop_length, native_sr
+
+    common = math.gcd(hop_length, native_sr)
+    factor = max(f for f in range(1, native_sr // analysis_sr + 1) if common % f == 0)
+
+    hop = hop_length // factor
+    return max(hop, int(round(frame_size / factor))), hop, native_sr // factor
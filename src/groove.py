@@ -19,11 +19,21 @@ def compute_groove_metrics(onset_times, perceived_bpm):
 
     abs_dev = np.abs(deviations)
 
-    groove = {
-        "mean_abs_deviation_ms": round(float(np.mean(abs_dev) * 1000), 2),
-        "std_deviation_ms": round(float(np.std(deviations) * 1000), 2),
-        "max_deviation_ms": round(float(np.max(abs_dev) * 1000), 2),
-    }
+    # No onset close enough to the beat grid (e.g. onsets phase-shifted
+    # against it): deviations are undefined. None is the sentinel for every
+    # undefined groove value, here and in section features.
+    if len(deviations) == 0:
+        groove = {
+            "mean_abs_deviation_ms": None,
+            "std_deviation_ms": None,
+            "max_deviation_ms": None,
+        }
+    else:
+        groove = {
+            "mean_abs_deviation_ms": round(float(np.mean(abs_dev) * 1000), 2),
+            "std_deviation_ms": round(float(np.std(deviations) * 1000), 2),
+            "max_deviation_ms": round(float(np.max(abs_dev) * 1000), 2),
+        }
 
     iois = np.diff(onset_times)
     if len(iois) >= 4:
@@ -38,3 +48,65 @@ def compute_groove_metrics(onset_times, perceived_bpm):
         groove["swing_ratio"] = None
 
     return groove
+
+
+# Flat indices of segments [start, start + length) laid end to end.
+def _segment_indices(starts, lengths):
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(int)
+    flat = np.repeat(starts - offsets, lengths) + np.arange(np.sum(lengths))
+    return flat, offsets
+
+
+# Per-segment reduction of values laid out by _segment_indices; empty -> fill.
+def _segment_reduce(ufunc, values, offsets, lengths, fill=np.nan):
+    out = np.full(len(lengths), fill, dtype=float)
+    nonempty = lengths > 0
+    if np.any(nonempty):
+        out[nonempty] = ufunc.reduceat(values, offsets[nonempty])
+    return out
+
+
+# Compute groove deviation metrics for many windows of one onset array at
+# once. Window i covers onset_times[lo[i]:hi[i]] (see src/windows.py).
+# Returns the deviation keys of compute_groove_metrics (no swing_ratio) as
+# arrays of unrounded values, NaN where a window has no on-beat onsets (where
+# compute_groove_metrics gives None; callers map NaN back to None).
+# The sums run left to right while np.mean sums pairwise, so values agree
+# with compute_groove_metrics to float rounding, not bit for bit.
+def compute_groove_metrics_windows(onset_times, perceived_bpm, lo, hi):
+    beat_period = 60.0 / perceived_bpm
+    lo = np.asarray(lo, dtype=int)
+    hi = np.asarray(hi, dtype=int)
+
+    # Beat deviations depend only on the onset, so compute them once.
+    beat_indices = np.round(onset_times / beat_period)
+    beat_times = beat_indices * beat_period
+    deviations = onset_times - beat_times
+    ratios = np.abs((onset_times / beat_period) - beat_indices)
+    mask = (
+        (np.abs(deviations) < (0.15 * beat_period)) &
+        (ratios < 0.1)
+    )
+
+    on_beat = deviations[mask]
+    rank = np.concatenate(([0], np.cumsum(mask)))
+    counts = rank[hi] - rank[lo]
+
+    flat, offsets = _segment_indices(rank[lo], counts)
+    window_dev = on_beat[flat]
+    window_abs = np.abs(window_dev)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_abs = _segment_reduce(np.add, window_abs, offsets, counts) / counts
+        mean_dev = _segment_reduce(np.add, window_dev, offsets, counts) / counts
+        centered = window_dev - np.repeat(mean_dev, counts)
+        std_dev = np.sqrt(
+            _segment_reduce(np.add, centered * centered, offsets, counts) / counts
+        )
+    max_abs = _segment_reduce(np.maximum, window_abs, offsets, counts)
+
+    return {
+        "mean_abs_deviation_ms": mean_abs * 1000,
+        "std_deviation_ms": std_dev * 1000,
+        "max_deviation_ms": max_abs * 1000,
+    }
@@ -1,17 +1,25 @@
 import numpy as np
-import librosa
+from src.trace import traced
 
 
-def load_audio(path):
+# librosa and soundfile are imported on first use: importing librosa costs
+# far more than a cached analysis, and most entry points never decode audio.
+
+
+@traced("load_audio")
+def load_audio(path, sr=None):
     """
     Load an audio file and return a normalized mono signal.
+    sr resamples (band-limited, soxr) to that rate; None keeps the native rate.
 
     Returns:
         signal (np.ndarray): mono audio signal in range [-1, 1]
         sr (int): sample rate
     """
 
-    signal, sr = librosa.load(path, sr=None, mono=True)
+    import librosa
+
+    signal, sr = librosa.load(path, sr=sr, mono=True)
 
     if signal.size == 0:
         raise ValueError("Loaded audio is empty")
@@ -21,3 +29,128 @@ def load_audio(path):
         signal = signal / max_val
 
     return signal, sr
+
+
+def audio_info(path):
+    """
+    Read sample rate, length and channel count from the file header.
+
+    Files libsndfile cannot open are probed with audioread (e.g. ffmpeg);
+    its length comes from the header duration and may be off by a few
+    samples. Only when no audioread backend can open the file either is
+    it fully decoded with librosa, which is as slow as load_audio().
+
+    Returns:
+        sr (int): sample rate
+        num_samples (int): length in samples per channel
+        channels (int): number of channels
+    """
+
+    import soundfile as sf
+
+    try:
+        info = sf.info(path)
+        return info.samplerate, info.frames, info.channels
+    except (RuntimeError, sf.LibsndfileError):
+        pass
+
+    import audioread
+
+    try:
+        with audioread.audio_open(path) as f:
+            return f.samplerate, int(round(f.duration * f.samplerate)), f.channels
+    except audioread.DecodeError:
+        pass
+
+    import librosa
+    signal, sr = librosa.load(path, sr=None, mono=True)
+    return sr, len(signal), 1
+
+
+def _raw_blocks(path, block_size, mono, sr=None):
+    import soundfile as sf
+
+    try:
+        f = sf.SoundFile(path)
+    except (RuntimeError, sf.LibsndfileError):
+        f = None
+
+    if f is not None:
+        with f:
+            blocks = f.blocks(blocksize=block_size, dtype="float32", always_2d=True)
+            if mono:
+                blocks = (block.mean(axis=1, keepdims=True) for block in blocks)
+            if sr and sr != f.samplerate:
+                blocks = _resample_blocks(blocks, f.samplerate, sr, 1 if mono else f.channels)
+            for block in blocks:
+                yield block[:, 0] if mono else block.T
+        return
+
+    # Formats libsndfile cannot decode fall back to a full librosa decode.
+    import librosa
+    signal, _ = librosa.load(path, sr=sr, mono=mono)
+    if not mono:
+        signal = np.atleast_2d(signal)
+    for start in range(0, signal.shape[-1], block_size):
+        yield signal[..., start:start + block_size]
+
+
+# Band-limited streaming resampler over (n, channels) blocks; output block
+# sizes vary with the resampler's delay.
+def _resample_blocks(blocks, in_rate, out_rate, channels):
+    import soxr
+
+    stream = soxr.ResampleStream(in_rate, out_rate, channels, dtype="float32")
+    for block in blocks:
+        out = stream.resample_chunk(np.ascontiguousarray(block))
+        if len(out):
+            yield out.reshape(-1, channels)
+
+    out = stream.resample_chunk(np.zeros((0, channels), dtype=np.float32), last=True)
+    if len(out):
+        yield out.reshape(-1, channels)
+
+
+def peak_amplitude(path, block_size=65536, mono=True):
+    """
+    First pass over the file: the absolute peak used for normalization.
+    """
+
+    peak = 0.0
+    for block in _raw_blocks(path, block_size, mono):
+        if block.size:
+            peak = max(peak, float(np.max(np.abs(block))))
+
+    return peak
+
+
+def stream_audio(path, block_size=65536, mono=True, normalize=True, sr=None):
+    """
+    Decode an audio file block by block, resampled to sr when given.
+
+    Normalization uses a first pass (peak_amplitude) so the full decoded
+    signal is never held in memory; at the native rate blocks match slices
+    of load_audio().
+
+    Yields:
+        block (np.ndarray): block_size samples (the last block may be shorter;
+            resampled blocks vary), shape (channels, n) when mono is False
+    """
+
+    scale = 1.0
+    if normalize:
+        # Peak of the native signal: resampling twice would double the
+        # cost for a scale the analysis is insensitive to.
+        peak = peak_amplitude(path, block_size, mono)
+        if peak == 0:
+            normalize = False
+        else:
+            scale = np.float32(peak)
+
+    emitted = 0
+    for block in _raw_blocks(path, block_size, mono, sr):
+        emitted += block.shape[-1]
+        yield block / scale if normalize else block
+
+    if emitted == 0:
+        raise ValueError("Loaded audio is empty")
@@ -1,14 +1,40 @@
 import numpy as np
+from src.trace import traced
 
-# Detect onset frames based on energy increase + peak picking.
-def detect_onsets(energy, threshold_ratio=1.5, min_gap=3):
 
-    energy_diff = np.diff(energy)
-    energy_diff = np.maximum(energy_diff, 0)
+# Merge above-threshold candidates closer than min_gap, keeping the stronger.
+# A cluster whose span is under min_gap collapses to its first strongest
+# candidate; longer clusters are walked one by one.
+def _pick_peaks(energy_diff, candidate_indices, min_gap):
+    if len(candidate_indices) == 0:
+        return candidate_indices
 
-    threshold = threshold_ratio * np.mean(energy_diff)
-    candidate_indices = np.where(energy_diff > threshold)[0]
+    breaks = np.flatnonzero(np.diff(candidate_indices) >= min_gap) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(candidate_indices)]))
+
+    values = energy_diff[candidate_indices]
+    cluster = np.repeat(np.arange(len(starts)), ends - starts)
+
+    order = np.lexsort((candidate_indices, -values, cluster))
+    strongest = candidate_indices[order[starts]]
+
+    spans = candidate_indices[ends - 1] - candidate_indices[starts]
+    long_clusters = spans >= min_gap
+
+    if not np.any(long_clusters):
+        return strongest
+
+    # Breaks between clusters are final, so walking only the long clusters
+    # gives the same onsets as walking every candidate.
+    walked = _walk_candidates(
+        energy_diff, candidate_indices[np.repeat(long_clusters, ends - starts)], min_gap
+    )
 
+    return np.sort(np.concatenate((strongest[~long_clusters], walked)))
+
+
+def _walk_candidates(energy_diff, candidate_indices, min_gap):
     onsets = []
     last_onset = -min_gap
 
@@ -21,4 +47,99 @@ def detect_onsets(energy, threshold_ratio=1.5, min_gap=3):
                 onsets[-1] = idx
                 last_onset = idx
 
-    return np.array(onsets)
+    return np.array(onsets, dtype=candidate_indices.dtype)
+
+
+# Detect onset frames based on energy increase + peak picking.
+@traced("detect_onsets")
+def detect_onsets(energy, threshold_ratio=1.5, min_gap=3):
+
+    energy_diff = np.diff(energy)
+    energy_diff = np.maximum(energy_diff, 0)
+
+    threshold = threshold_ratio * np.mean(energy_diff)
+    candidate_indices = np.where(energy_diff > threshold)[0]
+
+    return _pick_peaks(energy_diff, candidate_indices, min_gap)
+
+
+# Causal onset detector fed with energy frames as they arrive.
+# The global mean of the positive energy difference is replaced by a running
+# mean (or an exponentially decaying one when decay is set), and an onset is
+# emitted once min_gap frames have passed without a stronger candidate.
+class OnlineOnsetDetector:
+    def __init__(self, threshold_ratio=1.5, min_gap=3, decay=None):
+        self.threshold_ratio = threshold_ratio
+        self.min_gap = min_gap
+        self.decay = decay
+
+        self._last_energy = None
+        self._frame = 0
+        self._diff_sum = 0.0
+        self._mean = 0.0
+
+        self._pending = None
+        self._pending_value = 0.0
+
+    def _running_mean(self, energy_diff):
+        if self.decay is None:
+            counts = self._frame + np.arange(1, len(energy_diff) + 1)
+            means = (self._diff_sum + np.cumsum(energy_diff)) / counts
+            self._diff_sum += float(np.sum(energy_diff))
+            return means
+
+        means = np.empty(len(energy_diff))
+        mean = self._mean
+        for i, d in enumerate(energy_diff):
+            mean = d if self._frame + i == 0 else self.decay * mean + (1 - self.decay) * d
+            means[i] = mean
+        self._mean = mean
+        return means
+
+    # Feed the next energy frames, returns onset frames that became final.
+    def process(self, energy):
+        energy = np.asarray(energy, dtype=float)
+
+        if self._last_energy is not None:
+            energy = np.concatenate(([self._last_energy], energy))
+        if len(energy) == 0:
+            return np.array([], dtype=int)
+
+        self._last_energy = energy[-1]
+        energy_diff = np.maximum(np.diff(energy), 0)
+        if len(energy_diff) == 0:
+            return np.array([], dtype=int)
+
+        threshold = self.threshold_ratio * self._running_mean(energy_diff)
+        candidates = np.flatnonzero(energy_diff > threshold)
+
+        onsets = []
+        for i in candidates:
+            idx = self._frame + int(i)
+            value = energy_diff[i]
+
+            if self._pending is None or idx - self._pending >= self.min_gap:
+                if self._pending is not None:
+                    onsets.append(self._pending)
+                self._pending = idx
+                self._pending_value = value
+            elif value > self._pending_value:
+                self._pending = idx
+                self._pending_value = value
+
+        self._frame += len(energy_diff)
+
+        if self._pending is not None and self._frame - 1 - self._pending >= self.min_gap - 1:
+            onsets.append(self._pending)
+            self._pending = None
+
+        return np.array(onsets, dtype=int)
+
+    # Emit the onset still waiting for its min_gap window to close.
+    def flush(self):
+        if self._pending is None:
+            return np.array([], dtype=int)
+
+        onset = self._pending
+        self._pending = None
+        return np.array([onset], dtype=int)
@@ -1,4 +1,5 @@
 import numpy as np
+from src.trace import traced
 
 # Convert onset frame indices to time (seconds).
 def onset_times(onset_frames, hop_length, sample_rate):
@@ -10,15 +11,34 @@ def inter_onset_intervals(onset_times):
     return np.diff(onset_times)
 
 
+# Above this many samples the FFT path beats direct correlation.
+FFT_AUTOCORR_MIN_SIZE = 512
+
+
 # Compute normalized autocorrelation of a 1D signal.
-def autocorrelation(signal):
+# method is "direct", "fft" or "auto" (chosen by input size).
+def autocorrelation(signal, method="auto"):
     signal = signal - np.mean(signal)
-    corr = np.correlate(signal, signal, mode="full")
-    corr = corr[corr.size // 2 :]
+
+    if method == "auto":
+        method = "fft" if len(signal) >= FFT_AUTOCORR_MIN_SIZE else "direct"
+
+    if method == "fft":
+        n = len(signal)
+        n_fft = 1 << (2 * n - 1).bit_length()
+        spectrum = np.fft.rfft(signal, n_fft)
+        corr = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n_fft)[:n]
+    elif method == "direct":
+        corr = np.correlate(signal, signal, mode="full")
+        corr = corr[corr.size // 2 :]
+    else:
+        raise ValueError(f"Unknown autocorrelation method: {method}")
+
     return corr / np.max(corr)
 
 
 #Estimate tempo from inter-onset intervals using autocorrelation.
+@traced("estimate_tempo")
 def estimate_tempo(iois, min_bpm=40, max_bpm=200):
     if len(iois) < 2:
         return None, None
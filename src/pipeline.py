@@ -0,0 +1,471 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from src.load_audio import load_audio, audio_info, stream_audio
+from src.energy import compute_rms_energy_from_signal, compute_rms_energy_from_blocks
+from src.onset import detect_onsets
+from src.periodicity import (
+    onset_times,
+    inter_onset_intervals,
+    estimate_tempo,
+    tempo_candidates,
+    tempo_confidence,
+)
+from src.selection import select_perceived_tempo
+from src.report import generate_report
+from src.rhythm_hierarchy import build_rhythm_hierarchy
+from src.groove import compute_groove_metrics
+from src.tempo_drift import compute_tempo_drift
+from src.meter import infer_meter
+from src.windows import window_bounds
+from src.framing import rescale_frames
+from src.cache import file_hash
+from src.trace import span
+from src.sections import (
+    extract_section_features,
+    detect_section_boundaries,
+    aggregate_section_features,
+    label_sections,
+)
+from src.cues import generate_cues
+from src.structure import infer_structure
+from src.fingerprint import build_structure_fingerprint
+
+
+# Stage registry: name -> (dependency stage names, function).
+# A stage function takes the SongAnalysis and its dependencies' values.
+STAGES = {}
+
+
+def stage(name, *deps):
+    def register(fn):
+        STAGES[name] = (deps, fn)
+        return fn
+    return register
+
+
+# Outputs of analyze_song, in the order of its result dict.
+ANALYSIS_OUTPUTS = [
+    "sr", "duration", "energy", "onsets", "times", "iois", "tempo", "corr",
+    "candidates", "perceived", "section_features", "boundaries", "sections",
+    "labeled_sections", "structure", "cues", "hierarchy", "meter", "groove",
+    "tempo_drift", "fingerprint", "report",
+]
+
+
+# Demand-driven analysis of one audio file over the STAGES graph.
+# Asking for a stage computes only its missing ancestors; every result is
+# memoized for the life of the object. compute() runs independent stages
+# (e.g. hierarchy, groove and tempo drift) concurrently when workers > 1.
+# values seeds stage results, e.g. an energy curve computed elsewhere.
+class SongAnalysis:
+    def __init__(
+        self,
+        audio_path,
+        frame_size=2048,
+        hop_length=512,
+        threshold_ratio=1.5,
+        min_gap=3,
+        stream=False,
+        cache=None,
+        workers=1,
+        values=None,
+        analysis_sr=None,
+        song_id=None,
+    ):
+        self.audio_path = audio_path
+        self.song_id = song_id or os.path.basename(audio_path)
+        self.frame_size = frame_size
+        self.hop_length = hop_length
+        self.threshold_ratio = threshold_ratio
+        self.min_gap = min_gap
+        self.analysis_sr = analysis_sr
+        self.stream = stream
+        self.cache = cache
+        self.workers = workers
+
+        self.values = dict(values or {})
+        self._audio_key = None
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def __contains__(self, name):
+        return name in self.values
+
+    def get(self, name):
+        if name not in self.values:
+            deps, _ = STAGES[name]
+            for dep in deps:
+                self.get(dep)
+            self._run(name)
+        return self.values[name]
+
+    def _run(self, name):
+        deps, fn = STAGES[name]
+        with span(f"stage:{name}"):
+            value = fn(self, *(self.values[dep] for dep in deps))
+        with self._lock:
+            self.values.setdefault(name, value)
+
+    # Stages needed for names that are not memoized yet, dependencies first.
+    def missing(self, names):
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen or name in self.values:
+                return
+            seen.add(name)
+            for dep in STAGES[name][0]:
+                visit(dep)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def compute(self, names):
+        """
+        Compute the requested stages and whatever they depend on.
+
+        Returns:
+            dict name -> value, in the order requested
+        """
+
+        pending = self.missing(names)
+
+        if self.workers <= 1:
+            for name in pending:
+                self._run(name)
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                running = {}
+                while pending or running:
+                    ready = [
+                        name for name in pending
+                        if all(dep in self.values for dep in STAGES[name][0])
+                    ]
+                    for name in ready:
+                        pending.remove(name)
+                        running[pool.submit(self._run, name)] = name
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del running[future]
+                        future.result()
+
+        return {name: self.values[name] for name in names}
+
+    # Run a stage through the cache; params must cover every upstream stage.
+    def run_cached(self, stage_name, params, compute):
+        if self.cache is None:
+            return compute()
+        if self._audio_key is None:
+            self._audio_key = file_hash(self.audio_path)
+        return self.cache.get_or_compute(self._audio_key, stage_name, params, compute)
+
+    # Cache params of the front end; params must cover the decode mode
+    # (a streamed decode need not match a full one bit for bit, e.g. when
+    # resampled) and the requested analysis rate. The native rate, and so
+    # the rescaled frames, follow from the audio hash already in the key,
+    # so a cache hit never opens the file.
+    @property
+    def energy_params(self):
+        params = {"frame_size": self.frame_size, "hop_length": self.hop_length, "stream": self.stream}
+        if self.analysis_sr is not None:
+            params["analysis_sr"] = self.analysis_sr
+        return params
+
+    @property
+    def onset_params(self):
+        return {
+            **self.energy_params,
+            "threshold_ratio": self.threshold_ratio,
+            "min_gap": self.min_gap,
+        }
+
+
+# Frame size, hop and decode rate. With analysis_sr below the native rate
+# (read from the file header) the audio is resampled and frames rescaled to
+# the same length in seconds (see rescale_frames); sr is None when decoding
+# at the native rate. Only decoding stages ask for it.
+@stage("framing")
+def _framing(song):
+    framing = {"frame_size": song.frame_size, "hop_length": song.hop_length, "sr": None}
+    if song.analysis_sr is None:
+        return framing
+
+    native_sr = audio_info(song.audio_path)[0]
+    frame_size, hop_length, sr = rescale_frames(
+        song.frame_size, song.hop_length, native_sr, song.analysis_sr
+    )
+    if sr != native_sr:
+        framing = {"frame_size": frame_size, "hop_length": hop_length, "sr": sr}
+    return framing
+
+
+@stage("signal", "framing")
+def _signal(song, framing):
+    return load_audio(song.audio_path, sr=framing["sr"])
+
+
+# Yields blocks unchanged, adding their lengths to counts["samples"].
+def _count_samples(blocks, counts):
+    for block in blocks:
+        counts["samples"] += block.shape[-1]
+        yield block
+
+
+# Front end (energy, sr, sample count, hop) as one cached stage. A signal
+# that was already requested is reused; otherwise it is decoded and dropped.
+@stage("front")
+def _front(song):
+    def compute():
+        framing = song["framing"]
+        frame_size, hop_length, analysis_sr = framing["frame_size"], framing["hop_length"], framing["sr"]
+
+        if song.stream and analysis_sr is None:
+            sr, num_samples, _ = audio_info(song.audio_path)
+            energy = compute_rms_energy_from_blocks(
+                stream_audio(song.audio_path), frame_size, hop_length
+            )
+        elif song.stream:
+            # Resampled length is only known once the blocks are out.
+            sr, counts = analysis_sr, {"samples": 0}
+            blocks = _count_samples(stream_audio(song.audio_path, sr=analysis_sr), counts)
+            energy = compute_rms_energy_from_blocks(blocks, frame_size, hop_length)
+            num_samples = counts["samples"]
+        else:
+            signal, sr = song.values.get("signal") or load_audio(song.audio_path, sr=analysis_sr)
+            num_samples = len(signal)
+            energy = compute_rms_energy_from_signal(signal, frame_size, hop_length)
+
+        return {
+            "energy": energy,
+            "sr": np.array(sr),
+            "num_samples": np.array(num_samples),
+            "hop_length": np.array(hop_length),
+        }
+
+    return song.run_cached("energy", song.energy_params, compute)
+
+
+@stage("energy", "front")
+def _energy(song, front):
+    return front["energy"]
+
+
+@stage("sr", "front")
+def _sr(song, front):
+    return int(front["sr"])
+
+
+@stage("duration", "front", "sr")
+def _duration(song, front, sr):
+    return int(front["num_samples"]) / sr
+
+
+@stage("onsets", "energy")
+def _onsets(song, energy):
+    return song.run_cached("onsets", song.onset_params, lambda: {
+        "onsets": detect_onsets(energy, song.threshold_ratio, song.min_gap)
+    })["onsets"]
+
+
+# Hop of the analysis rate (rescaled when resampled).
+@stage("times", "onsets", "sr", "front")
+def _times(song, onsets, sr, front):
+    return onset_times(onsets, int(front["hop_length"]), sr)
+
+
+@stage("iois", "times")
+def _iois(song, times):
+    return inter_onset_intervals(times)
+
+
+@stage("tempo_estimate", "iois")
+def _tempo_estimate(song, iois):
+    def compute():
+        tempo, corr = estimate_tempo(iois)
+        if not tempo:
+            return {"tempo": np.array(np.nan), "corr": np.empty(0)}
+        return {"tempo": np.array(tempo), "corr": corr}
+
+    return song.run_cached("tempo", song.onset_params, compute)
+
+
+# None when tempo could not be estimated.
+@stage("tempo", "tempo_estimate")
+def _tempo(song, estimate):
+    tempo = None if np.isnan(estimate["tempo"]) else float(estimate["tempo"])
+    return tempo or None
+
+
+@stage("corr", "tempo_estimate")
+def _corr(song, estimate):
+    return estimate["corr"]
+
+
+# Empty when tempo could not be estimated.
+@stage("candidates", "tempo")
+def _candidates(song, tempo):
+    if tempo is None:
+        return []
+    return tempo_candidates(tempo)
+
+
+# None when there is no candidate (no tempo, or none in the BPM range);
+# callers check it before asking for the stages built on it.
+@stage("perceived", "candidates")
+def _perceived(song, candidates):
+    if not candidates:
+        return None
+    return select_perceived_tempo(candidates)
+
+
+# tempo_confidence of every candidate, computed once: {bpm: confidence}.
+@stage("confidences", "iois", "candidates")
+def _confidences(song, iois, candidates):
+    return {t: tempo_confidence(iois, t) for t in candidates}
+
+
+@stage("windows", "times")
+def _windows(song, times):
+    return window_bounds(times)
+
+
+@stage("section_features", "times", "perceived", "windows")
+def _section_features(song, times, perceived, windows):
+    return extract_section_features(times, perceived, bounds=windows)
+
+
+@stage("boundaries", "section_features")
+def _boundaries(song, section_features):
+    return detect_section_boundaries(section_features)
+
+
+@stage("sections", "section_features", "boundaries")
+def _sections(song, section_features, boundaries):
+    return aggregate_section_features(section_features, boundaries)
+
+
+@stage("labeled_sections", "sections")
+def _labeled_sections(song, sections):
+    return label_sections(sections)
+
+
+@stage("structure", "sections")
+def _structure(song, sections):
+    return infer_structure(sections)
+
+
+@stage("cues", "labeled_sections", "duration")
+def _cues(song, labeled_sections, duration):
+    return generate_cues(labeled_sections, duration)
+
+
+@stage("hierarchy", "corr", "iois", "perceived")
+def _hierarchy(song, corr, iois, perceived):
+    return build_rhythm_hierarchy(corr=corr, iois=iois, perceived_bpm=perceived)
+
+
+@stage("meter", "perceived", "hierarchy")
+def _meter(song, perceived, hierarchy):
+    return infer_meter(perceived, hierarchy)
+
+
+@stage("groove", "times", "perceived")
+def _groove(song, times, perceived):
+    return compute_groove_metrics(times, perceived)
+
+
+@stage("tempo_drift", "times", "perceived", "windows")
+def _tempo_drift(song, times, perceived, windows):
+    return compute_tempo_drift(times, perceived, bounds=windows)
+
+
+@stage("fingerprint", "perceived", "meter", "structure", "labeled_sections", "duration")
+def _fingerprint(song, perceived, meter, structure, labeled_sections, duration):
+    return build_structure_fingerprint(
+        song_id=song.song_id,
+        perceived_bpm=perceived,
+        meter=meter,
+        structure=structure,
+        labeled_sections=labeled_sections,
+        duration=duration,
+    )
+
+
+@stage(
+    "report", "duration", "sr", "onsets", "iois", "candidates", "perceived",
+    "confidences", "hierarchy", "groove", "tempo_drift", "meter",
+    "section_features", "boundaries", "labeled_sections", "structure", "fingerprint",
+)
+def _report(song, duration, sr, onsets, iois, candidates, perceived, confidences,
+            hierarchy, groove, tempo_drift, meter, section_features, boundaries,
+            labeled_sections, structure, fingerprint):
+    return generate_report(
+        duration=duration,
+        sample_rate=sr,
+        onsets=onsets,
+        iois=iois,
+        perceived_tempo=perceived,
+        subdivision_tempo=max(candidates),
+        conf_perceived=confidences[perceived],
+        conf_subdivision=confidences[max(candidates)],
+        rhythm_hierarchy=hierarchy,
+        groove=groove,
+        tempo_drift=tempo_drift,
+        meter=meter,
+        section_features=section_features,
+        boundaries=boundaries,
+        labeled_sections=labeled_sections,
+        structure=structure,
+        fingerprint=fingerprint
+    )
+
+
+def analyze_song(
+    audio_path,
+    frame_size=2048,
+    hop_length=512,
+    threshold_ratio=1.5,
+    min_gap=3,
+    stream=False,
+    cache=None,
+    workers=1,
+    analysis_sr=None,
+    song_id=None,
+):
+    """
+    Run the full analysis of one audio file (every stage of SongAnalysis).
+
+    Front-end stages (energy, onsets, tempo) go through cache, a StageCache,
+    when given. analysis_sr decodes at that lower rate (frame_size and
+    hop_length are given at the native rate and rescaled). song_id defaults
+    to the file name. Nothing is written to output/.
+
+    Returns:
+        dict of every stage result (signal-level through report), or None
+        when tempo could not be estimated
+    """
+
+    song = SongAnalysis(
+        audio_path,
+        frame_size=frame_size,
+        hop_length=hop_length,
+        threshold_ratio=threshold_ratio,
+        min_gap=min_gap,
+        stream=stream,
+        cache=cache,
+        workers=workers,
+        analysis_sr=analysis_sr,
+        song_id=song_id,
+    )
+
+    if song["perceived"] is None:
+        return None
+
+    return {"song_id": song.song_id, **song.compute(ANALYSIS_OUTPUTS)}
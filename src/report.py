@@ -1,4 +1,5 @@
 import json
+from src.trace import traced
 
 
 def generate_report(
@@ -64,6 +65,7 @@ def generate_report(
     return report
 
 
+@traced("save_report")
 def save_report(report, path="output/analysis.json"):
     with open(path, "w") as f:
         json.dump(report, f, indent=2)
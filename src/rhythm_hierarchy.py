@@ -1,19 +1,41 @@
 import numpy as np
 
 
+# Columns of the array-backed layer table built by build_layer_table.
+LAYER_DTYPE = np.dtype([
+    ("bpm", np.float64),
+    ("period_seconds", np.float64),
+    ("strength", np.float64),
+    ("ratio_to_beat", np.float64),
+])
+
+
+# Indices of local maxima in autocorrelation above a relative threshold.
+def autocorr_peak_indices(lag_times, corr, min_strength=0.15, min_lag=0.08):
+    corr = np.asarray(corr)
+    lag_times = np.asarray(lag_times)
+
+    if len(corr) < 3:
+        return np.array([], dtype=int)
+
+    inner = corr[1:-1]
+    mask = (
+        (inner > corr[:-2])
+        & (inner > corr[2:])
+        & (inner >= min_strength * np.max(corr))
+        & (lag_times[1:-1] >= min_lag)
+    )
+
+    return np.flatnonzero(mask) + 1
+
+
 # Find local maxima in autocorrelation above a relative threshold.
 def find_autocorr_peaks(lag_times, corr, min_strength=0.15, min_lag=0.08):
-    peaks = []
-    max_corr = np.max(corr)
-
-    for i in range(1, len(corr) - 1):
-        if corr[i] > corr[i - 1] and corr[i] > corr[i + 1]:
-            if corr[i] >= min_strength * max_corr and lag_times[i] >= min_lag:
-                peaks.append({
-                    "lag": lag_times[i],
-                    "strength": float(corr[i])
-                })
-    return peaks
+    idx = autocorr_peak_indices(lag_times, corr, min_strength, min_lag)
+    return [
+        {"lag": lag_times[i], "strength": float(corr[i])}
+        for i in idx
+    ]
 
 
 # Classify rhythmic layer based on ratio to perceived beat
@@ -32,49 +54,59 @@ def classify_layer(ratio):
     return "bar"
 
 
-# Build a beat-anchored rhythm hierarchy.
-def build_rhythm_hierarchy(
-    corr,
-    iois,
-    perceived_bpm,
-    min_bpm=10,
-    max_bpm=600
-):
+# Build the layer table: peaks in bpm range, one per rounded bpm, by period.
+def build_layer_table(corr, iois, perceived_bpm, min_bpm=10, max_bpm=600):
     mean_ioi = float(np.mean(iois))
     lag_times = np.arange(len(corr)) * mean_ioi
 
-    peaks = find_autocorr_peaks(lag_times, corr)
+    idx = autocorr_peak_indices(lag_times, corr)
 
-    layers = []
-    beat_period = 60.0 / perceived_bpm
+    periods = lag_times[idx]
+    bpms = 60.0 / periods
+    in_range = (bpms >= min_bpm) & (bpms <= max_bpm)
 
-    for p in peaks:
-        period = p["lag"]
-        bpm = 60.0 / period
+    table = np.empty(np.count_nonzero(in_range), dtype=LAYER_DTYPE)
+    table["bpm"] = bpms[in_range]
+    table["period_seconds"] = periods[in_range]
+    table["strength"] = np.asarray(corr, dtype=np.float64)[idx][in_range]
+    table["ratio_to_beat"] = (60.0 / perceived_bpm) / table["period_seconds"]
 
-        if not (min_bpm <= bpm <= max_bpm):
-            continue
+    # Keep the strongest (first on ties) peak per rounded bpm bucket.
+    keys = np.round(np.round(table["bpm"], 2))
+    strengths = np.round(table["strength"], 3)
+    order = np.lexsort((np.arange(len(table)), -strengths, keys))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = keys[order][1:] != keys[order][:-1]
+    table = table[order[first]]
 
-        ratio = beat_period / period
-        layer = classify_layer(ratio)
+    return table[np.argsort(np.round(table["period_seconds"], 4), kind="stable")]
 
-        layers.append({
-            "level": layer,
-            "bpm": round(bpm, 2),
-            "period_seconds": round(period, 4),
-            "strength": round(p["strength"], 3),
-            "ratio_to_beat": round(ratio, 2)
-        })
 
-    unique = {}
-    for l in layers:
-        key = round(l["bpm"])
-        if key not in unique or l["strength"] > unique[key]["strength"]:
-            unique[key] = l
+# Layer table rows as the report's layer dicts.
+def layer_table_to_dicts(table):
+    return [
+        {
+            "level": classify_layer(float(row["ratio_to_beat"])),
+            "bpm": round(float(row["bpm"]), 2),
+            "period_seconds": round(float(row["period_seconds"]), 4),
+            "strength": round(float(row["strength"]), 3),
+            "ratio_to_beat": round(float(row["ratio_to_beat"]), 2)
+        }
+        for row in table
+    ]
 
-    layers = sorted(unique.values(), key=lambda x: x["period_seconds"])
+
+# Build a beat-anchored rhythm hierarchy.
+def build_rhythm_hierarchy(
+    corr,
+    iois,
+    perceived_bpm,
+    min_bpm=10,
+    max_bpm=600
+):
+    table = build_layer_table(corr, iois, perceived_bpm, min_bpm, max_bpm)
 
     return {
         "reference_beat_bpm": round(perceived_bpm, 2),
-        "layers": layers
+        "layers": layer_table_to_dicts(table)
     }
@@ -124,3 +124,134 @@ def explain_chorus_similarity(sections_a, sections_b, duration_a, duration_b):
         return None
 
     return explain_similarity(sa, sb, duration_a, duration_b)
+
+
+CHORUS_LABELS = ("chorus", "post_chorus")
+
+
+# Section vectors of one song grouped by label: {label: (n, 4) array}.
+def build_section_table(sections, total_duration):
+    table = {}
+    for s in sections:
+        table.setdefault(s["label"], []).append(build_section_vector(s, total_duration))
+
+    return {label: np.array(vectors) for label, vectors in table.items()}
+
+
+def _pairwise_distances(a, b):
+    diff = a[:, None, :] - b[None, :, :]
+    return np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+
+
+# compare_sections on precomputed section tables.
+def compare_section_tables(table_a, table_b):
+    results = {}
+
+    for label in set(table_a.keys()) & set(table_b.keys()):
+        results[label] = float(np.mean(_pairwise_distances(table_a[label], table_b[label])))
+
+    return results
+
+
+# Section tables of a whole corpus, stacked per label for one-vs-all queries.
+# For each label: all songs' vectors in one (m, 4) array plus the owning
+# song row of each vector and the per-song vector counts.
+class SectionCorpus:
+    def __init__(self, song_ids, tables):
+        self.song_ids = list(song_ids)
+        self.labels = {}
+
+        by_label = {}
+        for row, table in enumerate(tables):
+            for label, vectors in table.items():
+                by_label.setdefault(label, []).append((row, vectors))
+
+        for label, entries in by_label.items():
+            self.labels[label] = self._stack(entries)
+
+        chorus = [
+            (row, vectors)
+            for label in CHORUS_LABELS
+            for row, vectors in by_label.get(label, [])
+        ]
+        self.chorus = self._stack(chorus) if chorus else None
+
+    def __len__(self):
+        return len(self.song_ids)
+
+    def _stack(self, entries):
+        vectors = np.concatenate([v for _, v in entries])
+        owner = np.concatenate([np.full(len(v), row) for row, v in entries])
+        counts = np.bincount(owner, minlength=len(self.song_ids))
+        return vectors, owner, counts
+
+    @classmethod
+    def from_sections(cls, songs):
+        """songs: iterable of (song_id, sections, duration)."""
+        song_ids, tables = [], []
+        for song_id, sections, duration in songs:
+            song_ids.append(song_id)
+            tables.append(build_section_table(sections, duration))
+        return cls(song_ids, tables)
+
+    # Mean distance between query vectors and each song's vectors (NaN if none).
+    def _mean_distances(self, query_vectors, stacked):
+        vectors, owner, counts = stacked
+        dists = _pairwise_distances(query_vectors, vectors).sum(axis=0)
+        sums = np.bincount(owner, weights=dists, minlength=len(self.song_ids))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / (counts * len(query_vectors))
+
+    def compare(self, query_table):
+        """
+        compare_sections of the query against every song at once.
+
+        Returns:
+            dict label -> (n_songs,) array, NaN where the song lacks the label
+        """
+
+        return {
+            label: self._mean_distances(vectors, self.labels[label])
+            for label, vectors in query_table.items()
+            if label in self.labels
+        }
+
+    # Per-song section_distances dict, as compare_sections returns it.
+    @staticmethod
+    def song_distances(distances, row):
+        return {
+            label: float(values[row])
+            for label, values in distances.items()
+            if not np.isnan(values[row])
+        }
+
+    # weighted_overall_similarity for every song (NaN where it would be None).
+    def weighted_overall(self, distances):
+        weights = {
+            "chorus": 0.45,
+            "post_chorus": 0.25,
+            "verse": 0.2,
+            "breakdown": 0.1
+        }
+
+        total = np.zeros(len(self.song_ids))
+        weight_sum = np.zeros(len(self.song_ids))
+
+        for label, values in distances.items():
+            present = ~np.isnan(values)
+            w = weights.get(label, 0.1)
+            total[present] += w * values[present]
+            weight_sum[present] += w
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.minimum(total / weight_sum, 1.0)
+
+    # chorus_only_similarity for every song (NaN where it would be None).
+    def chorus_only(self, query_table):
+        query = [query_table[label] for label in CHORUS_LABELS if label in query_table]
+
+        if not query or self.chorus is None:
+            return np.full(len(self.song_ids), np.nan)
+
+        return self._mean_distances(np.concatenate(query), self.chorus)
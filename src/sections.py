@@ -1,37 +1,46 @@
 import numpy as np
-from src.groove import compute_groove_metrics
+from src.groove import compute_groove_metrics_windows
+from src.windows import window_bounds
+from src.trace import traced
 
 
-def extract_section_features(onset_times, perceived_bpm, window_seconds=12):
-    duration = onset_times[-1]
-    start = 0.0
+# Groove value for a feature dict: rounded, None where the window has no
+# on-beat onsets (NaN from compute_groove_metrics_windows).
+def _groove_value(value):
+    return None if np.isnan(value) else round(float(value), 2)
 
-    features = []
 
-    while start + window_seconds <= duration:
-        end = start + window_seconds
-        window_onsets = onset_times[
-            (onset_times >= start) & (onset_times < end)
-        ]
+# Mean of the groove values that are defined, None if there are none.
+def _mean_defined(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
 
-        if len(window_onsets) < 3:
-            start += window_seconds / 2
-            continue
 
-        onset_density = len(window_onsets) / window_seconds
+# bounds: optional precomputed window_bounds(onset_times, window_seconds)
+@traced("extract_section_features")
+def extract_section_features(onset_times, perceived_bpm, window_seconds=12, bounds=None):
+    if bounds is None:
+        bounds = window_bounds(onset_times, window_seconds)
+
+    starts, ends, lo, hi = bounds
+    keep = (hi - lo) >= 3
+    starts, ends, lo, hi = starts[keep], ends[keep], lo[keep], hi[keep]
 
-        groove = compute_groove_metrics(window_onsets, perceived_bpm)
+    groove = compute_groove_metrics_windows(onset_times, perceived_bpm, lo, hi)
+    groove_mean = groove["mean_abs_deviation_ms"]
+    groove_std = groove["std_deviation_ms"]
 
+    features = []
+
+    for i in range(len(starts)):
         features.append({
-            "start": round(start, 2),
-            "end": round(end, 2),
-            "onset_density": onset_density,
-            "groove_mean": groove["mean_abs_deviation_ms"],
-            "groove_std": groove["std_deviation_ms"],
+            "start": round(float(starts[i]), 2),
+            "end": round(float(ends[i]), 2),
+            "onset_density": int(hi[i] - lo[i]) / window_seconds,
+            "groove_mean": _groove_value(groove_mean[i]),
+            "groove_std": _groove_value(groove_std[i]),
         })
 
-        start += window_seconds / 2
-
     return features
 
 def detect_section_boundaries(features, threshold=1.5, min_section_seconds=15):
@@ -45,9 +54,12 @@ def detect_section_boundaries(features, threshold=1.5, min_section_seconds=15):
             f["groove_std"],
         ])
 
-    vectors = np.array(vectors)
+    # Undefined groove (None -> NaN) drops out of the distance between
+    # neighbouring windows instead of poisoning it.
+    vectors = np.array(vectors, dtype=float)
 
-    diffs = np.linalg.norm(np.diff(vectors, axis=0), axis=1)
+    steps = np.diff(vectors, axis=0)
+    diffs = np.sqrt(np.nansum(steps * steps, axis=1))
 
     mean = np.mean(diffs)
     std = np.std(diffs)
@@ -91,25 +103,25 @@ def aggregate_section_features(features, boundaries):
             "start": start,
             "end": end,
             "mean_density": sum(f["onset_density"] for f in seg) / len(seg),
-            "mean_groove_std": sum(f["groove_std"] for f in seg) / len(seg),
+            "mean_groove_std": _mean_defined(f["groove_std"] for f in seg),
         })
 
     return sections
 
 def label_sections(sections):
     densities = [s["mean_density"] for s in sections]
-    groove_stds = [s["mean_groove_std"] for s in sections]
+    g_mean = _mean_defined(s["mean_groove_std"] for s in sections)
 
     d_mean = sum(densities) / len(densities)
     d_max = max(densities)
-    g_mean = sum(groove_stds) / len(groove_stds)
 
     labeled = []
 
     for i, s in enumerate(sections):
         label = "post_chorus"
 
-        if s["mean_density"] > 0.85 * d_max and s["mean_groove_std"] > g_mean:
+        groove_std = s["mean_groove_std"]
+        if s["mean_density"] > 0.85 * d_max and groove_std is not None and groove_std > g_mean:
             label = "chorus"
 
         elif s["mean_density"] < 0.75 * d_mean:
@@ -0,0 +1,327 @@
+import copy
+import json
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from src.fingerprint_matrix import FingerprintMatrix
+from src.fingerprint_store import FingerprintStore, _fingerprint_section_table
+from src.section_similarity import SectionCorpus
+from src.similarity import find_similar_songs
+
+
+# Fingerprints of a snapshot by row. Entries are fingerprint dicts or, for a
+# columnar library, row numbers in it, materialized only when a row is read.
+class _Fingerprints:
+    def __init__(self, entries, columns=None):
+        self.entries = entries
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, row):
+        entry = self.entries[row]
+        return entry if isinstance(entry, dict) else self.columns.fingerprint(entry)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def select(self, rows):
+        return _Fingerprints([self.entries[i] for i in rows], self.columns)
+
+    def extend(self, fps):
+        return _Fingerprints(self.entries + list(fps), self.columns)
+
+
+# One immutable generation of the loaded corpus. Queries grab the current
+# snapshot and never see it change; inserts build the next one aside and
+# swap it in, so readers need no lock. Song ids come from the matrix, so
+# building a snapshot reads no fingerprint.
+class _Snapshot:
+    def __init__(self, fps, matrix, tables):
+        self.fps = fps
+        self.rows = {song_id: i for i, song_id in enumerate(matrix.song_ids)}
+        self.matrix = matrix
+        self.tables = tables
+        self.sections = SectionCorpus(matrix.song_ids, tables)
+
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Resident similarity service over a fingerprint corpus: loaded once, then
+# answers structure, section-level and chorus-only queries and takes new
+# fingerprints without a reload. Per-endpoint latencies are kept for stats.
+class SimilarityService:
+    def __init__(self, fps, tables=None, matrix=None, store_path=None, latency_window=10000):
+        if not isinstance(fps, _Fingerprints):
+            fps = _Fingerprints(list(fps))
+        if tables is None:
+            tables = [_fingerprint_section_table(fp) for fp in fps]
+        if matrix is None:
+            matrix = FingerprintMatrix.from_fingerprints(fps)
+
+        self.store_path = store_path
+        self._snapshot = _Snapshot(fps, matrix, list(tables))
+        self._write_lock = threading.Lock()
+
+        self._latencies = {}
+        self._latency_window = latency_window
+        self._stats_lock = threading.Lock()
+        self.started = time.time()
+
+    @classmethod
+    def from_store(cls, path="output/fingerprints.db"):
+        with FingerprintStore(path) as store:
+            fps = store.all()
+            tables = [table for _, table in store.iter_section_tables()]
+        return cls(fps, tables, store_path=path)
+
+    # Columnar library (see fingerprint_columns); the matrix and section
+    # tables come straight from the arrays and a fingerprint is only
+    # materialized when a query reads it. Inserts are kept in memory only.
+    @classmethod
+    def from_columns(cls, path):
+        from src.fingerprint_columns import FingerprintColumns
+        columns = FingerprintColumns(path)
+        fps = _Fingerprints(list(range(len(columns))), columns)
+        return cls(fps, tables=columns.section_tables(), matrix=columns.to_matrix())
+
+    def __len__(self):
+        return len(self._snapshot.fps)
+
+    def _query_fingerprint(self, snapshot, song_id=None, fingerprint=None):
+        if fingerprint is not None:
+            return fingerprint
+        if song_id is None:
+            raise QueryError(400, "song_id or fingerprint is required")
+
+        row = snapshot.rows.get(song_id)
+        if row is None:
+            raise QueryError(404, f"Unknown song_id: {song_id}")
+        return snapshot.fps[row]
+
+    def similar(self, song_id=None, fingerprint=None, top_k=5):
+        snapshot = self._snapshot
+        query = self._query_fingerprint(snapshot, song_id, fingerprint)
+        return find_similar_songs(query, snapshot.matrix, top_k=top_k)
+
+    # Songs ranked by weighted section-level distance, with the per-label
+    # distances behind each score.
+    def sections(self, song_id=None, fingerprint=None, top_k=5):
+        snapshot = self._snapshot
+        query = self._query_fingerprint(snapshot, song_id, fingerprint)
+
+        distances = snapshot.sections.compare(_fingerprint_section_table(query))
+        overall = snapshot.sections.weighted_overall(distances)
+
+        rows = self._ranked_rows(snapshot, query, overall, top_k)
+        return [
+            {
+                "song_id": snapshot.matrix.song_ids[i],
+                "overall": round(float(overall[i]), 4),
+                "sections": {
+                    label: round(d, 4)
+                    for label, d in SectionCorpus.song_distances(distances, i).items()
+                },
+            }
+            for i in rows
+        ]
+
+    def chorus(self, song_id=None, fingerprint=None, top_k=5):
+        snapshot = self._snapshot
+        query = self._query_fingerprint(snapshot, song_id, fingerprint)
+
+        scores = snapshot.sections.chorus_only(_fingerprint_section_table(query))
+
+        rows = self._ranked_rows(snapshot, query, scores, top_k)
+        return [
+            {"song_id": snapshot.matrix.song_ids[i], "distance": round(float(scores[i]), 4)}
+            for i in rows
+        ]
+
+    # Rows with a score, best first (ties in corpus order), query excluded.
+    @staticmethod
+    def _ranked_rows(snapshot, query, scores, top_k):
+        keep = ~np.isnan(scores)
+        row = snapshot.rows.get(query.get("song_id"))
+        if row is not None:
+            keep[row] = False
+
+        rows = np.flatnonzero(keep)
+        return rows[np.argsort(scores[rows], kind="stable")][:top_k].tolist()
+
+    def insert(self, fps):
+        """
+        Add or replace fingerprints (a replaced song moves to the end, as in
+        FingerprintStore) and persist them when backed by a store.
+        The new snapshot is built before the store is written, so a
+        fingerprint that fails to load changes neither.
+
+        Returns:
+            count (int): corpus size after the insert
+        """
+
+        fps = list(fps)
+        if not fps:
+            return len(self)
+
+        with self._write_lock:
+            old = self._snapshot
+            new_ids = {fp["song_id"] for fp in fps}
+            new_tables = [_fingerprint_section_table(fp) for fp in fps]
+
+            if any(song_id in old.rows for song_id in new_ids) or len(new_ids) < len(fps):
+                keep = [i for i, song_id in enumerate(old.matrix.song_ids) if song_id not in new_ids]
+                latest = {fp["song_id"]: i for i, fp in enumerate(fps)}
+                fps = [fps[i] for i in sorted(latest.values())]
+                new_tables = [new_tables[i] for i in sorted(latest.values())]
+
+                all_fps = old.fps.select(keep).extend(fps)
+                tables = [old.tables[i] for i in keep] + new_tables
+                matrix = _select_rows(old.matrix, keep)
+            else:
+                all_fps = old.fps.extend(fps)
+                tables = old.tables + new_tables
+                matrix = _copy_matrix(old.matrix)
+            matrix.add(fps)
+
+            snapshot = _Snapshot(all_fps, matrix, tables)
+
+            if self.store_path:
+                with FingerprintStore(self.store_path) as store:
+                    store.upsert_many(fps)
+
+            self._snapshot = snapshot
+            return len(all_fps)
+
+    def record(self, endpoint, seconds):
+        with self._stats_lock:
+            window = self._latencies.setdefault(endpoint, deque(maxlen=self._latency_window))
+            window.append(seconds)
+
+    # Query count and p50/p99 latency (ms) per endpoint over the recent window.
+    def stats(self):
+        with self._stats_lock:
+            latencies = {name: np.array(window) for name, window in self._latencies.items()}
+
+        endpoints = {}
+        for name, values in latencies.items():
+            if len(values) == 0:
+                continue
+            p50, p99 = np.percentile(values * 1000.0, [50, 99])
+            endpoints[name] = {
+                "count": len(values),
+                "p50_ms": round(float(p50), 3),
+                "p99_ms": round(float(p99), 3),
+            }
+
+        return {
+            "songs": len(self),
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "endpoints": endpoints,
+        }
+
+
+# Shallow copy whose vocabulary can grow without touching the original.
+def _copy_matrix(matrix):
+    new = copy.copy(matrix)
+    new.labels = list(matrix.labels)
+    new.label_codes = dict(matrix.label_codes)
+    new.meters = dict(matrix.meters)
+    return new
+
+
+# Copy holding only the given rows. The vocabulary keeps labels and meters
+# of dropped rows; they match no remaining row, so distances are unchanged.
+def _select_rows(matrix, rows):
+    new = _copy_matrix(matrix)
+    for name, values in matrix.rows(np.asarray(rows, dtype=np.int64)).items():
+        setattr(new, name, values)
+    return new
+
+
+QUERY_ENDPOINTS = ("similar", "sections", "chorus")
+
+
+# HTTP front end:
+#   GET  /similar|/sections|/chorus?song_id=...&top_k=5
+#   POST /similar|/sections|/chorus  {"fingerprint": {...}, "top_k": 5}
+#   POST /insert  {"fingerprints": [...]}
+#   GET  /stats
+def make_server(service, host="127.0.0.1", port=8765, verbose=False):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            if verbose:
+                super().log_message(fmt, *args)
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                return json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError as e:
+                raise QueryError(400, f"Invalid JSON: {e}")
+
+        def _handle(self, method):
+            start = time.perf_counter()
+            url = urlparse(self.path)
+            endpoint = url.path.strip("/")
+
+            try:
+                if endpoint == "stats" and method == "GET":
+                    payload = service.stats()
+                elif endpoint == "insert" and method == "POST":
+                    fps = self._read_json().get("fingerprints", [])
+                    payload = {"songs": service.insert(fps)}
+                elif endpoint in QUERY_ENDPOINTS:
+                    if method == "GET":
+                        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    else:
+                        params = self._read_json()
+
+                    payload = {"results": getattr(service, endpoint)(
+                        song_id=params.get("song_id"),
+                        fingerprint=params.get("fingerprint"),
+                        top_k=int(params.get("top_k", 5)),
+                    )}
+                else:
+                    raise QueryError(404, f"Unknown endpoint: {method} {url.path}")
+                status = 200
+            except QueryError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                status, payload = 400, {"error": f"{type(e).__name__}: {e}"}
+            except Exception as e:
+                # Always logged: an unexpected failure is a bug, not a bad query.
+                sys.stderr.write(f"Error handling {method} {self.path}\n{traceback.format_exc()}")
+                status, payload = 500, {"error": f"Internal error: {type(e).__name__}: {e}"}
+
+            self._send(status, payload)
+            if status == 200 and endpoint != "stats":
+                service.record(endpoint, time.perf_counter() - start)
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+    return ThreadingHTTPServer((host, port), Handler)
@@ -1,4 +1,8 @@
+import heapq
 import math
+import numpy as np
+from src.fingerprint_matrix import FingerprintMatrix
+from src.trace import traced
 
 
 def section_topology_distance(fp_a, fp_b):
@@ -88,18 +92,117 @@ def structure_distance(fp_a, fp_b):
     )
 
 
+# all_fps: list of fingerprints or a prebuilt FingerprintMatrix.
+@traced("find_similar_songs")
 def find_similar_songs(query_fp, all_fps, top_k=5):
-    results = []
+    if not isinstance(all_fps, FingerprintMatrix):
+        all_fps = FingerprintMatrix.from_fingerprints(all_fps)
 
-    for fp in all_fps:
+    if len(all_fps) == 0:
+        return []
+
+    distances = all_fps.distances([query_fp])[0]
+    candidates = np.flatnonzero(all_fps.song_ids != query_fp.get("song_id"))
+
+    return top_k_results(all_fps.song_ids, distances, candidates, top_k)
+
+
+# Cheap part of section_topology_distance: length and chorus terms only.
+# order_penalty >= 0, so this never exceeds the full topology distance.
+def _topology_lower_bound(fp_a, fp_b):
+    seq_a = fp_a.get("structure", [])
+    seq_b = fp_b.get("structure", [])
+
+    if not seq_a or not seq_b:
+        return 1.0
+
+    len_diff = abs(len(seq_a) - len(seq_b)) / max(len(seq_a), len(seq_b))
+    chorus_penalty = abs(
+        fp_a.get("chorus_ratio", 0.0) - fp_b.get("chorus_ratio", 0.0)
+    )
+
+    return min(1.0, 0.3 * len_diff + 0.2 * chorus_penalty)
+
+
+@traced("find_similar_songs_pruned")
+def find_similar_songs_pruned(query_fp, all_fps, top_k=5):
+    """
+    Top-k search over fingerprint dicts that evaluates structure_distance in
+    stages (tempo/meter and length/chorus first, then section order, then
+    the density and groove profiles) and drops a candidate as soon as a
+    lower bound on its total shows it cannot enter the current top-k.
+    Results equal find_similar_songs.
+
+    Returns:
+        results (list): as find_similar_songs
+        stats (dict): candidates, pruned_cheap, pruned_topology, evaluated
+    """
+
+    stats = {"candidates": 0, "pruned_cheap": 0, "pruned_topology": 0, "evaluated": 0}
+
+    # Max-heap on (rounded distance, corpus position) via negation; the root
+    # is the current k-th best. Candidates arrive in corpus order, so one
+    # that only ties the k-th best can never displace it.
+    heap = []
+
+    def cannot_enter(bound):
+        # Stay just below the exact value so float rounding never over-prunes.
+        return len(heap) == top_k and round(bound - 1e-9, 4) >= -heap[0][0]
+
+    for pos, fp in enumerate(all_fps):
         if fp.get("song_id") == query_fp.get("song_id"):
             continue
 
-        d = structure_distance(query_fp, fp)
-        results.append({
-            "song_id": fp.get("song_id"),
-            "distance": round(float(d), 4)
-        })
+        stats["candidates"] += 1
+        if top_k <= 0:
+            continue
+
+        tempo_meter = 0.15 * tempo_meter_distance(query_fp, fp)
+        if cannot_enter(0.45 * _topology_lower_bound(query_fp, fp) + tempo_meter):
+            stats["pruned_cheap"] += 1
+            continue
+
+        topology = 0.45 * section_topology_distance(query_fp, fp)
+        if cannot_enter(topology + tempo_meter):
+            stats["pruned_topology"] += 1
+            continue
 
-    results.sort(key=lambda x: x["distance"])
-    return results[:top_k]
+        stats["evaluated"] += 1
+        d = (
+            topology
+            + 0.30 * energy_arc_distance(query_fp, fp)
+            + tempo_meter
+            + 0.10 * groove_distance(query_fp, fp)
+        )
+        entry = (-round(float(d), 4), -pos, fp.get("song_id"))
+
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    results = [
+        {"song_id": song_id, "distance": -neg_d}
+        for neg_d, _, song_id in sorted(heap, reverse=True)
+    ]
+    return results, stats
+
+
+# Top-k rows by rounded distance, ties kept in corpus order (like a stable sort).
+def top_k_results(song_ids, distances, candidates, top_k):
+    rounded = np.round(distances[candidates], 4)
+
+    if top_k < len(candidates):
+        kth = np.partition(rounded, top_k - 1)[top_k - 1]
+        keep = rounded <= kth
+        candidates, rounded = candidates[keep], rounded[keep]
+
+    order = np.lexsort((candidates, rounded))[:top_k]
+
+    return [
+        {
+            "song_id": song_ids[i],
+            "distance": round(float(distances[i]), 4)
+        }
+        for i in candidates[order]
+    ]
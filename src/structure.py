@@ -1,5 +1,7 @@
 def section_distance(a, b):
     d_density = abs(a["mean_density"] - b["mean_density"]) / max(a["mean_density"], b["mean_density"])
+    if a["mean_groove_std"] is None or b["mean_groove_std"] is None:
+        return d_density
     d_groove = abs(a["mean_groove_std"] - b["mean_groove_std"]) / max(a["mean_groove_std"], b["mean_groove_std"])
     return d_density + d_groove
 
@@ -0,0 +1,158 @@
+import numpy as np
+from src.fingerprint_matrix import FingerprintMatrix, tempo_meter_distances
+from src.similarity import top_k_results
+
+
+# Distinct label n-grams (as tuples of label codes) of one encoded sequence.
+def _ngrams(codes, max_n):
+    grams = set()
+    for n in range(1, max_n + 1):
+        for i in range(len(codes) - n + 1):
+            grams.add(tuple(codes[i:i + n]))
+    return grams
+
+
+# Inverted index from section-label n-grams to fingerprint rows.
+# A query first scores the rows that share structural motifs with it, then
+# uses a lower bound on structure_distance (the exact tempo/meter term plus
+# a topology bound from sequence length, chorus ratio and how many labels
+# can possibly match position by position) to skip rows that provably
+# cannot reach the top-k. Results equal find_similar_songs.
+class StructureIndex:
+    def __init__(self, matrix, max_n=3):
+        self.matrix = matrix
+        self.max_n = max_n
+        self.postings = {}
+        self.label_counts = np.zeros((0, 0), dtype=np.int32)
+        self._indexed = 0
+        self.index_new_rows()
+
+    @classmethod
+    def from_fingerprints(cls, fps, max_n=3):
+        return cls(FingerprintMatrix.from_fingerprints(fps), max_n)
+
+    # Index rows appended to the matrix since the last call.
+    def index_new_rows(self):
+        sequences = self.matrix.sequences
+        lengths = self.matrix.lengths
+
+        for row in range(self._indexed, len(self.matrix)):
+            codes = sequences[row, :lengths[row]].tolist()
+            for gram in _ngrams(codes, self.max_n):
+                self.postings.setdefault(gram, []).append(row)
+
+        self.label_counts = self._count_labels(sequences[self._indexed:], self.label_counts)
+        self._indexed = len(self.matrix)
+
+    # Per-row label histograms, appended to the existing ones.
+    def _count_labels(self, sequences, counts):
+        n_labels = len(self.matrix.labels)
+        new = np.zeros((len(sequences), n_labels), dtype=np.int32)
+        rows, cols = np.nonzero(sequences >= 0)
+        np.add.at(new, (rows, sequences[rows, cols]), 1)
+
+        old = np.zeros((len(counts), n_labels), dtype=np.int32)
+        old[:, :counts.shape[1]] = counts
+        return np.concatenate([old, new])
+
+    # Shared-motif score per row: sum of the lengths of shared n-grams.
+    def motif_scores(self, codes):
+        rows, weights = [], []
+        for gram in _ngrams(codes, self.max_n):
+            posting = self.postings.get(gram)
+            if posting:
+                rows.append(np.asarray(posting))
+                weights.append(np.full(len(posting), len(gram)))
+
+        if not rows:
+            return np.zeros(len(self.matrix))
+
+        return np.bincount(
+            np.concatenate(rows), weights=np.concatenate(weights), minlength=len(self.matrix)
+        )
+
+    # Lower bound on structure_distance from the cheap terms.
+    # At most sum(min(count_q, count_row)) positions can hold the same label.
+    def _lower_bounds(self, query, rows, query_codes):
+        lq = query["lengths"][0]
+        lb = self.matrix.lengths[rows]
+        min_len = np.minimum(lb, lq)
+
+        counts_q = np.bincount(
+            [c for c in query_codes if c >= 0], minlength=self.label_counts.shape[1]
+        )
+        overlap = np.minimum(self.label_counts[rows], counts_q[None, :]).sum(axis=1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            len_diff = np.abs(lb - lq) / np.maximum(lb, lq)
+            order = 1.0 - np.minimum(overlap, min_len) / min_len
+
+        chorus = np.abs(self.matrix.chorus_ratio[rows] - query["chorus_ratio"][0])
+
+        topology = np.minimum(1.0, 0.5 * order + 0.3 * len_diff + 0.2 * chorus)
+        topology = np.where((lb == 0) | (lq == 0), 1.0, topology)
+
+        tempo_meter = tempo_meter_distances(query, {
+            "tempo": self.matrix.tempo[rows], "meter": self.matrix.meter[rows]
+        })[0]
+
+        # Stay just below the exact value so float rounding never over-prunes.
+        return 0.45 * topology + 0.15 * tempo_meter - 1e-9
+
+    def search(self, query_fp, top_k=5, seed_size=None):
+        """
+        Top-k most similar fingerprints using the index for pre-filtering.
+
+        Returns:
+            results (list): as find_similar_songs
+            stats (dict): candidate, evaluated and pruned row counts
+        """
+
+        matrix = self.matrix
+        query = matrix.encode([query_fp])
+        codes = query["sequences"][0, :query["lengths"][0]].tolist()
+
+        allowed = matrix.song_ids != query_fp.get("song_id")
+        scores = self.motif_scores(codes)
+
+        candidates = np.flatnonzero((scores > 0) & allowed)
+        stats = {"rows": int(np.count_nonzero(allowed)), "candidates": len(candidates)}
+
+        rows = np.flatnonzero(allowed)
+        bounds = np.full(len(matrix), np.inf)
+        bounds[rows] = np.round(self._lower_bounds(query, rows, codes), 4)
+
+        # Seed with the motif-sharing rows of lowest bound to get a top-k
+        # threshold; fall back to any rows when too few share a motif.
+        seed_size = seed_size or max(64, 8 * top_k)
+        pool = candidates if len(candidates) >= top_k else rows
+        seed = pool[np.argsort(bounds[pool], kind="stable")[:seed_size]]
+
+        distances = np.full(len(matrix), np.inf)
+        if len(seed):
+            distances[seed] = matrix.distances([query_fp], index=seed)[0]
+
+        # Best-first over the remaining rows by bound, in growing batches,
+        # until the next bound exceeds the current k-th best distance.
+        evaluated = [seed]
+        rest = rows[np.isinf(distances[rows])]
+        rest = rest[np.argsort(bounds[rest], kind="stable")]
+        batch = seed_size
+
+        while len(rest):
+            done = np.concatenate(evaluated)
+            if len(done) >= top_k:
+                kth = np.partition(np.round(distances[done], 4), top_k - 1)[top_k - 1]
+                rest = rest[:np.searchsorted(bounds[rest], kth, side="right")]
+
+            step, rest = rest[:batch], rest[batch:]
+            if len(step):
+                distances[step] = matrix.distances([query_fp], index=step)[0]
+                evaluated.append(step)
+            batch *= 2
+
+        evaluated = np.concatenate(evaluated)
+        stats["evaluated"] = len(evaluated)
+        stats["pruned"] = stats["rows"] - len(evaluated)
+
+        return top_k_results(matrix.song_ids, distances, evaluated, top_k), stats
@@ -1,21 +1,20 @@
 import numpy as np
+from src.windows import window_bounds, iter_windows
 
 
 # Analyze tempo drift and push–pull over time using sliding windows
-def compute_tempo_drift(onset_times, perceived_bpm, window_seconds=12):
+# bounds: optional precomputed window_bounds(onset_times, window_seconds)
+def compute_tempo_drift(onset_times, perceived_bpm, window_seconds=12, bounds=None):
     beat_period = 60.0 / perceived_bpm
-    duration = onset_times[-1]
+
+    if bounds is None:
+        bounds = window_bounds(onset_times, window_seconds)
 
     windows = []
-    start = 0.0
 
     local_bpms = []
 
-    while start + window_seconds <= duration:
-        end = start + window_seconds
-        mask = (onset_times >= start) & (onset_times < end)
-        window_onsets = onset_times[mask]
-
+    for start, end, window_onsets in iter_windows(onset_times, bounds):
         if len(window_onsets) >= 3:
             beat_indices = np.round(window_onsets / beat_period)
             beat_times = beat_indices * beat_period
@@ -37,8 +36,6 @@ def compute_tempo_drift(onset_times, perceived_bpm, window_seconds=12):
                         "bpm": round(local_bpm, 2)
                     })
 
-        start += window_seconds / 2
-
     if not local_bpms:
         return None
 
@@ -0,0 +1,186 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+# Active tracer, or None. Every hook checks this first, so tracing costs
+# one global lookup per call while disabled.
+_tracer = None
+
+
+# Collects one event per finished span: wall and thread CPU time, peak
+# traced allocation above the level at entry (tracemalloc is process-wide,
+# so concurrent spans see each other's allocations) and input sizes.
+class Tracer:
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.events = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, **args):
+        stack = self._stack()
+        frame = {"peak": 0}
+
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["base"] = current
+
+        stack.append(frame)
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+
+        try:
+            yield
+        finally:
+            cpu = time.thread_time() - cpu
+            end = time.perf_counter()
+            stack.pop()
+
+            peak_bytes = None
+            if self.memory:
+                peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+                peak_bytes = peak - frame["base"]
+                if stack:
+                    stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+
+            self.events.append({
+                "name": name,
+                "start": wall - self.origin,
+                "wall": end - wall,
+                "cpu": cpu,
+                "peak_bytes": peak_bytes,
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    def close(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # Chrome / Perfetto trace (complete "X" events, microseconds).
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for e in self.events:
+            args = {"cpu_ms": round(e["cpu"] * 1000.0, 3), **e["args"]}
+            if e["peak_bytes"] is not None:
+                args["peak_bytes"] = e["peak_bytes"]
+            events.append({
+                "name": e["name"],
+                "ph": "X",
+                "ts": round(e["start"] * 1e6, 1),
+                "dur": round(e["wall"] * 1e6, 1),
+                "pid": pid,
+                "tid": e["tid"],
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, path="output/trace.json"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    # Per-name totals, in order of first appearance.
+    def summary(self):
+        stats = {}
+        for e in self.events:
+            s = stats.setdefault(e["name"], {"calls": 0, "wall": 0.0, "cpu": 0.0, "peak_bytes": None})
+            s["calls"] += 1
+            s["wall"] += e["wall"]
+            s["cpu"] += e["cpu"]
+            if e["peak_bytes"] is not None:
+                s["peak_bytes"] = max(s["peak_bytes"] or 0, e["peak_bytes"])
+        return stats
+
+    def summary_table(self):
+        width = max([len(name) for name in self.summary()] + [5])
+        lines = [f"{'stage':<{width}}  calls   wall ms    cpu ms   peak MB"]
+
+        for name, s in self.summary().items():
+            peak = "-" if s["peak_bytes"] is None else f"{s['peak_bytes'] / 2**20:.2f}"
+            lines.append(
+                f"{name:<{width}}  {s['calls']:>5}  {s['wall'] * 1000:>8.2f}  "
+                f"{s['cpu'] * 1000:>8.2f}  {peak:>8}"
+            )
+
+        return "\n".join(lines)
+
+
+def enable(memory=True):
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(memory=memory)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+_NULL_SPAN = nullcontext()
+
+
+def span(name, **args):
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, **args)
+
+
+# Short description of an argument's size for span args.
+def _describe(value):
+    shape = getattr(value, "shape", None)
+    if shape is not None:
+        return {"shape": list(shape), "bytes": int(getattr(value, "nbytes", 0))}
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return value if not isinstance(value, bytes) else len(value)
+    if hasattr(value, "__len__"):
+        return {"len": len(value)}
+    return type(value).__name__
+
+
+# Decorator: run the function inside a span named name, recording the
+# sizes of its positional arguments.
+def traced(name):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            inputs = [_describe(a) for a in args]
+            with _tracer.span(name, inputs=inputs):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,138 @@
+import numpy as np
+from src.fingerprint import fingerprint_to_vector
+
+
+def _sq_distances(x, centroids):
+    return (
+        np.sum(x * x, axis=1)[:, None]
+        - 2.0 * (x @ centroids.T)
+        + np.sum(centroids * centroids, axis=1)[None, :]
+    )
+
+
+# Nearest centroid per row, in chunks to bound the distance matrix.
+def _assign(x, centroids, chunk_size=65536):
+    labels = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), chunk_size):
+        block = x[start:start + chunk_size]
+        labels[start:start + len(block)] = np.argmin(_sq_distances(block, centroids), axis=1)
+    return labels
+
+
+def _kmeans(x, n_clusters, n_iter, rng):
+    centroids = x[rng.choice(len(x), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        labels = _assign(x, centroids)
+        counts = np.bincount(labels, minlength=n_clusters)
+        sums = np.stack([
+            np.bincount(labels, weights=x[:, d], minlength=n_clusters)
+            for d in range(x.shape[1])
+        ], axis=1)
+
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+
+        # Re-seed empty clusters with random points.
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+
+    return centroids
+
+
+# Inverted-file (IVF) nearest-neighbour index over fingerprint vectors.
+# Vectors are partitioned by k-means into n_lists cells; a query scans only the
+# n_probe cells whose centroids are closest, so n_probe trades recall for speed
+# (n_probe == n_lists is an exact search).
+class VectorIndex:
+    def __init__(self, centroids, offsets, vectors, ids):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.vectors = vectors
+        self.ids = ids
+
+    @classmethod
+    def build(cls, vectors, ids, n_lists=None, n_iter=20, sample_size=100_000, seed=0):
+        vectors = np.asarray(vectors, dtype=np.float64)
+        ids = np.asarray(ids, dtype=str)
+
+        if len(vectors) == 0:
+            raise ValueError("Cannot build an index over no vectors")
+
+        if n_lists is None:
+            n_lists = int(np.sqrt(len(vectors)))
+        n_lists = max(1, min(n_lists, len(vectors)))
+
+        rng = np.random.default_rng(seed)
+        sample = vectors
+        if len(vectors) > sample_size:
+            sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+        centroids = _kmeans(sample, n_lists, n_iter, rng)
+        labels = _assign(vectors, centroids)
+
+        order = np.argsort(labels, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=n_lists))))
+
+        return cls(centroids, offsets, vectors[order], ids[order])
+
+    @classmethod
+    def from_fingerprints(cls, fps, **kwargs):
+        vectors = [fingerprint_to_vector(fp) for fp in fps]
+        ids = [fp["song_id"] for fp in fps]
+        return cls.build(vectors, ids, **kwargs)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    # Top-k nearest song ids by Euclidean distance (as vector_distance).
+    # n_probe is clamped to [1, n_lists].
+    def query(self, vector, top_k=5, n_probe=8, exclude=None):
+        if top_k <= 0:
+            return []
+
+        vector = np.asarray(vector, dtype=np.float64)[None, :]
+        n_probe = max(1, min(n_probe, self.n_lists))
+
+        cell_dist = _sq_distances(vector, self.centroids)[0]
+        cells = np.argpartition(cell_dist, n_probe - 1)[:n_probe]
+
+        rows = np.concatenate([
+            np.arange(self.offsets[c], self.offsets[c + 1]) for c in cells
+        ])
+        if exclude is not None:
+            rows = rows[self.ids[rows] != exclude]
+        if len(rows) == 0:
+            return []
+
+        diff = self.vectors[rows] - vector
+        dist = np.sqrt(np.sum(diff * diff, axis=1))
+
+        k = min(top_k, len(rows))
+        best = np.argpartition(dist, k - 1)[:k]
+        best = best[np.argsort(dist[best], kind="stable")]
+
+        return [
+            {"song_id": str(self.ids[rows[i]]), "distance": round(float(dist[i]), 4)}
+            for i in best
+        ]
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                offsets=self.offsets,
+                vectors=self.vectors,
+                ids=self.ids,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["centroids"], data["offsets"], data["vectors"], data["ids"])
@@ -0,0 +1,33 @@
+import numpy as np
+
+
+# Fixed-length sliding windows over sorted onset times (50% hop by default).
+# Returns window starts, ends and the [lo, hi) slice of onset_times that
+# falls inside each window, found with searchsorted instead of a mask.
+def window_bounds(onset_times, window_seconds=12, hop_seconds=None):
+    if hop_seconds is None:
+        hop_seconds = window_seconds / 2
+
+    duration = onset_times[-1]
+
+    starts = []
+    start = 0.0
+    while start + window_seconds <= duration:
+        starts.append(start)
+        start += hop_seconds
+
+    starts = np.array(starts, dtype=float)
+    ends = starts + window_seconds
+
+    lo = np.searchsorted(onset_times, starts, side="left")
+    hi = np.searchsorted(onset_times, ends, side="left")
+
+    return starts, ends, lo, hi
+
+
+# Yield (start, end, window_onsets) with window_onsets a view into onset_times.
+def iter_windows(onset_times, bounds):
+    starts, ends, lo, hi = bounds
+
+    for start, end, a, b in zip(starts, ends, lo, hi):
+        yield float(start), float(end), onset_times[a:b]
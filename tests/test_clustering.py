@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from src.clustering import cluster_vectors, cluster_fingerprint_corpus, _linkage_labels
+from src.fingerprint import cluster_fingerprints, fingerprint_to_vector, vector_distance
+from tests.test_fingerprint_matrix import corpus
+
+
+# cluster_fingerprints before it moved onto cluster_vectors.
+def reference_greedy(vectors, threshold=0.25):
+    clusters = []
+    for v in vectors:
+        placed = False
+        for c in clusters:
+            if vector_distance(v, c[0]) < threshold:
+                c.append(v)
+                placed = True
+                break
+        if not placed:
+            clusters.append([v])
+    return clusters
+
+
+# Connected components of the "closer than threshold" graph by flood fill
+# over the full distance matrix, numbered in order of first member.
+def reference_components(x, threshold):
+    diff = x[:, None, :] - x[None, :, :]
+    adjacent = np.einsum("ijk,ijk->ij", diff, diff) < threshold * threshold
+
+    labels = np.full(len(x), -1, dtype=np.int64)
+    n_components = 0
+    for seed in range(len(x)):
+        if labels[seed] >= 0:
+            continue
+        labels[seed] = n_components
+        stack = [seed]
+        while stack:
+            i = stack.pop()
+            for j in np.flatnonzero(adjacent[i] & (labels < 0)):
+                labels[j] = n_components
+                stack.append(j)
+        n_components += 1
+    return labels
+
+
+# Vectors in chains and blobs, so components span many grid cells.
+def blobs(n, dims, seed):
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform(0, 2, (max(1, n // 25), dims))
+    return centres[rng.integers(len(centres), size=n)] + rng.normal(0, 0.12, (n, dims))
+
+
+def lattice(dims):
+    # Neighbours exactly one threshold apart: "closer than" must not link them.
+    return np.array(np.meshgrid(*[np.arange(4) * 0.25] * dims)).reshape(dims, -1).T
+
+
+CASES = [
+    ("blobs_2d", lambda: blobs(300, 2, 0)),
+    ("blobs_3d", lambda: blobs(300, 3, 1)),
+    ("blobs_7d", lambda: blobs(300, 7, 2)),
+    ("lattice_3d", lambda: lattice(3)),
+    ("duplicates", lambda: np.repeat(blobs(50, 4, 3), 3, axis=0)),
+    ("fingerprints", lambda: np.array([fingerprint_to_vector(fp) for fp in corpus(4, n=300)])),
+]
+
+
+@pytest.mark.parametrize("name, make", CASES, ids=[name for name, _ in CASES])
+@pytest.mark.parametrize("max_pairs", [4_000_000, 7])
+def test_linkage_matches_connected_components(name, make, max_pairs):
+    x = make()
+
+    labels = cluster_vectors(x, 0.25, method="linkage", max_pairs=max_pairs)
+    np.testing.assert_array_equal(labels, reference_components(x, 0.25))
+
+
+def test_linkage_is_order_independent():
+    x = blobs(300, 3, 5)
+    perm = np.random.default_rng(0).permutation(len(x))
+
+    labels = cluster_vectors(x, 0.25)
+    permuted = cluster_vectors(x[perm], 0.25)
+
+    # Same partition: each cluster of one maps to exactly one of the other.
+    pairs = set(zip(labels[perm], permuted))
+    assert len(pairs) == len(set(labels)) == len(set(permuted))
+
+
+def test_outlier_wraps_grid_keys():
+    x = blobs(200, 7, 6)
+    x = np.vstack([x, np.full((1, 7), 1e5), x[:1] + 1e5 + 0.1])
+
+    # The mixed-radix grid keys of this corpus need more than 63 bits, so
+    # they wrap around int64; neighbour lookups must still find every pair.
+    span = np.floor(x.max(axis=0) / 0.25) - np.floor(x.min(axis=0) / 0.25)
+    assert np.prod([int(s) + 3 for s in span[:-1]], dtype=object) > 2 ** 63
+
+    with np.errstate(over="ignore"):
+        roots = _linkage_labels(x, 0.25, 4_000_000)
+        labels = cluster_vectors(x, 0.25)
+
+    assert roots[-1] != roots[-2]
+    np.testing.assert_array_equal(labels, reference_components(x, 0.25))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_greedy_matches_cluster_fingerprints(seed):
+    vectors = [list(v) for v in blobs(300, 7, seed)]
+
+    assert cluster_fingerprints(vectors) == reference_greedy(vectors)
+    assert cluster_fingerprints(vectors, 0.6) == reference_greedy(vectors, 0.6)
+
+
+def test_unknown_method_and_empty_input():
+    assert len(cluster_vectors([], 0.25)) == 0
+    with pytest.raises(ValueError):
+        cluster_vectors([[0.0]], 0.25, method="kmeans")
+
+
+def test_corpus_summaries_cover_every_song():
+    fps = corpus(8, n=120)
+    labels, summaries = cluster_fingerprint_corpus(fps)
+
+    assert sum(s["size"] for s in summaries) == len(fps)
+    assert [s["cluster"] for s in summaries] == list(range(len(summaries)))
+    for s in summaries:
+        assert all(labels[int(song_id[4:])] == s["cluster"] for song_id in s["song_ids"])
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pytest
+
+import src.distance_matrix as distance_matrix
+from src.distance_matrix import compute_distance_matrix
+from src.fingerprint_matrix import FingerprintMatrix, structure_distances
+from tests.test_fingerprint_matrix import corpus
+
+N = 75
+BLOCK_SIZE = 16
+
+
+@pytest.fixture
+def matrix():
+    return FingerprintMatrix.from_fingerprints(corpus(0, n=N))
+
+
+def full_distances(matrix):
+    dist = structure_distances(matrix.rows(), matrix.rows()).astype(np.float32)
+    # Each block is computed once, for i <= j, and mirrored.
+    return np.triu(dist) + np.triu(dist, 1).T
+
+
+def condensed(dist):
+    return dist[np.triu_indices(len(dist), 1)]
+
+
+# Run compute_distance_matrix, failing once `limit` blocks have been computed.
+def interrupted_run(monkeypatch, limit, *args, **kwargs):
+    compute_block = distance_matrix._compute_block
+    calls = []
+
+    def failing(block):
+        if len(calls) == limit:
+            raise KeyboardInterrupt
+        calls.append(block)
+        return compute_block(block)
+
+    monkeypatch.setattr(distance_matrix, "_compute_block", failing)
+    with pytest.raises(KeyboardInterrupt):
+        compute_distance_matrix(*args, **kwargs)
+    monkeypatch.setattr(distance_matrix, "_compute_block", compute_block)
+
+
+@pytest.mark.parametrize("condensed_out", [False, True])
+def test_single_run_matches_structure_distances(matrix, tmp_path, condensed_out):
+    out = compute_distance_matrix(matrix, str(tmp_path / "d.npy"), block_size=BLOCK_SIZE, condensed=condensed_out)
+
+    expected = full_distances(matrix)
+    np.testing.assert_array_equal(out, condensed(expected) if condensed_out else expected)
+
+
+@pytest.mark.parametrize("condensed_out", [False, True])
+@pytest.mark.parametrize("limit", [0, 1, 7, 14])
+def test_interrupted_run_resumes_to_identical_output(matrix, tmp_path, monkeypatch, condensed_out, limit):
+    path = str(tmp_path / "d.npy")
+    reference = np.array(compute_distance_matrix(
+        matrix, str(tmp_path / "ref.npy"), block_size=BLOCK_SIZE, condensed=condensed_out
+    ))
+
+    interrupted_run(monkeypatch, limit, matrix, path, block_size=BLOCK_SIZE, condensed=condensed_out, flush_every=3)
+
+    progress = np.load(f"{path}.progress.npy")
+    assert progress.sum() == limit
+
+    out = compute_distance_matrix(matrix, path, block_size=BLOCK_SIZE, condensed=condensed_out)
+    np.testing.assert_array_equal(out, reference)
+    assert np.load(f"{path}.progress.npy")[np.triu_indices(len(progress))].all()
+
+    # A further call finds nothing left to do and leaves the output alone.
+    np.testing.assert_array_equal(compute_distance_matrix(matrix, path, block_size=BLOCK_SIZE, condensed=condensed_out), reference)
+
+
+def test_parallel_run_matches_serial(matrix, tmp_path):
+    serial = compute_distance_matrix(matrix, str(tmp_path / "serial.npy"), block_size=BLOCK_SIZE)
+    parallel = compute_distance_matrix(matrix, str(tmp_path / "parallel.npy"), block_size=BLOCK_SIZE, workers=2)
+
+    np.testing.assert_array_equal(parallel, serial)
+
+
+def test_resume_with_other_block_size_is_refused(matrix, tmp_path, monkeypatch):
+    path = str(tmp_path / "d.npy")
+    interrupted_run(monkeypatch, 3, matrix, path, block_size=BLOCK_SIZE)
+
+    with pytest.raises(ValueError, match="block_size"):
+        compute_distance_matrix(matrix, path, block_size=2 * BLOCK_SIZE)
+
+
+def test_resume_for_other_corpus_is_refused(matrix, tmp_path, monkeypatch):
+    path = str(tmp_path / "d.npy")
+    interrupted_run(monkeypatch, 3, matrix, path, block_size=BLOCK_SIZE)
+
+    other = FingerprintMatrix.from_fingerprints(corpus(0, n=N)[::-1])
+    with pytest.raises(ValueError, match="different corpus"):
+        compute_distance_matrix(other, path, block_size=BLOCK_SIZE)
+
+
+@pytest.mark.parametrize("sidecar", ["ids", "block_size"])
+def test_resume_without_sidecar_is_refused(matrix, tmp_path, monkeypatch, sidecar):
+    path = str(tmp_path / "d.npy")
+    interrupted_run(monkeypatch, 3, matrix, path, block_size=BLOCK_SIZE)
+    os.remove(f"{path}.{sidecar}.npy")
+
+    with pytest.raises(ValueError, match="cannot resume"):
+        compute_distance_matrix(matrix, path, block_size=BLOCK_SIZE)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from src.energy import compute_rms_energy, compute_rms_energy_from_blocks, compute_rms_energy_from_signal
+from src.framing import frame_signal
+
+
+# Baseline framing and RMS: one copied frame per hop.
+def reference_rms(signal, frame_size, hop_length):
+    num_frames = 1 + (len(signal) - frame_size) // hop_length
+    frames = np.zeros((num_frames, frame_size))
+    for i in range(num_frames):
+        frames[i] = signal[i * hop_length:i * hop_length + frame_size]
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+# Split signal into consecutive blocks of the given sizes, cycled.
+def uneven_blocks(signal, sizes):
+    blocks, start, i = [], 0, 0
+    while start < len(signal):
+        size = sizes[i % len(sizes)]
+        blocks.append(signal[start:start + size])
+        start += size
+        i += 1
+    return blocks
+
+
+SIGNAL = np.random.default_rng(0).standard_normal(20000)
+
+# (frame_size, hop_length): overlapping, equal and hop longer than frame.
+FRAMINGS = [(2048, 512), (256, 256), (100, 37), (64, 200)]
+
+# Block sizes smaller than the hop, smaller than the frame, and larger.
+BLOCK_SIZES = [[1], [7, 3, 1], [30, 500], [1000, 1, 4096, 13], [20000]]
+
+
+@pytest.mark.parametrize("frame_size,hop_length", FRAMINGS)
+def test_frame_signal_matches_baseline(frame_size, hop_length):
+    frames = frame_signal(SIGNAL, frame_size, hop_length)
+    expected = reference_rms(SIGNAL, frame_size, hop_length)
+
+    np.testing.assert_allclose(compute_rms_energy(frames), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("frame_size,hop_length", FRAMINGS)
+@pytest.mark.parametrize("sizes", BLOCK_SIZES)
+def test_streaming_rms_matches_one_shot_framing(frame_size, hop_length, sizes):
+    signal = SIGNAL[:5000] if sizes == [1] else SIGNAL
+    expected = reference_rms(signal, frame_size, hop_length)
+
+    energy = compute_rms_energy_from_blocks(uneven_blocks(signal, sizes), frame_size, hop_length)
+
+    assert len(energy) == len(expected)
+    np.testing.assert_allclose(energy, expected, rtol=1e-12)
+
+
+def test_signal_chunks_match_one_shot_framing():
+    expected = reference_rms(SIGNAL, 2048, 512)
+    energy = compute_rms_energy_from_signal(SIGNAL, 2048, 512, chunk_size=3001)
+
+    np.testing.assert_allclose(energy, expected, rtol=1e-12)
+
+
+def test_shorter_than_one_frame_raises():
+    with pytest.raises(ValueError):
+        compute_rms_energy_from_blocks([SIGNAL[:100], SIGNAL[100:200]], 2048, 512)
@@ -0,0 +1,136 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.fingerprint_columns import FingerprintColumns, json_to_columns, columns_to_json
+from src.fingerprint_matrix import FingerprintMatrix
+from src.fingerprint_store import _fingerprint_section_table
+
+LABELS = ["intro", "verse", "chorus", "post_chorus", "breakdown"]
+
+
+# Fingerprint laid out as build_structure_fingerprint writes it, with
+# n_sections labeled sections (0 gives the empty case).
+def regular_fingerprint(rng, song_id, n_sections):
+    sections = []
+    start = 0.0
+    for _ in range(n_sections):
+        end = start + float(rng.uniform(8, 40))
+        sections.append({
+            "start": start,
+            "end": end,
+            "mean_density": float(rng.uniform(1, 14)),
+            "mean_groove_std": float(rng.uniform(2, 50)),
+            "label": LABELS[int(rng.integers(len(LABELS)))],
+        })
+        start = end
+
+    labels = [s["label"] for s in sections]
+    return {
+        "song_id": song_id,
+        "tempo": float(rng.uniform(60, 190)),
+        "meter": ["4/4", "3/4"][int(rng.integers(2))],
+        "structure": labels,
+        "sections": sections,
+        "duration": max(start, 30.0),
+        "chorus_count": labels.count("chorus"),
+        "chorus_ratio": float(rng.uniform(0, 0.5)),
+        "avg_section_density": {label: float(rng.uniform(1, 14)) for label in set(labels)},
+        "groove_profile": {label: float(rng.uniform(2, 50)) for label in sorted(set(labels))[:2]},
+    }
+
+
+# Rows the columns cannot hold exactly; they are kept as JSON text.
+def irregular_fingerprints(rng):
+    fps = []
+
+    fp = regular_fingerprint(rng, "groove_none", 3)
+    fp["sections"][1]["mean_groove_std"] = None
+    fps.append(fp)
+
+    fp = regular_fingerprint(rng, "int_tempo", 2)
+    fp["tempo"] = 120
+    fps.append(fp)
+
+    fp = regular_fingerprint(rng, "extra_key", 1)
+    fp["source"] = "legacy"
+    fps.append(fp)
+
+    fp = regular_fingerprint(rng, "no_sections", 0)
+    del fp["sections"], fp["duration"]
+    fps.append(fp)
+
+    fps.append({"song_id": "bare"})
+    return fps
+
+
+def library(seed=0):
+    rng = np.random.default_rng(seed)
+    # Ragged sections: empty rows, one-section rows and long rows mixed.
+    fps = [regular_fingerprint(rng, f"song{i}", int(rng.choice([0, 0, 1, 2, 5, 9]))) for i in range(60)]
+    fps[10:10] = irregular_fingerprints(rng)
+
+    # Regular, but has no section table (as for a missing duration).
+    fps[30]["duration"] = 0.0
+    return fps
+
+
+@pytest.fixture
+def paths(tmp_path):
+    fps = library()
+    json_path = str(tmp_path / "fingerprints.json")
+    with open(json_path, "w") as f:
+        json.dump(fps, f)
+    return fps, json_path, str(tmp_path / "fingerprints.cols")
+
+
+def test_json_round_trip(paths, tmp_path):
+    fps, json_path, cols_path = paths
+
+    assert json_to_columns(json_path, cols_path) == len(fps)
+    out_path = str(tmp_path / "out.json")
+    assert columns_to_json(cols_path, out_path) == len(fps)
+
+    with open(out_path) as f:
+        assert json.load(f) == fps
+
+    columns = FingerprintColumns(cols_path)
+    assert (np.asarray(columns.extras) >= 0).sum() == 5
+    assert np.diff(columns.section_offsets).min() == 0
+
+
+def test_find_and_single_rows(paths):
+    fps, json_path, cols_path = paths
+    json_to_columns(json_path, cols_path)
+    columns = FingerprintColumns(cols_path)
+
+    for row in (0, 11, len(fps) - 1):
+        assert columns.find(fps[row]["song_id"]) == row
+        assert columns.fingerprint(row) == fps[row]
+    assert columns.find("missing") is None
+
+
+def test_section_tables_match_fingerprint_tables(paths):
+    fps, json_path, cols_path = paths
+    json_to_columns(json_path, cols_path)
+
+    tables = FingerprintColumns(cols_path).section_tables()
+
+    assert len(tables) == len(fps)
+    for fp, table in zip(fps, tables):
+        expected = _fingerprint_section_table(fp)
+        assert list(table) == list(expected)
+        for label in expected:
+            np.testing.assert_array_equal(table[label], expected[label])
+
+
+def test_matrix_matches_from_fingerprints(paths):
+    fps, json_path, cols_path = paths
+    json_to_columns(json_path, cols_path)
+
+    matrix = FingerprintColumns(cols_path).to_matrix()
+    expected = FingerprintMatrix.from_fingerprints(fps)
+
+    assert list(matrix.song_ids) == [fp.get("song_id") for fp in fps]
+    np.testing.assert_array_equal(matrix.distances(fps[:15]), expected.distances(fps[:15]))
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from src.fingerprint_matrix import FingerprintMatrix, structure_distances
+from src.similarity import structure_distance, find_similar_songs, find_similar_songs_pruned
+
+LABELS = ["intro", "verse", "chorus", "post_chorus", "bridge", "outro"]
+METERS = ["4/4", "3/4", "6/8", None]
+
+
+# Random fingerprint with the fields structure_distance reads. Structures,
+# profiles and meters are drawn from `labels` / `meters`, so a query built
+# from other lists has labels and meters the corpus vocabulary lacks.
+def random_fingerprint(rng, song_id, labels=LABELS, meters=METERS):
+    structure = [labels[i] for i in rng.integers(len(labels), size=rng.integers(0, 7))]
+    present = sorted(set(structure)) + [labels[int(rng.integers(len(labels)))]]
+
+    fp = {
+        "song_id": song_id,
+        "structure": structure,
+        "chorus_ratio": round(float(rng.uniform(0, 0.6)), 3),
+        "tempo": 0.0 if rng.random() < 0.05 else round(float(rng.uniform(60, 200)), 2),
+        # Profiles skip some labels (NaN columns) and hold a few zeros,
+        # which the scalar path ignores as non-positive.
+        "avg_section_density": {
+            label: 0.0 if rng.random() < 0.1 else round(float(rng.uniform(1, 15)), 2)
+            for label in present if rng.random() < 0.8
+        },
+        "groove_profile": {
+            label: 0.0 if rng.random() < 0.1 else round(float(rng.uniform(5, 60)), 2)
+            for label in present if rng.random() < 0.6
+        },
+    }
+
+    meter = meters[int(rng.integers(len(meters)))]
+    if meter is not None:
+        fp["meter"] = meter
+    return fp
+
+
+def corpus(seed, n=60):
+    rng = np.random.default_rng(seed)
+    return [random_fingerprint(rng, f"song{i}") for i in range(n)]
+
+
+def reference_distances(query_fps, fps):
+    return np.array([[structure_distance(q, fp) for fp in fps] for q in query_fps])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_all_pairs_match_structure_distance(seed):
+    fps = corpus(seed)
+    matrix = FingerprintMatrix.from_fingerprints(fps)
+
+    np.testing.assert_allclose(
+        structure_distances(matrix.rows(), matrix.rows()),
+        reference_distances(fps, fps),
+        rtol=0, atol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_queries_with_unknown_labels_and_meters(seed):
+    rng = np.random.default_rng(100 + seed)
+    fps = corpus(seed)
+    matrix = FingerprintMatrix.from_fingerprints(fps)
+
+    # Labels and meters outside the corpus vocabulary encode as -2 in the
+    # sequence, no profile column, and meter -1.
+    queries = [
+        random_fingerprint(rng, f"query{i}", labels=LABELS[:3] + ["hook", "drop"], meters=["4/4", "5/4", None])
+        for i in range(20)
+    ]
+    encoded = matrix.encode(queries)
+    assert (encoded["sequences"] == -2).any()
+    assert (encoded["meter"] == -1).any()
+
+    np.testing.assert_allclose(
+        matrix.distances(queries),
+        reference_distances(queries, fps),
+        rtol=0, atol=1e-12,
+    )
+
+
+def test_incremental_add_matches_one_shot():
+    fps = corpus(7)
+    matrix = FingerprintMatrix()
+    for start in range(0, len(fps), 13):
+        matrix.add(fps[start:start + 13])
+
+    np.testing.assert_allclose(
+        matrix.distances(fps[:10]),
+        reference_distances(fps[:10], fps),
+        rtol=0, atol=1e-12,
+    )
+
+
+def test_missing_fields_and_empty_corpus():
+    fps = [{"song_id": "bare"}, {"song_id": "empty", "structure": [], "tempo": 120.0}]
+    matrix = FingerprintMatrix.from_fingerprints(fps)
+
+    np.testing.assert_allclose(matrix.distances(fps), reference_distances(fps, fps), rtol=0, atol=1e-12)
+    assert FingerprintMatrix.from_fingerprints([]).distances(fps).shape == (2, 0)
+
+
+# Scalar find_similar_songs before the matrix path.
+def reference_similar(query_fp, all_fps, top_k):
+    results = []
+    for fp in all_fps:
+        if fp.get("song_id") == query_fp.get("song_id"):
+            continue
+        results.append({"song_id": fp.get("song_id"), "distance": round(float(structure_distance(query_fp, fp)), 4)})
+    results.sort(key=lambda x: x["distance"])
+    return results[:top_k]
+
+
+@pytest.mark.parametrize("top_k", [0, 1, 5, 100])
+def test_find_similar_songs_matches_scalar_loop(top_k):
+    fps = corpus(11, n=200)
+    matrix = FingerprintMatrix.from_fingerprints(fps)
+
+    for query in fps[:10] + [random_fingerprint(np.random.default_rng(3), "new")]:
+        expected = reference_similar(query, fps, top_k)
+        assert find_similar_songs(query, fps, top_k) == expected
+        assert find_similar_songs(query, matrix, top_k) == expected
+        assert find_similar_songs_pruned(query, fps, top_k)[0] == expected
@@ -0,0 +1,158 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.fingerprint import build_structure_fingerprint, save_fingerprint
+from src.fingerprint_store import FingerprintStore
+from src.section_similarity import build_section_table
+
+LABELS = ["intro", "verse", "chorus", "bridge", "outro"]
+
+
+def make_fingerprint(song_id, seed, n_sections=None):
+    rng = np.random.default_rng(seed)
+    if n_sections is None:
+        n_sections = int(rng.integers(0, 6))
+
+    sections = []
+    start = 0.0
+    for _ in range(n_sections):
+        length = float(rng.uniform(10, 40))
+        sections.append({
+            "label": LABELS[int(rng.integers(len(LABELS)))],
+            "start": round(start, 2),
+            "end": round(start + length, 2),
+            "mean_density": round(float(rng.uniform(2, 12)), 2),
+            "mean_groove_std": None if rng.random() < 0.2 else round(float(rng.uniform(5, 40)), 2),
+        })
+        start += length
+
+    return build_structure_fingerprint(
+        song_id=song_id,
+        perceived_bpm=float(rng.uniform(70, 180)),
+        meter={"time_signature": "4/4"},
+        structure=None,
+        labeled_sections=sections,
+        duration=max(start, 1.0),
+    )
+
+
+def assert_tables_equal(table, expected):
+    assert list(table) == list(expected)
+    for label in expected:
+        np.testing.assert_array_equal(table[label], expected[label])
+
+
+@pytest.fixture
+def store(tmp_path):
+    with FingerprintStore(str(tmp_path / "fingerprints.db")) as s:
+        yield s
+
+
+def test_upsert_get_contains(store):
+    fp = make_fingerprint("a", 0, n_sections=3)
+    store.upsert(fp)
+
+    assert len(store) == 1
+    assert "a" in store and "b" not in store
+    assert store.get("a") == fp
+    assert store.get("b") is None
+
+
+def test_replace_moves_song_to_the_end(store):
+    fps = [make_fingerprint(song_id, i) for i, song_id in enumerate("abcd")]
+    store.upsert_many(fps)
+
+    replaced = make_fingerprint("b", 99, n_sections=4)
+    store.upsert(replaced)
+
+    assert len(store) == 4
+    assert store.all() == [fps[0], fps[2], fps[3], replaced]
+    assert store.get("b") == replaced
+
+
+def test_delete_removes_fingerprint_and_section_table(store):
+    store.upsert_many([make_fingerprint(song_id, i) for i, song_id in enumerate("abc")])
+    store.delete("b")
+    store.delete("missing")
+
+    assert len(store) == 2
+    assert [fp["song_id"] for fp in store.all()] == ["a", "c"]
+    assert [song_id for song_id, _ in store.iter_section_tables()] == ["a", "c"]
+    assert store._conn.execute("SELECT COUNT(*) FROM section_tables").fetchone()[0] == 2
+
+
+def test_all_matches_save_fingerprint_order(store, tmp_path):
+    json_path = str(tmp_path / "fingerprints.json")
+    ops = [("a", 0), ("b", 1), ("c", 2), ("a", 3), ("d", 4), ("c", 5), ("c", 6)]
+
+    for song_id, seed in ops:
+        fp = make_fingerprint(song_id, seed)
+        save_fingerprint(fp, json_path)
+        store.upsert(fp)
+
+    with open(json_path) as f:
+        assert store.all() == json.load(f)
+
+
+def test_section_tables_align_with_all(store):
+    fps = [make_fingerprint(f"song{i}", i) for i in range(40)]
+    store.upsert_many(fps)
+    store.upsert_many([make_fingerprint("song3", 100), make_fingerprint("song17", 101)])
+    store.delete("song8")
+
+    all_fps = store.all()
+    tables = list(store.iter_section_tables(batch_size=7))
+
+    assert [song_id for song_id, _ in tables] == [fp["song_id"] for fp in all_fps]
+    for fp, (_, table) in zip(all_fps, tables):
+        assert_tables_equal(table, build_section_table(fp["sections"], fp["duration"]))
+
+
+def test_rows_without_section_table_are_rebuilt(store):
+    fps = [make_fingerprint(song_id, i, n_sections=3) for i, song_id in enumerate("abc")]
+    store.upsert_many(fps)
+    store._conn.execute("DELETE FROM section_tables WHERE song_id = 'b'")
+
+    tables = dict(store.iter_section_tables())
+    assert_tables_equal(tables["b"], build_section_table(fps[1]["sections"], fps[1]["duration"]))
+
+
+# main.py's one-time import: a legacy fingerprints.json is loaded into an
+# empty store, then the current song is upserted. The result must match
+# what save_fingerprint alone would have produced, including the section
+# tables lining up with all().
+def test_legacy_json_import_then_upsert(tmp_path):
+    json_path = str(tmp_path / "fingerprints.json")
+    for i, song_id in enumerate(["x", "y", "z", "y"]):
+        save_fingerprint(make_fingerprint(song_id, i), json_path)
+
+    current = make_fingerprint("x", 50, n_sections=5)
+
+    with FingerprintStore(str(tmp_path / "fingerprints.db")) as store:
+        assert len(store) == 0
+        assert store.import_json(json_path) == 3
+        store.upsert(current)
+
+        all_fps = store.all()
+        tables = list(store.iter_section_tables())
+
+    save_fingerprint(current, json_path)
+    with open(json_path) as f:
+        assert all_fps == json.load(f)
+
+    assert [song_id for song_id, _ in tables] == ["z", "y", "x"]
+    for fp, (_, table) in zip(all_fps, tables):
+        assert_tables_equal(table, build_section_table(fp["sections"], fp["duration"]))
+
+
+def test_store_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "fingerprints.db")
+
+    with FingerprintStore(path) as first, FingerprintStore(path) as second:
+        first.upsert(make_fingerprint("a", 0))
+        second.upsert(make_fingerprint("b", 1))
+
+        assert [fp["song_id"] for fp in first.all()] == ["a", "b"]
+        assert [fp["song_id"] for fp in second.all()] == ["a", "b"]
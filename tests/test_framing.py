@@ -0,0 +1,63 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from src.framing import frame_signal, rescale_frames
+
+
+@pytest.mark.parametrize("native_sr, analysis_sr, expected", [
+    # Divisor factors: the requested rate or the first one above it.
+    (48000, 24000, (1024, 256, 24000)),
+    (48000, 22050, (1024, 256, 24000)),
+    (96000, 11025, (256, 64, 12000)),
+    (44100, 22050, (1024, 256, 22050)),
+    (44100, 11025, (512, 128, 11025)),
+    (88200, 22050, (512, 128, 22050)),
+    # Non-divisor factors fall back to the largest one that divides both
+    # the hop and the native rate: 3 -> 2, 8 -> 4.
+    (44100, 14000, (1024, 256, 22050)),
+    (44100, 5000, (512, 128, 11025)),
+    # No factor above 1 fits: native framing.
+    (44100, 30000, (2048, 512, 44100)),
+])
+def test_downsampling(native_sr, analysis_sr, expected):
+    assert rescale_frames(2048, 512, native_sr, analysis_sr) == expected
+
+
+@pytest.mark.parametrize("analysis_sr", [None, 0, 44100, 48000, 192000])
+def test_never_upsamples(analysis_sr):
+    assert rescale_frames(2048, 512, 44100, analysis_sr) == (2048, 512, 44100)
+
+
+def test_odd_hop_keeps_native_framing():
+    assert rescale_frames(2048, 511, 44100, 11025) == (2048, 511, 44100)
+    assert rescale_frames(1000, 300, 48000, 12000) == (250, 75, 12000)
+
+
+@pytest.mark.parametrize("native_sr", [22050, 32000, 44100, 48000, 88200, 96000, 192000])
+@pytest.mark.parametrize("hop_length", [100, 256, 441, 512, 1000])
+@pytest.mark.parametrize("analysis_sr", [8000, 11025, 12000, 14000, 16000, 22050, 24000])
+def test_integer_rate_and_exact_hop_seconds(native_sr, hop_length, analysis_sr):
+    frame_size = 4 * hop_length
+    frame, hop, sr = rescale_frames(frame_size, hop_length, native_sr, analysis_sr)
+
+    assert type(sr) is int and type(hop) is int
+    assert sr >= min(analysis_sr, native_sr)
+    assert native_sr % sr == 0
+    # Onset times (frame index * hop / sr) land on the native seconds.
+    assert Fraction(hop, sr) == Fraction(hop_length, native_sr)
+    assert Fraction(frame, sr) == Fraction(frame_size, native_sr)
+
+
+def test_frame_signal_matches_copy_loop():
+    signal = np.random.default_rng(0).normal(size=10000)
+
+    for frame_size, hop_length in [(2048, 512), (256, 256), (100, 37), (64, 200)]:
+        n = 1 + (len(signal) - frame_size) // hop_length
+        expected = np.array([signal[i * hop_length:i * hop_length + frame_size] for i in range(n)])
+        np.testing.assert_array_equal(frame_signal(signal, frame_size, hop_length), expected)
+        np.testing.assert_array_equal(frame_signal(signal, frame_size, hop_length, copy=True), expected)
+
+    with pytest.raises(ValueError):
+        frame_signal(signal[:10], 64, 16)
@@ -0,0 +1,61 @@
+import numpy as np
+
+from src.groove import compute_groove_metrics, compute_groove_metrics_windows
+
+
+# Clicks every beat at 120 BPM, starting phase * beat after the grid.
+def click_times(bpm=120.0, beats=64, phase=0.0):
+    period = 60.0 / bpm
+    return (np.arange(beats) + phase) * period
+
+
+def test_phase_shifted_clicks_have_no_deviations():
+    groove = compute_groove_metrics(click_times(phase=0.25), 120.0)
+
+    assert groove["mean_abs_deviation_ms"] is None
+    assert groove["std_deviation_ms"] is None
+    assert groove["max_deviation_ms"] is None
+    assert groove["swing_ratio"] == 1.0
+
+
+def test_windows_match_full_path():
+    for phase in (0.0, 0.02, 0.25):
+        times = click_times(phase=phase)
+        full = compute_groove_metrics(times, 120.0)
+        windows = compute_groove_metrics_windows(times, 120.0, [0], [len(times)])
+
+        assert "swing_ratio" not in windows
+        for key, window_values in windows.items():
+            value, window_value = full[key], window_values[0]
+            if value is None:
+                assert np.isnan(window_value)
+            else:
+                assert round(float(window_value), 2) == round(value, 2)
+
+
+def test_random_windows_match_per_window_metrics():
+    rng = np.random.default_rng(0)
+
+    for bpm in (72.0, 120.0, 171.0):
+        period = 60.0 / bpm
+        # Mostly near-beat onsets with a few off-grid ones, so windows hold
+        # a mix of on-beat counts including none at all.
+        grid = np.arange(400) * period / 2
+        times = np.sort(grid + rng.normal(0.0, 0.03 * period, len(grid)).clip(-0.2 * period))
+        times = times[times >= 0]
+
+        lo = rng.integers(0, len(times), 500)
+        hi = np.minimum(lo + rng.integers(0, 40, 500), len(times))
+        windows = compute_groove_metrics_windows(times, bpm, lo, hi)
+
+        undefined = 0
+        for i in range(len(lo)):
+            full = compute_groove_metrics(times[lo[i]:hi[i]], bpm)
+            for key, values in windows.items():
+                if full[key] is None:
+                    undefined += 1
+                    assert np.isnan(values[i])
+                else:
+                    # full[key] is rounded to 0.01 ms; the window value is not.
+                    assert abs(values[i] - full[key]) <= 0.005 + 1e-9
+        assert undefined
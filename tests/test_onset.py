@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from src.onset import detect_onsets, OnlineOnsetDetector
+
+
+# Baseline scalar peak picking over candidates above threshold (a scalar or
+# one value per difference).
+def reference_pick(energy_diff, threshold, min_gap):
+    onsets = []
+    last_onset = -min_gap
+
+    for idx in np.where(energy_diff > threshold)[0]:
+        if idx - last_onset >= min_gap:
+            onsets.append(idx)
+            last_onset = idx
+        else:
+            if energy_diff[idx] > energy_diff[last_onset]:
+                onsets[-1] = idx
+                last_onset = idx
+
+    return onsets
+
+
+def reference_detect(energy, threshold_ratio=1.5, min_gap=3):
+    energy_diff = np.maximum(np.diff(energy), 0)
+    return reference_pick(energy_diff, threshold_ratio * np.mean(energy_diff), min_gap)
+
+
+# The online detector thresholds against the running mean of the positive
+# energy difference instead of the global one.
+def reference_online(energy, threshold_ratio=1.5, min_gap=3):
+    energy_diff = np.maximum(np.diff(energy), 0)
+    running_mean = np.cumsum(energy_diff) / np.arange(1, len(energy_diff) + 1)
+    return reference_pick(energy_diff, threshold_ratio * running_mean, min_gap)
+
+
+def clicks():
+    energy = np.full(400, 0.1)
+    energy[::23] = 1.0
+    return energy
+
+
+def plateaus():
+    # Rises onto flat steps: equal differences tie inside a cluster.
+    return np.repeat([0.0, 1.0, 1.0, 2.0, 2.0, 0.5, 3.0, 3.0, 0.0, 1.0] * 20, 4)
+
+
+def adjacent_peaks():
+    # Candidates one and two frames apart, with the stronger one second,
+    # first and in the middle; clusters longer than min_gap.
+    energy = np.zeros(300)
+    for start in range(0, 300, 30):
+        energy[start:start + 6] = [0.0, 1.0, 0.5, 2.0, 0.2, 1.5]
+    energy[250:262] = np.arange(12) % 2 * np.linspace(1.0, 3.0, 12)
+    return energy
+
+
+def noise():
+    rng = np.random.default_rng(1)
+    return np.abs(rng.standard_normal(2000)) ** 3
+
+
+ENVELOPES = {
+    "clicks": clicks(),
+    "plateaus": plateaus(),
+    "adjacent_peaks": adjacent_peaks(),
+    "noise": noise(),
+    "flat": np.ones(50),
+}
+
+
+@pytest.mark.parametrize("name", ENVELOPES)
+@pytest.mark.parametrize("min_gap", [1, 2, 3, 8])
+def test_vectorized_picking_matches_baseline(name, min_gap):
+    energy = ENVELOPES[name]
+    onsets = detect_onsets(energy, min_gap=min_gap)
+
+    assert onsets.tolist() == reference_detect(energy, min_gap=min_gap)
+
+
+# The global mean of no differences is NaN (as in the baseline): no onsets.
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_empty_input():
+    assert detect_onsets(np.array([])).tolist() == []
+    assert detect_onsets(np.array([1.0])).tolist() == []
+
+    detector = OnlineOnsetDetector()
+    assert detector.process(np.array([])).tolist() == []
+    assert detector.flush().tolist() == []
+
+
+@pytest.mark.parametrize("name", ENVELOPES)
+@pytest.mark.parametrize("min_gap", [1, 3, 8])
+@pytest.mark.parametrize("chunk", [1, 2, 7, 10000])
+def test_online_detector_matches_baseline_picking(name, min_gap, chunk):
+    energy = ENVELOPES[name]
+    detector = OnlineOnsetDetector(min_gap=min_gap)
+
+    onsets = [detector.process(energy[i:i + chunk]) for i in range(0, len(energy), chunk)]
+    onsets = np.concatenate(onsets + [detector.flush()])
+
+    assert onsets.tolist() == reference_online(energy, min_gap=min_gap)
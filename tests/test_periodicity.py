@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from src import periodicity
+from src.periodicity import autocorrelation, estimate_tempo
+
+
+# Baseline direct autocorrelation and tempo estimate.
+def reference_autocorrelation(signal):
+    signal = signal - np.mean(signal)
+    corr = np.correlate(signal, signal, mode="full")
+    corr = corr[corr.size // 2:]
+    return corr / np.max(corr)
+
+
+def reference_tempo(iois, min_bpm=40, max_bpm=200):
+    if len(iois) < 2:
+        return None
+    corr = reference_autocorrelation(iois)
+    lag_times = np.arange(len(corr)) * np.mean(iois)
+    valid = np.where((lag_times >= 60 / max_bpm) & (lag_times <= 60 / min_bpm))[0]
+    if len(valid) == 0:
+        return None
+    return 60 / lag_times[valid[np.argmax(corr[valid])]]
+
+
+# Inter-onset intervals around the beat period at bpm, with every fourth
+# interval split in two and some timing jitter.
+def synthetic_iois(bpm, n, seed=0):
+    rng = np.random.default_rng(seed)
+    period = 60.0 / bpm
+    iois = np.where(np.arange(n) % 4 == 3, period / 2, period)
+    return iois * (1 + 0.03 * rng.standard_normal(n))
+
+
+BPMS = [60, 97, 120, 174]
+
+# Odd and even, around FFT_AUTOCORR_MIN_SIZE, and shorter than the maximum
+# lag (a few IOIs span less than the 1.5 s period of 40 BPM).
+LENGTHS = [2, 3, 4, 7, 31, 100, 511, 512, 513, 2001]
+
+
+@pytest.mark.parametrize("bpm", BPMS)
+@pytest.mark.parametrize("n", LENGTHS)
+def test_fft_matches_direct_autocorrelation(bpm, n):
+    iois = synthetic_iois(bpm, n)
+    expected = reference_autocorrelation(iois)
+
+    for method in ("fft", "direct", "auto"):
+        corr = autocorrelation(iois, method=method)
+        assert corr.shape == expected.shape
+        np.testing.assert_allclose(corr, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("bpm", BPMS)
+@pytest.mark.parametrize("n", LENGTHS)
+@pytest.mark.parametrize("fft_min_size", [0, 10 ** 9])
+def test_tempo_estimate_matches_baseline(monkeypatch, bpm, n, fft_min_size):
+    monkeypatch.setattr(periodicity, "FFT_AUTOCORR_MIN_SIZE", fft_min_size)
+    iois = synthetic_iois(bpm, n)
+
+    tempo, _ = estimate_tempo(iois)
+    expected = reference_tempo(iois)
+
+    if expected is None:
+        assert tempo is None
+    else:
+        assert tempo == pytest.approx(expected, rel=1e-12)
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        autocorrelation(np.ones(4), method="wavelet")
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from benchmarks.synth import case_audio
+from src import pipeline
+from src.pipeline import ANALYSIS_OUTPUTS, STAGES, SongAnalysis
+
+
+@pytest.fixture(scope="module")
+def audio(tmp_path_factory):
+    return case_audio(str(tmp_path_factory.mktemp("audio")), "sections", 40)
+
+
+# Wrap every stage to record the order stages run in.
+@pytest.fixture
+def runs(monkeypatch):
+    order = []
+
+    def recording(name, fn):
+        def run(song, *args):
+            order.append(name)
+            return fn(song, *args)
+        return run
+
+    for name, (deps, fn) in list(STAGES.items()):
+        monkeypatch.setitem(STAGES, name, (deps, recording(name, fn)))
+    return order
+
+
+def assert_same(a, b):
+    if isinstance(a, dict):
+        assert isinstance(b, dict) and list(a) == list(b)
+        for key in a:
+            assert_same(a[key], b[key])
+    elif isinstance(a, (list, tuple)):
+        assert type(a) is type(b) and len(a) == len(b)
+        for x, y in zip(a, b):
+            assert_same(x, y)
+    elif isinstance(a, np.ndarray):
+        np.testing.assert_array_equal(a, b)
+    else:
+        assert a == b or (a != a and b != b)
+
+
+def ancestors(name):
+    deps = set(STAGES[name][0])
+    for dep in STAGES[name][0]:
+        deps |= ancestors(dep)
+    return deps
+
+
+# Stages run to produce names from scratch. front asks for framing itself,
+# only when it decodes (a cache hit never needs it), so it is no declared
+# dependency.
+def needed(*names):
+    stages = set(names).union(*map(ancestors, names))
+    return stages | {"framing"} if "front" in stages else stages
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_every_stage_runs_once_after_its_dependencies(audio, runs, workers):
+    song = SongAnalysis(audio, workers=workers)
+    song.compute(ANALYSIS_OUTPUTS)
+    song.compute(ANALYSIS_OUTPUTS)
+    for name in ANALYSIS_OUTPUTS:
+        song[name]
+
+    assert sorted(runs) == sorted(set(runs))
+    assert set(runs) == needed(*ANALYSIS_OUTPUTS)
+
+    position = {name: i for i, name in enumerate(runs)}
+    for name in runs:
+        assert all(position[dep] < position[name] for dep in STAGES[name][0])
+
+
+def test_get_computes_only_ancestors(audio, runs):
+    song = SongAnalysis(audio)
+
+    song["perceived"]
+    assert set(runs) == needed("perceived")
+    assert "signal" not in runs
+
+    runs.clear()
+    song["groove"]
+    assert runs == ["groove"]
+
+
+def test_missing_is_topological_and_skips_memoized(audio):
+    song = SongAnalysis(audio)
+    song["times"]
+
+    order = song.missing(["report"])
+    assert not set(order) & set(song.values)
+    assert set(order) == ({"report"} | ancestors("report")) - set(song.values)
+    for i, name in enumerate(order):
+        assert set(STAGES[name][0]) - set(song.values) <= set(order[:i])
+
+
+def test_parallel_compute_matches_serial(audio):
+    serial = SongAnalysis(audio, workers=1).compute(ANALYSIS_OUTPUTS)
+
+    for workers in (2, 8):
+        assert_same(SongAnalysis(audio, workers=workers).compute(ANALYSIS_OUTPUTS), serial)
+
+
+def test_seeded_values_are_not_recomputed(audio, runs):
+    energy = SongAnalysis(audio)["energy"]
+    runs.clear()
+
+    song = SongAnalysis(audio, values={"energy": energy, "front": {"hop_length": np.array(512), "sr": np.array(44100)}})
+    song["onsets"]
+    assert runs == ["onsets"]
+
+
+@pytest.mark.parametrize("tempo", [np.nan, 1000.0])
+def test_no_tempo_candidates_leave_perceived_none(tempo):
+    song = SongAnalysis("unused.wav", values={
+        "tempo_estimate": {"tempo": np.array(tempo), "corr": np.empty(0)},
+        "iois": np.empty(0),
+    })
+
+    assert song["candidates"] == []
+    assert song["perceived"] is None
+    assert song["confidences"] == {}
+
+
+def test_analyze_song_without_tempo_returns_none(audio, monkeypatch):
+    monkeypatch.setattr(pipeline, "estimate_tempo", lambda iois: (None, np.empty(0)))
+
+    assert pipeline.analyze_song(audio) is None
+    assert pipeline.analyze_song(audio, workers=4) is None
@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks.synth import case_audio
+from src import pipeline
+from src.cache import StageCache
+
+
+def _no_file_access(*args, **kwargs):
+    raise AssertionError("cache hit opened the audio file")
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_cache_hit_with_analysis_sr_does_not_open_the_file(tmp_path, monkeypatch, stream):
+    path = case_audio(str(tmp_path / "audio"), "steady", 20, sr=48000)
+    cache = StageCache(str(tmp_path / "cache"))
+
+    cold = pipeline.analyze_song(path, stream=stream, cache=cache, analysis_sr=22050)
+    assert cold["sr"] == 24000
+
+    for name in ("audio_info", "load_audio", "stream_audio"):
+        monkeypatch.setattr(pipeline, name, _no_file_access)
+    warm = pipeline.analyze_song(path, stream=stream, cache=cache, analysis_sr=22050)
+
+    assert warm["sr"] == cold["sr"]
+    assert warm["duration"] == cold["duration"]
+    assert list(warm["times"]) == list(cold["times"])
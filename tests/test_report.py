@@ -0,0 +1,118 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.fingerprint import build_structure_fingerprint
+from src.groove import compute_groove_metrics
+from src.meter import infer_meter
+from src.periodicity import inter_onset_intervals, estimate_tempo
+from src.report import generate_report
+from src.rhythm_hierarchy import build_rhythm_hierarchy
+from src.sections import (
+    extract_section_features,
+    detect_section_boundaries,
+    aggregate_section_features,
+    label_sections,
+)
+from src.structure import infer_structure
+from src.tempo_drift import compute_tempo_drift
+
+GROOVE_KEYS = ["mean_abs_deviation_ms", "std_deviation_ms", "max_deviation_ms", "swing_ratio"]
+DEVIATION_KEYS = GROOVE_KEYS[:3]
+
+
+# A few ms of timing jitter, as played.
+def jitter(times, seed=0):
+    return times + np.random.default_rng(seed).normal(0.0, 0.002, len(times))
+
+
+# 120 BPM clicks a quarter beat off the grid: no onset is on the beat.
+def off_grid():
+    return jitter((np.arange(240) + 0.25) * 0.5)
+
+
+# Off the grid for 60 s, then on the grid with eighth notes for 60 s.
+def mixed():
+    return jitter(np.concatenate(((np.arange(120) + 0.25) * 0.5, 60.0 + np.arange(240) * 0.25)))
+
+
+# The report main.py writes, built stage by stage at a perceived 120 BPM.
+def report_of(times):
+    perceived = 120.0
+    iois = inter_onset_intervals(times)
+    _, corr = estimate_tempo(iois)
+
+    features = extract_section_features(times, perceived)
+    boundaries = detect_section_boundaries(features)
+    sections = aggregate_section_features(features, boundaries)
+    labeled = label_sections(sections)
+    structure = infer_structure(sections)
+    hierarchy = build_rhythm_hierarchy(corr=corr, iois=iois, perceived_bpm=perceived)
+    meter = infer_meter(perceived, hierarchy)
+    fingerprint = build_structure_fingerprint(
+        song_id="clicks",
+        perceived_bpm=perceived,
+        meter=meter,
+        structure=structure,
+        labeled_sections=labeled,
+        duration=float(times[-1]),
+    )
+
+    report = generate_report(
+        duration=float(times[-1]),
+        sample_rate=22050,
+        onsets=times,
+        iois=iois,
+        perceived_tempo=perceived,
+        subdivision_tempo=240.0,
+        conf_perceived=1.0,
+        conf_subdivision=1.0,
+        rhythm_hierarchy=hierarchy,
+        groove=compute_groove_metrics(times, perceived),
+        tempo_drift=compute_tempo_drift(times, perceived),
+        meter=meter,
+        section_features=features,
+        boundaries=boundaries,
+        labeled_sections=labeled,
+        structure=structure,
+        fingerprint=fingerprint,
+    )
+    # Round trip as save_report / save_fingerprint do; NaN would fail here.
+    return json.loads(json.dumps(report, allow_nan=False))
+
+
+def test_undefined_groove_is_null_in_report():
+    report = report_of(off_grid())
+
+    assert list(report["groove"]) == GROOVE_KEYS
+    assert all(report["groove"][key] is None for key in DEVIATION_KEYS)
+    assert report["groove"]["swing_ratio"] == pytest.approx(1.0, abs=0.01)
+
+    features = report["sections"]["features"]
+    assert features and all(f["groove_mean"] is None and f["groove_std"] is None for f in features)
+    assert all(s["mean_groove_std"] is None for s in report["sections"]["labeled"])
+
+    # No label has a groove value, so the profile is empty rather than null.
+    assert report["fingerprint"]["groove_profile"] == {}
+    assert report["fingerprint"]["avg_section_density"]
+
+
+def test_groove_profile_omits_labels_without_values():
+    report = report_of(mixed())
+    fingerprint = report["fingerprint"]
+    labeled = report["sections"]["labeled"]
+
+    assert all(report["groove"][key] is not None for key in GROOVE_KEYS)
+
+    defined = {s["label"] for s in labeled if s["mean_groove_std"] is not None}
+    undefined = {s["label"] for s in labeled} - defined
+    assert defined and any(s["mean_groove_std"] is None for s in labeled)
+
+    assert set(fingerprint["groove_profile"]) == defined
+    assert not undefined & set(fingerprint["groove_profile"])
+    assert set(fingerprint["avg_section_density"]) == {s["label"] for s in labeled}
+
+    for label, value in fingerprint["groove_profile"].items():
+        values = [s["mean_groove_std"] for s in labeled if s["label"] == label and s["mean_groove_std"] is not None]
+        assert value == pytest.approx(sum(values) / len(values), abs=0.005)
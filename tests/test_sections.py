@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+
+from src.fingerprint import build_structure_fingerprint
+from src.sections import (
+    extract_section_features,
+    detect_section_boundaries,
+    aggregate_section_features,
+    label_sections,
+)
+from src.structure import infer_structure
+
+
+# 120 BPM clicks a quarter beat off the grid for 60 s, then on the grid
+# with eighth notes for 60 s.
+def onset_times():
+    off_grid = (np.arange(120) + 0.25) * 0.5
+    on_grid = 60.0 + np.arange(240) * 0.25
+    return np.concatenate((off_grid, on_grid))
+
+
+def sections_of(times):
+    features = extract_section_features(times, 120.0)
+    boundaries = detect_section_boundaries(features)
+    return features, label_sections(aggregate_section_features(features, boundaries))
+
+
+def test_windows_without_on_beat_onsets_have_no_groove():
+    features, _ = sections_of(onset_times())
+
+    off_grid = [f for f in features if f["end"] <= 60.0]
+    on_grid = [f for f in features if f["start"] >= 60.0]
+    assert off_grid and all(f["groove_mean"] is None and f["groove_std"] is None for f in off_grid)
+    assert on_grid and all(f["groove_std"] is not None for f in on_grid)
+
+
+def test_undefined_groove_stays_out_of_fingerprints():
+    times = onset_times()
+    _, sections = sections_of(times)
+    assert len(sections) >= 2
+
+    fp = build_structure_fingerprint(
+        song_id="clicks",
+        perceived_bpm=120.0,
+        meter={"time_signature": "4/4"},
+        structure=infer_structure(sections),
+        labeled_sections=sections,
+        duration=float(times[-1]),
+    )
+
+    json.dumps(fp, allow_nan=False)
+    assert all(v is not None for v in fp["groove_profile"].values())
@@ -0,0 +1,225 @@
+import json
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pytest
+
+from src.fingerprint_columns import FingerprintColumns, json_to_columns
+from src.fingerprint_store import FingerprintStore
+from src.service import SimilarityService, make_server
+from tests.test_fingerprint_columns import library, regular_fingerprint
+
+ENDPOINTS = ("similar", "sections", "chorus")
+
+
+@pytest.fixture
+def columns_path(tmp_path):
+    json_path = str(tmp_path / "fingerprints.json")
+    with open(json_path, "w") as f:
+        json.dump(library(), f)
+
+    path = str(tmp_path / "fingerprints.cols")
+    json_to_columns(json_path, path)
+    return path
+
+
+# Rows of a columnar library that get turned into fingerprint dicts.
+@pytest.fixture
+def materialized(monkeypatch):
+    rows = []
+    fingerprint = FingerprintColumns.fingerprint
+
+    def recording(self, row):
+        rows.append(int(row))
+        return fingerprint(self, row)
+
+    monkeypatch.setattr(FingerprintColumns, "fingerprint", recording)
+    return rows
+
+
+def answers(service, song_ids, **kwargs):
+    return {
+        (endpoint, song_id): getattr(service, endpoint)(song_id=song_id, top_k=8, **kwargs)
+        for endpoint in ENDPOINTS
+        for song_id in song_ids
+    }
+
+
+def test_from_columns_reads_only_json_rows(columns_path, materialized):
+    service = SimilarityService.from_columns(columns_path)
+    irregular = set(np.flatnonzero(np.asarray(FingerprintColumns(columns_path).extras) >= 0).tolist())
+
+    assert len(service) == len(library())
+    assert set(materialized) <= irregular
+
+    materialized.clear()
+    service.similar(song_id="song3")
+    service.sections(song_id="song3")
+    service.chorus(song_id="song3")
+    assert set(materialized) == {3}
+
+
+def test_from_columns_answers_like_fingerprint_list(columns_path):
+    fps = library()
+    song_ids = [fps[i]["song_id"] for i in (0, 3, 10, 13, 30, len(fps) - 1)]
+
+    assert answers(SimilarityService.from_columns(columns_path), song_ids) == answers(SimilarityService(fps), song_ids)
+
+
+def test_inserts_on_columns_match_fingerprint_list(columns_path):
+    fps = library()
+    rng = np.random.default_rng(9)
+    added = [regular_fingerprint(rng, "new1", 4), regular_fingerprint(rng, "new2", 0)]
+    replaced = [regular_fingerprint(rng, "song5", 3), regular_fingerprint(rng, "bare", 2)]
+
+    lazy = SimilarityService.from_columns(columns_path)
+    eager = SimilarityService(fps)
+    for service in (lazy, eager):
+        service.insert(added)
+        service.insert(replaced)
+
+    expected = [fp for fp in fps if fp["song_id"] not in ("song5", "bare")] + added + replaced
+    assert len(lazy) == len(expected)
+    assert list(lazy._snapshot.fps) == expected
+
+    song_ids = ["song0", "song5", "bare", "new1", "new2", "extra_key"]
+    assert answers(lazy, song_ids) == answers(eager, song_ids) == answers(SimilarityService(expected), song_ids)
+
+
+@pytest.fixture
+def server():
+    service = SimilarityService(library())
+    httpd = make_server(service, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield service, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    thread.join()
+
+
+# (status, payload) of a GET, or of a POST when body is given.
+def request(url, body=None):
+    data = None if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    try:
+        with urlopen(Request(url, data=data, method="GET" if data is None else "POST")) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        with e:
+            return e.code, json.load(e)
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_queries_over_http(server, endpoint):
+    service, url = server
+
+    status, payload = request(f"{url}/{endpoint}?song_id=song3&top_k=4")
+    assert status == 200
+    assert payload["results"] == getattr(service, endpoint)(song_id="song3", top_k=4)
+
+    fp = regular_fingerprint(np.random.default_rng(1), "query", 3)
+    status, payload = request(f"{url}/{endpoint}", {"fingerprint": fp, "top_k": 2})
+    assert status == 200
+    assert payload["results"] == getattr(service, endpoint)(fingerprint=fp, top_k=2)
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_missing_song_id_is_400(server, endpoint):
+    _, url = server
+
+    status, payload = request(f"{url}/{endpoint}")
+    assert status == 400
+    assert "song_id" in payload["error"]
+
+    assert request(f"{url}/{endpoint}", b"{not json")[0] == 400
+    assert request(f"{url}/{endpoint}?song_id=song3&top_k=many")[0] == 400
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_unknown_song_id_is_404(server, endpoint):
+    _, url = server
+
+    status, payload = request(f"{url}/{endpoint}?song_id=nope")
+    assert status == 404
+    assert "nope" in payload["error"]
+
+
+def test_unknown_endpoint_is_404(server):
+    _, url = server
+
+    assert request(f"{url}/nothing")[0] == 404
+    assert request(f"{url}/insert")[0] == 404
+
+
+def test_unexpected_error_is_500(server, monkeypatch, capsys):
+    service, url = server
+
+    def broken(**kwargs):
+        raise RuntimeError("index corrupted")
+
+    monkeypatch.setattr(service, "similar", broken)
+    status, payload = request(f"{url}/similar?song_id=song3")
+
+    assert status == 500
+    assert "RuntimeError: index corrupted" in payload["error"]
+    assert "index corrupted" in capsys.readouterr().err
+    # Failed queries stay out of the latency stats.
+    assert "similar" not in service.stats()["endpoints"]
+
+
+def test_insert_swaps_snapshot(server):
+    service, url = server
+    before = service._snapshot
+    fp = regular_fingerprint(np.random.default_rng(2), "inserted", 4)
+
+    assert request(f"{url}/similar?song_id=inserted")[0] == 404
+
+    status, payload = request(f"{url}/insert", {"fingerprints": [fp]})
+    assert status == 200
+    assert payload["songs"] == len(before.fps) + 1
+
+    # Queries see the new generation; the old one is left as it was for
+    # readers still holding it.
+    status, payload = request(f"{url}/similar?song_id=inserted&top_k=3")
+    assert status == 200 and len(payload["results"]) == 3
+    assert service._snapshot is not before
+    assert "inserted" not in before.rows and len(before.matrix) == len(before.fps)
+
+    # Latencies are recorded after the response is sent, so wait for them.
+    deadline = time.monotonic() + 5
+    while True:
+        status, stats = request(f"{url}/stats")
+        counts = {name: e["count"] for name, e in stats["endpoints"].items()}
+        if counts == {"insert": 1, "similar": 1} or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+
+    assert status == 200
+    assert stats["songs"] == len(before.fps) + 1
+    assert counts == {"insert": 1, "similar": 1}
+
+
+def test_failed_insert_keeps_snapshot(server):
+    service, url = server
+    before = service._snapshot
+
+    status, _ = request(f"{url}/insert", {"fingerprints": [{"tempo": 120.0}]})
+    assert status == 400
+    assert service._snapshot is before
+
+
+def test_insert_persists_to_store(tmp_path):
+    path = str(tmp_path / "fingerprints.db")
+    with FingerprintStore(path) as store:
+        store.upsert_many(library()[:20])
+
+    service = SimilarityService.from_store(path)
+    fp = regular_fingerprint(np.random.default_rng(3), "song4", 2)
+    assert service.insert([fp]) == 20
+
+    with FingerprintStore(path) as store:
+        assert store.all() == list(service._snapshot.fps)
+        assert store.get("song4") == fp
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from src.vector_index import VectorIndex
+
+
+# Points scattered around a few centres, like fingerprint vectors of songs
+# sharing tempo and form.
+def clustered_vectors(n=3000, dim=7, centres=40, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.uniform(0, 1, (centres, dim))
+    return means[rng.integers(centres, size=n)] + rng.normal(0, 0.03, (n, dim))
+
+
+@pytest.fixture(scope="module")
+def index_and_vectors():
+    vectors = clustered_vectors()
+    ids = [f"song{i}" for i in range(len(vectors))]
+    return VectorIndex.build(vectors, ids, n_lists=50), vectors
+
+
+def exact_ids(vectors, query, top_k):
+    dist = np.sqrt(np.sum((vectors - query) ** 2, axis=1))
+    return [f"song{i}" for i in np.argsort(dist, kind="stable")[:top_k]]
+
+
+def test_probing_every_list_is_exact(index_and_vectors):
+    index, vectors = index_and_vectors
+    rng = np.random.default_rng(1)
+
+    for query in vectors[rng.choice(len(vectors), 50, replace=False)]:
+        results = index.query(query, top_k=10, n_probe=index.n_lists)
+        assert [r["song_id"] for r in results] == exact_ids(vectors, query, 10)
+
+
+def test_recall_against_exact_search(index_and_vectors):
+    index, vectors = index_and_vectors
+    rng = np.random.default_rng(2)
+    queries = vectors[rng.choice(len(vectors), 200, replace=False)] + rng.normal(0, 0.01, (200, vectors.shape[1]))
+
+    recall = {}
+    for n_probe in (1, 4, 8):
+        hits = 0
+        for query in queries:
+            found = {r["song_id"] for r in index.query(query, top_k=10, n_probe=n_probe)}
+            hits += len(found & set(exact_ids(vectors, query, 10)))
+        recall[n_probe] = hits / (10 * len(queries))
+
+    assert recall[1] <= recall[4] <= recall[8]
+    assert recall[8] >= 0.95
+
+
+@pytest.mark.parametrize("n_probe", [0, -3])
+def test_non_positive_n_probe_probes_one_list(index_and_vectors, n_probe):
+    index, vectors = index_and_vectors
+
+    assert index.query(vectors[0], n_probe=n_probe) == index.query(vectors[0], n_probe=1)
+
+
+def test_top_k_and_exclude(index_and_vectors):
+    index, vectors = index_and_vectors
+
+    assert index.query(vectors[0], top_k=0) == []
+    assert len(index.query(vectors[0], top_k=len(vectors) + 5, n_probe=index.n_lists)) == len(vectors)
+    assert "song0" not in [r["song_id"] for r in index.query(vectors[0], top_k=20, exclude="song0")]
+
+
+def test_save_and_load_round_trip(index_and_vectors, tmp_path):
+    index, vectors = index_and_vectors
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = VectorIndex.load(path)
+
+    for query in vectors[:20]:
+        assert loaded.query(query, top_k=5) == index.query(query, top_k=5)
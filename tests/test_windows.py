@@ -0,0 +1,175 @@
+import numpy as np
+import pytest
+
+from src.groove import compute_groove_metrics
+from src.sections import extract_section_features
+from src.tempo_drift import compute_tempo_drift
+from src.windows import window_bounds, iter_windows
+
+
+# Window starts and boolean-mask slices, as the scalar loops built them
+# before window_bounds.
+def reference_windows(onset_times, window_seconds=12, hop_seconds=None):
+    if hop_seconds is None:
+        hop_seconds = window_seconds / 2
+
+    duration = onset_times[-1]
+    windows = []
+    start = 0.0
+    while start + window_seconds <= duration:
+        end = start + window_seconds
+        windows.append((start, end, onset_times[(onset_times >= start) & (onset_times < end)]))
+        start += hop_seconds
+    return windows
+
+
+# Scalar extract_section_features: mask slicing and per-window groove.
+def reference_features(onset_times, perceived_bpm, window_seconds=12):
+    features = []
+    for start, end, window_onsets in reference_windows(onset_times, window_seconds):
+        if len(window_onsets) < 3:
+            continue
+        groove = compute_groove_metrics(window_onsets, perceived_bpm)
+        features.append({
+            "start": round(start, 2),
+            "end": round(end, 2),
+            "onset_density": len(window_onsets) / window_seconds,
+            "groove_mean": groove["mean_abs_deviation_ms"],
+            "groove_std": groove["std_deviation_ms"],
+        })
+    return features
+
+
+# Scalar compute_tempo_drift over reference_windows.
+def reference_tempo_drift(onset_times, perceived_bpm, window_seconds=12):
+    beat_period = 60.0 / perceived_bpm
+    windows = []
+    local_bpms = []
+    for start, end, window_onsets in reference_windows(onset_times, window_seconds):
+        if len(window_onsets) < 3:
+            continue
+        beat_times = np.round(window_onsets / beat_period) * beat_period
+        beat_onsets = window_onsets[np.abs(window_onsets - beat_times) < (0.15 * beat_period)]
+        if len(beat_onsets) < 3:
+            continue
+        local_bpm = 60.0 / np.median(np.diff(beat_onsets))
+        if abs(local_bpm - perceived_bpm) <= 0.25 * perceived_bpm:
+            local_bpms.append(local_bpm)
+            windows.append({"start": round(start, 2), "end": round(end, 2), "bpm": round(local_bpm, 2)})
+
+    if not local_bpms:
+        return None
+    if len(local_bpms) < 5:
+        return {
+            "window_seconds": window_seconds,
+            "note": "Insufficient stable beat windows for global drift statistics",
+            "sections": windows
+        }
+    local_bpms = np.array(local_bpms)
+    drift = local_bpms - perceived_bpm
+    mean_drift = float(np.mean(drift))
+    bias = "push" if mean_drift > 0.5 else "pull" if mean_drift < -0.5 else "neutral"
+    return {
+        "window_seconds": window_seconds,
+        "mean_local_bpm": round(float(np.mean(local_bpms)), 2),
+        "std_local_bpm": round(float(np.std(local_bpms)), 2),
+        "max_deviation_bpm": round(float(np.max(np.abs(drift))), 2),
+        "mean_deviation_bpm": round(mean_drift, 2),
+        "bias": bias,
+        "sections": windows
+    }
+
+
+def on_edges():
+    # Every window start and end (multiples of 6 s) is itself an onset.
+    return np.arange(0.0, 60.5, 0.5)
+
+
+def jittered():
+    rng = np.random.default_rng(7)
+    return np.sort(np.arange(0.0, 90.0, 0.5) + rng.normal(0.0, 0.01, 180)).clip(0.0)
+
+
+def with_gap():
+    # Nothing between 20 s and 50 s: several windows are empty.
+    return np.concatenate((np.arange(0.0, 20.0, 0.25), np.arange(50.0, 80.0, 0.25)))
+
+
+def sparse():
+    # Windows with one or two onsets, below the section feature minimum.
+    return np.array([0.0, 5.0, 13.0, 14.0, 25.0, 31.0, 31.5, 32.0, 40.0])
+
+
+def exactly_one_window():
+    return np.arange(0.0, 12.5, 0.5)
+
+
+def shorter_than_window():
+    return np.arange(0.0, 11.5, 0.5)
+
+
+def single_onset():
+    return np.array([3.0])
+
+
+CASES = [on_edges, jittered, with_gap, sparse, exactly_one_window, shorter_than_window, single_onset]
+
+
+@pytest.mark.parametrize("case", CASES)
+@pytest.mark.parametrize("window_seconds, hop_seconds", [(12, None), (10, 10 / 3), (4, 4)])
+def test_window_bounds_match_mask_slicing(case, window_seconds, hop_seconds):
+    times = case()
+    bounds = window_bounds(times, window_seconds, hop_seconds)
+    reference = reference_windows(times, window_seconds, hop_seconds)
+
+    windows = list(iter_windows(times, bounds))
+    assert len(windows) == len(reference)
+    for (start, end, onsets), (ref_start, ref_end, ref_onsets) in zip(windows, reference):
+        assert start == ref_start
+        assert end == ref_end
+        np.testing.assert_array_equal(onsets, ref_onsets)
+
+
+def test_track_shorter_than_one_window_has_no_windows():
+    starts, ends, lo, hi = window_bounds(shorter_than_window())
+
+    assert len(starts) == len(ends) == len(lo) == len(hi) == 0
+    assert extract_section_features(shorter_than_window(), 120.0) == []
+    assert compute_tempo_drift(shorter_than_window(), 120.0) is None
+
+
+def test_empty_windows_are_empty_slices():
+    times = with_gap()
+    _, _, lo, hi = window_bounds(times)
+
+    assert np.any(hi == lo)
+    assert np.all(hi >= lo)
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_section_features_match_scalar_slicing(case):
+    times = case()
+    features = extract_section_features(times, 120.0)
+    reference = reference_features(times, 120.0)
+
+    assert [f["start"] for f in features] == [f["start"] for f in reference]
+    assert [f["end"] for f in features] == [f["end"] for f in reference]
+    assert [f["onset_density"] for f in features] == [f["onset_density"] for f in reference]
+
+    for f, ref in zip(features, reference):
+        for key in ("groove_mean", "groove_std"):
+            if ref[key] is None:
+                assert f[key] is None
+            else:
+                # Both sides are rounded to 0.01 ms from sums taken in a
+                # different order, so they may land one step apart.
+                assert f[key] == pytest.approx(ref[key], abs=0.0101)
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_tempo_drift_matches_scalar_slicing(case):
+    times = case()
+
+    drift = compute_tempo_drift(times, 120.0)
+    assert compute_tempo_drift(times, 120.0, bounds=window_bounds(times)) == drift
+    assert drift == reference_tempo_drift(times, 120.0)